@@ -0,0 +1,177 @@
+#!/usr/bin/python
+"""
+Measures how long importing the bot takes, per module, with `python -X importtime`.
+
+Usage:
+    python bin/bench_import_time.py
+    python bin/bench_import_time.py --runs 5 --top 30
+    python bin/bench_import_time.py --save baseline.json
+    python bin/bench_import_time.py --baseline baseline.json --max-regression 20
+
+By default main and every cog are imported, like the bot does on startup.
+Each run imports in a fresh interpreter, and the fastest run of every module is kept,
+which filters out most of the noise of a cold disk cache.
+With --baseline, the script exits with 1 if the total import time grew by more than
+--max-regression percent, or if a module got slower by more than that and at least 5ms.
+"""
+
+import argparse
+import json
+import os
+import pathlib
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+# config.constants exits when these are missing, any value will do for an import.
+PLACEHOLDER_ENV = {"APP_MODE": "test", "BOT_TOKEN_TEST": "import-time-benchmark"}
+MIN_REGRESSION_US = 5000
+
+
+def default_modules() -> List[str]:
+    cogs = sorted(
+        f"cogs.{path.stem}" for path in (ROOT / "cogs").glob("*.py")
+    )
+    return ["main", *cogs]
+
+
+def import_times(modules: List[str]) -> Dict[str, Tuple[int, int]]:
+    """
+    Imports the modules in a fresh interpreter.
+    Returns (self, cumulative) microseconds keyed by module name.
+    """
+    env = {**PLACEHOLDER_ENV, **os.environ}
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            "; ".join(f"import {module}" for module in modules),
+        ],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        error = "\n".join(
+            line
+            for line in result.stderr.splitlines()
+            if not line.startswith("import time:")
+        )
+        sys.exit(f"Importing {', '.join(modules)} failed:\n{error}")
+    times: Dict[str, Tuple[int, int]] = dict()
+    for line in result.stderr.splitlines():
+        # import time:       self [us] |  cumulative | imported package
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def best_of(runs: List[Dict[str, Tuple[int, int]]]) -> Dict[str, Tuple[int, int]]:
+    best: Dict[str, Tuple[int, int]] = dict()
+    for times in runs:
+        for name, (self_us, cumulative_us) in times.items():
+            if name not in best or cumulative_us < best[name][1]:
+                best[name] = (self_us, cumulative_us)
+    return best
+
+
+def top_level(times: Dict[str, Tuple[int, int]], modules: List[str]) -> int:
+    return sum(times.get(module, (0, 0))[1] for module in modules)
+
+
+def print_report(times: Dict[str, Tuple[int, int]], modules: List[str], top: int):
+    print(f"Total import time: {top_level(times, modules) / 1000:.1f}ms")
+    print()
+    print(f"{'module':<40} {'cumulative':>12} {'self':>10}")
+    for name, (self_us, cumulative_us) in sorted(
+        times.items(), key=lambda item: item[1][1], reverse=True
+    )[:top]:
+        print(f"{name:<40} {cumulative_us / 1000:>10.1f}ms {self_us / 1000:>8.1f}ms")
+    print()
+    print("Our own modules:")
+    own = [
+        (name, value)
+        for name, value in times.items()
+        if name.split(".")[0]
+        in {"main", "cogs", "core", "db", "config", "utils", "view"}
+    ]
+    for name, (self_us, cumulative_us) in sorted(
+        own, key=lambda item: item[1][0], reverse=True
+    )[:top]:
+        print(f"{name:<40} {cumulative_us / 1000:>10.1f}ms {self_us / 1000:>8.1f}ms")
+
+
+def compare(
+    times: Dict[str, Tuple[int, int]],
+    baseline: Dict[str, Tuple[int, int]],
+    modules: List[str],
+    max_regression: float,
+) -> bool:
+    """
+    Prints the regressions against the baseline. Returns False if any of them is over the limit.
+    """
+    ok = True
+    total, baseline_total = top_level(times, modules), top_level(baseline, modules)
+    change = (total - baseline_total) / baseline_total * 100 if baseline_total else 0
+    print()
+    print(
+        f"Total: {baseline_total / 1000:.1f}ms -> {total / 1000:.1f}ms ({change:+.1f}%)"
+    )
+    if change > max_regression:
+        ok = False
+    for name, (_, cumulative_us) in sorted(times.items()):
+        if name not in baseline:
+            continue
+        before = baseline[name][1]
+        grown = cumulative_us - before
+        if grown >= MIN_REGRESSION_US and grown / max(before, 1) * 100 > max_regression:
+            print(
+                f"  {name}: {before / 1000:.1f}ms -> {cumulative_us / 1000:.1f}ms"
+            )
+            ok = False
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "modules", nargs="*", help="The modules to import. Defaults to main and every cog."
+    )
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument("--save", help="Write the measured times to this JSON file.")
+    parser.add_argument("--baseline", help="Compare against a file written by --save.")
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        default=20,
+        help="Percent of slowdown tolerated by --baseline.",
+    )
+    args = parser.parse_args()
+    modules = args.modules or default_modules()
+
+    times = best_of([import_times(modules) for _ in range(args.runs)])
+    print_report(times, modules, args.top)
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump({"modules": modules, "times": times}, file, indent=2)
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = {
+                name: (self_us, cumulative_us)
+                for name, (self_us, cumulative_us) in json.load(file)["times"].items()
+            }
+        if not compare(times, baseline, modules, args.max_regression):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
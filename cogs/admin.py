@@ -7,11 +7,15 @@ from discord.ext.commands.errors import (
     ExtensionNotLoaded,
     CommandError,
 )
+from typing import TYPE_CHECKING
 from utils.checks import is_me_command, IsNotDev
 
+if TYPE_CHECKING:
+    from main import DragonBot
+
 
 class admin(Cog):
-    def __init__(self, bot: commands.Bot):
+    def __init__(self, bot: "DragonBot"):
         self.bot = bot
 
     @commands.command(name="load", hidden=True)
@@ -72,6 +76,43 @@ class admin(Cog):
             "\n".join(s.split("cogs.")[1] for s in self.bot.extensions)
         )
 
+    @commands.command(name="db_stats", hidden=True)
+    @is_me_command()
+    async def db_stats(self, ctx: Context):
+        db_manager = self.bot.async_db_manager
+        pool = db_manager.pool_stats()
+        wait = pool.acquire_wait
+        statements = db_manager.statement_cache_stats()
+        lines = [
+            f"Pool: {pool.in_use} in use / {pool.size} open / {pool.max_size} max, peak {pool.peak_in_use}, {pool.replicas} read replicas",
+            f"Acquire wait: p50 {wait.p50_ms:.1f}ms, p95 {wait.p95_ms:.1f}ms, max {wait.max_ms:.1f}ms",
+            f"SQL cache: {statements.hits} hits, {statements.misses} misses",
+        ]
+        latencies = sorted(
+            db_manager.query_latencies().items(),
+            key=lambda item: item[1].count,
+            reverse=True,
+        )
+        for (table_name, operation), latency in latencies[:15]:
+            lines.append(
+                f"{table_name}.{operation}: {latency.count} calls, p50 {latency.p50_ms:.1f}ms, p95 {latency.p95_ms:.1f}ms"
+            )
+        return await ctx.send("\n".join(lines))
+
+    @commands.command(name="startup_report", hidden=True)
+    @is_me_command()
+    async def startup_report(self, ctx: Context):
+        report = self.bot.startup.report
+        if not report:
+            return await ctx.send("Startup has not finished yet.")
+        lines = [f"Startup: {report.total:.3f}s"]
+        for phase in report.phases:
+            indent = "  " if phase.group else ""
+            lines.append(
+                f"{indent}{phase.name}: {phase.duration:.3f}s{'' if phase.ok else ' (failed)'}"
+            )
+        return await ctx.send("\n".join(lines))
+
     @commands.command(name="purge_msg", hidden=True, aliases=["purge"])
     @commands.has_permissions(administrator=True)
     async def purge_msg(self, ctx: Context, limit: int):
@@ -103,6 +144,16 @@ class admin(Cog):
         if isinstance(error, IsNotDev):
             await ctx.send(error.message)
 
+    @db_stats.error
+    async def db_stats_error(self, ctx: Context, error: CommandError):
+        if isinstance(error, IsNotDev):
+            await ctx.send(error.message)
+
+    @startup_report.error
+    async def startup_report_error(self, ctx: Context, error: CommandError):
+        if isinstance(error, IsNotDev):
+            await ctx.send(error.message)
+
 
-async def setup(client):
+async def setup(client: "DragonBot"):
     await client.add_cog(admin(client))
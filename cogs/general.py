@@ -1,8 +1,11 @@
+from typing import TYPE_CHECKING
 from discord import app_commands, Interaction
 from discord.ext.commands import Cog
 
 from core.feedback_manager import FeedbackManager
-from main import DragonBot
+
+if TYPE_CHECKING:
+    from main import DragonBot
 
 
 class general(Cog):
@@ -11,7 +14,7 @@ class general(Cog):
         description="Feedback statistics.",
     )
 
-    def __init__(self, bot: DragonBot, feedback_manager: FeedbackManager):
+    def __init__(self, bot: "DragonBot", feedback_manager: FeedbackManager):
         self.bot = bot
         self.feedback_manager = feedback_manager
 
@@ -29,17 +32,17 @@ class general(Cog):
         await interaction.response.defer(thinking=True)
         if limit <= 0:
             return await interaction.followup.send("欲查詢排行榜之紀錄筆數需為正整數")
-        leaderboard = await self.feedback_manager.get_feedback_leaderboard(
+        stats, leaderboard = await self.feedback_manager.get_feedback_overview(
             guild_id=interaction.guild_id, limit=limit
         )
         if not leaderboard:
             return await interaction.followup.send("此伺服器沒有回饋單填寫紀錄...")
         leaderboard_embed = await self.feedback_manager.to_feedback_leaderboard_embed(
-            leaderboard=leaderboard, guild=interaction.guild
+            leaderboard=leaderboard, guild=interaction.guild, stats=stats
         )
         assert leaderboard_embed
         await interaction.followup.send(embed=leaderboard_embed)
 
 
-async def setup(client: DragonBot):
+async def setup(client: "DragonBot"):
     await client.add_cog(general(bot=client, feedback_manager=client.feedback_manager))
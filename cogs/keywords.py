@@ -8,7 +8,7 @@ from discord import (
     Embed,
 )
 from discord.ext import commands
-from typing import Literal, Optional, List
+from typing import TYPE_CHECKING, Literal, Optional, List
 from discord.ext.commands import Cog
 
 from config.constants import THEME_COLOR
@@ -21,11 +21,13 @@ from config.models import (
 )
 from core.keyword_manager import KeywordManager
 from core.ticket_manager import TicketManager
-from main import DragonBot
 from utils import embed_utils
 from view.keyword_views import KeywordChange, KeywordChangeModal
 from view.pagination_view import KeywordPaginationView
 
+if TYPE_CHECKING:
+    from main import DragonBot
+
 
 class KeywordCog(Cog):
     def __init__(
@@ -73,34 +75,23 @@ class KeywordCog(Cog):
             or not isinstance(message.channel, TextChannel)
         ):
             return
-        all_keywords = self.keyword_manager.get_all_keywords_in_guild(message.guild.id)
-        for trigger, keyword in all_keywords.items():
+        matched_keywords = self.keyword_manager.match_keywords(
+            guild_id=message.guild.id, content=message.content
+        )
+        if not matched_keywords:
+            return
+        is_ticket_channel = await self.ticket_manager.is_ticket_channel(
+            channel_id=message.channel.id
+        )
+        for keyword in matched_keywords:
             if not keyword.is_allowed_in(
                 channel_id=message.channel.id,
-                is_ticket_channel=await self.ticket_manager.is_ticket_channel(
-                    channel_id=message.channel.id
-                ),
+                is_ticket_channel=is_ticket_channel,
             ):
                 continue
-
-            if (
-                message.content.startswith(trigger)
-                and keyword.kw_type.name == KeywordType.MATCH_START.name
-            ):
-                await message.channel.send(
-                    await self._get_response(
-                        keyword=keyword, channel_id=message.channel.id
-                    )
-                )
-            elif (
-                trigger in message.content
-                and keyword.kw_type.name == KeywordType.IS_SUBSTR.name
-            ):
-                await message.channel.send(
-                    await self._get_response(
-                        keyword=keyword, channel_id=message.channel.id
-                    )
-                )
+            await message.channel.send(
+                await self._get_response(keyword=keyword, channel_id=message.channel.id)
+            )
 
     @app_commands.command(name="add_keyword", description="加入關鍵字")
     @app_commands.describe(
@@ -369,7 +360,7 @@ class KeywordCog(Cog):
         )
 
 
-async def setup(client: DragonBot):
+async def setup(client: "DragonBot"):
     await client.add_cog(
         KeywordCog(
             bot=client,
@@ -2,15 +2,20 @@ from discord.ext.commands import Bot, Cog, CommandError, Context
 from discord.ext import commands
 from discord import app_commands, Interaction
 from discord.abc import GuildChannel, Messageable
-from typing import Literal, Union, Optional
-import requests
-import bs4
+from typing import TYPE_CHECKING, Literal, Union, Optional
 from config.constants import CURRENCY_INFO_URL
 from core.keyword_manager import KeywordManager
 from core.ticket_manager import TicketManager
-from main import DragonBot
 from utils.checks import IsNotDev, is_me_app_command, is_me_command
 from utils.discord_utils import try_get_channel_by_bot
+from utils.lazy_import import lazy_import
+
+if TYPE_CHECKING:
+    from main import DragonBot
+
+# Only the convert command needs these, don't pay for them at startup.
+requests = lazy_import("requests")
+bs4 = lazy_import("bs4")
 
 
 class misc(Cog):
@@ -157,8 +162,13 @@ class misc(Cog):
         elif where == "here":
             if not ctx.guild:
                 return await ctx.send("This command can only be used in guilds.")
+            self.bot.tree.clear_commands(guild=ctx.guild)
             self.bot.tree.copy_global_to(guild=ctx.guild)
             await self.bot.tree.sync(guild=ctx.guild)
+        elif where == "changed":
+            # e.g. after reloading a cog, only syncs the main guild if its commands changed.
+            synced = await getattr(self.bot, "command_syncer").sync()
+            return await msg.edit(content="Synced" if synced else "Unchanged, skipped")
         return await msg.edit(content="Done")
 
     @sync_app_cmds.error
@@ -174,7 +184,7 @@ class misc(Cog):
             await interaction.response.send_message(error.message)
 
 
-async def setup(client: DragonBot):
+async def setup(client: "DragonBot"):
     await client.add_cog(
         misc(
             bot=client,
@@ -41,19 +41,18 @@ class RoleRequest(Cog):
         )
 
     async def _get_request_sys_status(self, guild_id: int) -> RoleRequestStatus:
-        request_channel_id = await self.role_request_manager.get_typed_channel_id(
-            guild_id, RoleRequestChannelType.REQUEST
-        )
-        approval_channel_id = await self.role_request_manager.get_typed_channel_id(
-            guild_id, RoleRequestChannelType.APPROVAL
-        )
+        # One config lookup (which fetches the config and the roles together on a cache miss)
+        # instead of a lookup per channel type.
+        config = await self.role_request_manager.get_config(guild_id=guild_id)
+        request_channel_id = config.request_channel_id
+        approval_channel_id = config.approval_channel_id
         if not request_channel_id and not approval_channel_id:
             return RoleRequestStatus.NOT_SET
         if not request_channel_id and approval_channel_id:
             return RoleRequestStatus.ONLY_REQUEST
         if request_channel_id and not approval_channel_id:
             return RoleRequestStatus.ONLY_APPROVE
-        if not await self.role_request_manager.get_requestable_roles(guild_id=guild_id):
+        if not config.requestable_roles:
             return RoleRequestStatus.NO_ROLE
         return RoleRequestStatus.SET
 
@@ -1,5 +1,4 @@
 from discord import (
-    DMChannel,
     Guild,
     Interaction,
     Member,
@@ -7,8 +6,10 @@ from discord import (
     User,
     Message,
 )
+import asyncio
 import discord
 import io
+import time
 from discord.app_commands import CommandOnCooldown, MissingRole
 from discord.app_commands.errors import AppCommandError, MissingPermissions
 from discord.ext import commands
@@ -26,15 +27,23 @@ from config.constants import (
     admin_role_id,
     rare_dragon_role_id,
     app_id,
+    restore_worker_count,
 )
 from config.models import (
     CloseMessageType,
+    FeedbackPrompt,
     FeedbackPromptMessageType,
     PanelMessageData,
+    Ticket,
     TicketStatus,
 )
 from config.canned_response import CANNED_RESPONSES
-from core.exceptions import ChannelNotTicket, NoParticipants
+from core.exceptions import (
+    ArchiveQueueFull,
+    ChannelNotTicket,
+    NoParticipants,
+    TranscriptExportFailed,
+)
 from core.feedback_manager import FeedbackManager
 from core.ticket_manager import TicketManager
 from core.ticket_panel_manager import TicketPanelManager
@@ -49,13 +58,12 @@ from view.ticket_views import (
 )
 from typing import List, Union, Optional, Dict
 from utils.transformers import CannedResponseTransformer
+from utils.checks import IsNotDev, is_me_command
 from utils.discord_utils import (
-    try_get_channel_by_bot,
     try_get_message,
     try_get_channel,
     try_get_guild,
     try_get_role,
-    try_get_user,
 )
 
 
@@ -113,83 +121,125 @@ class TicketsCog(Cog):
                     f"發生未知的錯誤: {error}", ephemeral=True
                 )
 
+    def register_persistent_views(self):
+        """
+        Registers the ticket views once, so the buttons on every panel and close message keep
+        working after a restart. All of them find their ticket through interaction.channel,
+        so a single instance with stable custom ids serves every message.
+        """
+        for view in (
+            TicketCreationView(ticket_manager=self.ticket_manager),
+            TicketCloseToggleView(ticket_manager=self.ticket_manager),
+            TicketCloseView(ticket_manager=self.ticket_manager),
+            TicketAfterClose(ticket_manager=self.ticket_manager),
+        ):
+            self.bot.add_view(view)
+
+    def _feedback_prompt_view(
+        self, prompt: FeedbackPrompt
+    ) -> Union[FeedBackSystem, WordSelection]:
+        view_type = (
+            FeedBackSystem
+            if prompt.message_type == FeedbackPromptMessageType.RATING
+            else WordSelection
+        )
+        return view_type(
+            user_id=prompt.user_id,
+            ticket_id=prompt.ticket_id,
+            guild_id=prompt.guild_id,
+            feedback_manager=self.feedback_manager,
+            timeout=None,
+        )
+
     async def restore_feedback_prompt_view(self):
+        """
+        Re-binds the pending feedback prompts to their DM messages.
+        This only registers the views locally, no API call is made per prompt.
+        """
         self.logger.info("Restoring feedback prompts.")
-        prompts = await self.feedback_manager.get_all_feedback_prompts()
-        if not prompts:
-            self.logger.info("Nothing to restore...Skipping")
-            return
-        for prompt in prompts:
-            user = await try_get_user(bot=self.bot, user_id=prompt.user_id)
-            if not user:
-                self.logger.debug(f"User with id {prompt.user_id} not found, skipping.")
-                await self.feedback_manager.remove_user_feedback_prompt(
-                    user_id=prompt.user_id,
-                    ticket_id=prompt.ticket_id,
-                    guild_id=prompt.guild_id,
-                )
-                continue
-            dm_channel = await try_get_channel_by_bot(
-                bot=self.bot, channel_id=prompt.channel_id
+        restored = 0
+        async for prompt in self.feedback_manager.iter_feedback_prompts():
+            self.bot.add_view(
+                self._feedback_prompt_view(prompt), message_id=prompt.message_id
             )
+            restored += 1
+        self.logger.info(f"Done restoring {restored} feedback prompts")
 
-            if not dm_channel:
-                self.logger.debug(
-                    "User has no dm channel associated with the bot, maybe it has been deleted by user, skipping."
-                )
-                await self.feedback_manager.remove_user_feedback_prompt(
-                    user_id=prompt.user_id,
-                    ticket_id=prompt.ticket_id,
-                    guild_id=prompt.guild_id,
-                )
-                continue
-            assert isinstance(dm_channel, DMChannel)
-            message = await try_get_message(
-                channel=dm_channel, message_id=prompt.message_id
-            )
-            if not message:
-                await self.feedback_manager.remove_user_feedback_prompt(
-                    user_id=prompt.user_id,
-                    ticket_id=prompt.ticket_id,
-                    guild_id=prompt.guild_id,
-                )
-                self.logger.debug(
-                    f"Message with ID {prompt.message_id} was not found in the dm channel, this is unexpected, skipping for now."
-                )
-                continue
-            try:
-                if prompt.message_type == FeedbackPromptMessageType.RATING:
-                    self.logger.debug(
-                        f"Restoring rating buttons for {user.name} with ticket id {prompt.ticket_id}."
-                    )
-                    view = FeedBackSystem(
-                        user_id=prompt.user_id,
-                        ticket_id=prompt.ticket_id,
-                        guild_id=prompt.guild_id,
-                        feedback_manager=self.feedback_manager,
-                    )
-                    view.message = await message.edit(view=view)
-                elif prompt.message_type == FeedbackPromptMessageType.SELECT:
-                    self.logger.debug(
-                        f"Restoring drop down menu for {user.name} with ticket id {prompt.ticket_id}."
-                    )
+    async def _migrate_feedback_prompt(self, prompt: FeedbackPrompt) -> Optional[str]:
+        """
+        Returns "removed" if the prompt's message is gone, "updated" if the message had the
+        old custom ids, None if there was nothing to do.
+        """
+        channel = self.bot.get_partial_messageable(prompt.channel_id)
+        try:
+            message = await channel.fetch_message(prompt.message_id)
+        except discord.errors.NotFound:
+            self.logger.debug(
+                f"Feedback prompt message {prompt.message_id} or its channel was deleted, removing the prompt."
+            )
+            await self.feedback_manager.remove_user_feedback_prompt(
+                user_id=prompt.user_id,
+                ticket_id=prompt.ticket_id,
+                guild_id=prompt.guild_id,
+            )
+            return "removed"
+        view = self._feedback_prompt_view(prompt)
+        custom_ids = {
+            getattr(child, "custom_id", None)
+            for row in message.components
+            for child in getattr(row, "children", [])
+        }
+        if not custom_ids or custom_ids == {
+            getattr(item, "custom_id", None) for item in view.children
+        }:
+            return None
+        self.logger.debug(
+            f"Updating the buttons of feedback prompt message {prompt.message_id}."
+        )
+        view.message = await message.edit(view=view)
+        return "updated"
+
+    async def migrate_feedback_prompts(self) -> Dict[str, int]:
+        """
+        Attaches the current view to the feedback prompts sent with the old custom ids
+        (rating_{i}, review, feedback_comment), which no longer route to a view, and removes
+        the prompts whose message or channel was deleted.
+        Every prompt costs a request, so this only runs through the migrate_feedback_prompts
+        command. The prompts are streamed to restore_worker_count workers.
+        """
+        start_time = time.perf_counter()
+        counts = {"checked": 0, "updated": 0, "removed": 0}
+        queue: asyncio.Queue[Optional[FeedbackPrompt]] = asyncio.Queue(
+            maxsize=restore_worker_count
+        )
 
-                    view = WordSelection(
-                        user_id=prompt.user_id,
-                        ticket_id=prompt.ticket_id,
-                        guild_id=prompt.guild_id,
-                        feedback_manager=self.feedback_manager,
+        async def worker():
+            while (prompt := await queue.get()) is not None:
+                counts["checked"] += 1
+                try:
+                    if result := await self._migrate_feedback_prompt(prompt):
+                        counts[result] += 1
+                except Exception as e:
+                    self.logger.error(
+                        f"Failed to migrate feedback prompt message {prompt.message_id}: {e}"
                     )
-                    view.message = await message.edit(view=view)
-            except discord.errors.NotFound:
-                self.logger.error("Feedback prompt was not found.")
-                pass
-        self.logger.info("Done restoring feedback prompt")
-
-    @Cog.listener(name="on_ready")
-    async def on_ready(self):
-        await self.restore_ticket_panel()
-        await self.restore_close_buttons()
+
+        workers = [asyncio.create_task(worker()) for _ in range(restore_worker_count)]
+        try:
+            async for prompt in self.feedback_manager.iter_feedback_prompts():
+                await queue.put(prompt)
+        finally:
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        self.logger.info(
+            f"Checked {counts['checked']} feedback prompts in {time.perf_counter() - start_time:.1f}s, "
+            f"updated {counts['updated']}, removed {counts['removed']}."
+        )
+        return counts
+
+    async def cog_load(self):
+        self.register_persistent_views()
         await self.restore_feedback_prompt_view()
 
     async def _try_get_guild(
@@ -217,33 +267,16 @@ class TicketsCog(Cog):
         )
 
     async def restore_ticket_panel(self):
-        all_panel_messages = (
-            await self.ticket_panel_manager.load_ticket_panel_messages()
-        )
-        for message in all_panel_messages:
-            view = TicketCreationView(ticket_manager=self.ticket_manager)
-            try:
-                await message.edit(view=view)
-            except discord.errors.NotFound:
-                self.logger.debug("Ticket panel message might have been deleted.")
-                assert message.channel.guild
-                await self.ticket_panel_manager.delete_panel_by_guild_id(
-                    guild_id=message.channel.guild.id,
-                )
-            except Exception as e:
-                self.logger.error(e)
-
+        # The panel buttons are handled by the persistent TicketCreationView and the panel
+        # cache is filled from the database on startup, this only drops the deleted panels.
+        await self.ticket_panel_manager.load_ticket_panel_messages()
         self.logger.debug("Done restoring ticket panels")
 
-    async def restore_close_buttons(self):
-        self.logger.info("Restoring all close buttons...")
-        all_tickets = await self.ticket_manager.database_manager.select(
-            table_name="tickets"
-        )
-        if not all_tickets:
-            self.logger.debug("No tickets found in database, skipping...")
-            return
-        assert isinstance(all_tickets, list)
+    async def _restore_close_button(self, ticket: Ticket) -> bool:
+        """
+        Re-attaches the close buttons of a single ticket and syncs its channel name.
+        Returns True if the ticket channel no longer exists and the ticket should be deleted.
+        """
         close_view: List[
             Union[
                 type[TicketCloseToggleView],
@@ -251,58 +284,142 @@ class TicketsCog(Cog):
                 type[TicketAfterClose],
             ]
         ] = [TicketCloseToggleView, TicketCloseView, TicketAfterClose]
-        deleted_tickets_id = []
+        close_msg_id = ticket.close_msg_id
+        guild = await self._try_get_guild(guild_id=ticket.guild_id)
+        if not guild:
+            self.logger.debug(
+                f"Could not find the guild with guild id {ticket.guild_id}, skipping..."
+            )
+            return False
+        channel = await try_get_channel(guild=guild, channel_id=ticket.channel_id)
+        if not channel or not isinstance(channel, TextChannel):
+            self.logger.debug(
+                f"Could not find the channel with id {ticket.channel_id}, deleting ticket {ticket.db_id} from database."
+            )
+            return True
+        try:
+            message = await channel.fetch_message(close_msg_id)
+            self.logger.debug(f"Restoring close buttons in ticket with id {ticket.db_id}")
+            view = close_view[CloseMessageType(ticket.close_msg_type)](
+                ticket_manager=self.ticket_manager,
+            )
+            await message.edit(view=view)
+            self.logger.debug(f"Setting channel name for ticket with id {ticket.db_id}")
+            await self.ticket_manager.set_ticket_channel_name(ticket=ticket)
+        except discord.errors.NotFound:
+            self.logger.debug(
+                f"Could not find the closing message with id {close_msg_id}. Resending the close button message."
+            )
+            # TODO: Send new close button message
+        except Exception as e:
+            self.logger.error(e)
+        return False
+
+    async def restore_close_buttons(self):
+        """
+        Re-attaches the close buttons of every cached ticket and syncs the channel names.
+        The close views are persistent, so this is only needed for close messages sent before
+        the buttons had stable custom ids. Run it through the restore_tickets command.
+
+        Tickets are restored with a fixed number of workers, which bounds the number of
+        requests in flight. discord.py waits out the rate limits (429 retry_after) itself.
+        The channel rename, which has the tightest limit, is skipped when the channel
+        name is already correct.
+        """
+        self.logger.info("Restoring all close buttons...")
+        all_tickets = self.ticket_manager.ticket_caches.values()
+        if not all_tickets:
+            self.logger.debug("No tickets found in database, skipping...")
+            return
+        start_time = time.perf_counter()
+        queue: asyncio.Queue[Ticket] = asyncio.Queue()
         for ticket in all_tickets:
-            ticket = await self.ticket_manager.get_ticket(ticket_id=ticket["id"])
-            assert ticket
-            close_msg_id = ticket.close_msg_id
-            close_msg_type = ticket.close_msg_type
-            guild_id = ticket.guild_id
-            guild = await self._try_get_guild(guild_id=guild_id)
-            if not guild:
-                self.logger.debug(
-                    f"Could not find the guild with guild id {guild_id}, skipping..."
-                )
-                continue
-            channel_id = ticket.channel_id
-            channel = await try_get_channel(guild=guild, channel_id=channel_id)
-            if not channel or not isinstance(channel, TextChannel):
-                self.logger.debug(
-                    f"Could not find the channel with id {channel_id}, deleting ticket {ticket.db_id} from database."
-                )
-                await self.ticket_manager.database_manager.delete(
-                    table_name="tickets", criteria={"id": ticket.db_id}
-                )
-                deleted_tickets_id.append(ticket.db_id)
-                continue
-            try:
-                message = await channel.fetch_message(close_msg_id)
-                self.logger.debug(
-                    f"Restoring close buttons in ticket with id {ticket.db_id}"
-                )
-                view = close_view[CloseMessageType(close_msg_type)](
-                    ticket_manager=self.ticket_manager,
-                )
-                await message.edit(view=view)
-                self.logger.debug(
-                    f"Setting channel name for ticket with id {ticket.db_id}"
-                )
-                await self.ticket_manager.set_ticket_status(
-                    ticket=ticket,
-                    new_status=ticket.status,
-                )
-            except discord.errors.NotFound:
-                self.logger.debug(
-                    f"Could not find the closing message with id {close_msg_id}. Resending the close button message."
-                )
-                # TODO: Send new close button message
-            except Exception as e:
-                self.logger.error(e)
+            queue.put_nowait(ticket)
+        total = len(all_tickets)
+        deleted_tickets_id = []
+        restored = 0
+
+        async def worker():
+            nonlocal restored
+            while not queue.empty():
+                ticket = queue.get_nowait()
+                # One failing ticket (e.g. a channel deleted meanwhile) must not stop the others.
+                try:
+                    if await self._restore_close_button(ticket=ticket):
+                        deleted_tickets_id.append(ticket.db_id)
+                except Exception as e:
+                    self.logger.error(
+                        f"Failed to restore the close buttons of ticket {ticket.db_id}: {e}"
+                    )
+                restored += 1
+                if restored % 25 == 0:
+                    self.logger.info(
+                        f"Restored {restored}/{total} tickets ({time.perf_counter() - start_time:.1f}s)."
+                    )
+
+        await asyncio.gather(
+            *(worker() for _ in range(min(restore_worker_count, total)))
+        )
         if deleted_tickets_id:
             await self.ticket_manager.database_manager.delete(
                 table_name="tickets", criteria={"id": deleted_tickets_id}
             )
-        self.logger.info("Done restoring tickets.")
+            self.ticket_manager.ticket_caches.remove_many(deleted_tickets_id)
+        self.logger.info(
+            f"Done restoring {total} tickets in {time.perf_counter() - start_time:.1f}s, deleted {len(deleted_tickets_id)}."
+        )
+
+    @commands.command(name="restore_tickets", hidden=True)
+    @is_me_command()
+    async def restore_tickets(self, ctx: commands.Context):
+        msg = await ctx.reply(mention_author=False, content="Restoring...")
+        await self.restore_ticket_panel()
+        await self.restore_close_buttons()
+        await msg.edit(content="Done")
+
+    @restore_tickets.error
+    async def restore_tickets_error(
+        self, ctx: commands.Context, error: commands.CommandError
+    ):
+        if isinstance(error, IsNotDev):
+            await ctx.send(error.message)
+
+    @commands.command(name="migrate_feedback_prompts", hidden=True)
+    @is_me_command()
+    async def migrate_feedback_prompts_command(self, ctx: commands.Context):
+        msg = await ctx.reply(mention_author=False, content="Migrating...")
+        counts = await self.migrate_feedback_prompts()
+        await msg.edit(
+            content=f"Done, checked {counts['checked']}, updated {counts['updated']}, removed {counts['removed']}"
+        )
+
+    @migrate_feedback_prompts_command.error
+    async def migrate_feedback_prompts_error(
+        self, ctx: commands.Context, error: commands.CommandError
+    ):
+        if isinstance(error, IsNotDev):
+            await ctx.send(error.message)
+
+    @commands.command(name="archive_stats", hidden=True)
+    @is_me_command()
+    async def archive_stats(self, ctx: commands.Context):
+        stats = self.ticket_manager.archive_queue_stats()
+        await ctx.reply(
+            mention_author=False,
+            content=(
+                f"Pending: {stats.pending}, running: {stats.running}\n"
+                f"Completed: {stats.completed}, failed: {stats.failed}\n"
+                f"Wait: avg {stats.average_wait:.2f}s, max {stats.max_wait:.2f}s\n"
+                f"Export: avg {stats.average_run:.2f}s"
+            ),
+        )
+
+    @archive_stats.error
+    async def archive_stats_error(
+        self, ctx: commands.Context, error: commands.CommandError
+    ):
+        if isinstance(error, IsNotDev):
+            await ctx.send(error.message)
 
     @Cog.listener(name="on_message")
     async def on_message(self, message: Message):
@@ -347,6 +464,7 @@ class TicketsCog(Cog):
     async def on_guild_channel_delete(self, channel):
         if not isinstance(channel, TextChannel):
             return
+        self.ticket_manager.forget_channel(channel_id=channel.id)
         if panel := await self.ticket_panel_manager.get_panel(
             guild_id=channel.guild.id, channel_id=channel.id, message_id=None
         ):
@@ -534,6 +652,15 @@ class TicketsCog(Cog):
             )
         except ChannelNotFound as e:
             return await interaction.response.send_message(content=e)
+        except ArchiveQueueFull:
+            return await interaction.followup.send(
+                "錯誤：歸檔佇列已滿，請稍後再試。", ephemeral=True
+            )
+        except TranscriptExportFailed as e:
+            self.logger.error(f"Error exporting channel {interaction.channel.id}: {e}")
+            return await interaction.followup.send(
+                "錯誤：生成頻道紀錄時發生問題，請檢查後台日誌。", ephemeral=True
+            )
 
     @ticket_operations.command(
         name="remove_participant",
@@ -25,10 +25,23 @@ __all__ = [
     "ticket_system_main_message",
     "app_mode",
     "db_url",
+    "db_replica_urls",
     "admin_role_id",
     "epic_dragon_role_id",
     "rare_dragon_role_id",
     "exporter_bot_token",
+    "restore_worker_count",
+    "transcript_exporter_backend",
+    "archive_worker_count",
+    "archive_queue_max_pending",
+    "close_dm_concurrency",
+    "db_pool_min_size",
+    "db_pool_max_size",
+    "db_statement_cache_size",
+    "db_command_timeout",
+    "db_copy_threshold",
+    "command_sync_state_file",
+    "feedback_leaderboard_refresh_interval",
 ]
 
 
@@ -44,7 +57,17 @@ def get_required_env(key: str) -> str:
 
 app_mode = os.getenv("APP_MODE")
 
-exporter_bot_token = get_required_env("EXPORTER_BOT_TOKEN")
+exporter_bot_token = os.getenv("EXPORTER_BOT_TOKEN")
+# Only needed by the DiscordChatExporter.Cli transcript backend.
+transcript_exporter_backend = os.getenv("TRANSCRIPT_EXPORTER", "native").lower()
+# "native" exports transcripts with the bot's own client and falls back to the CLI on failure,
+# "cli" always uses the vendored DiscordChatExporter.Cli.
+assert transcript_exporter_backend in [
+    "native",
+    "cli",
+], "TRANSCRIPT_EXPORTER must be either 'native' or 'cli'"
+if transcript_exporter_backend == "cli":
+    exporter_bot_token = get_required_env("EXPORTER_BOT_TOKEN")
 
 assert app_mode in ["test", "prod"], "APP_MODE must be either 'test' or 'prod'"
 
@@ -54,6 +77,16 @@ db_url = (
     if app_mode == "prod"
     else os.getenv("DATABASE_TEST_URL")
 )
+db_replica_urls = [
+    url.strip()
+    for url in (
+        os.getenv("DATABASE_PROD_REPLICA_URLS", "")
+        if app_mode == "prod"
+        else os.getenv("DATABASE_TEST_REPLICA_URLS", "")
+    ).split(",")
+    if url.strip()
+]
+# Optional comma separated read replicas, reads and aggregates are routed to them.
 pre = os.getenv("PREFIX_PROD") if app_mode == "prod" else os.getenv("PREFIX_TEST")
 bot_token = (
     get_required_env("BOT_TOKEN_PROD")
@@ -61,6 +94,22 @@ bot_token = (
     else get_required_env("BOT_TOKEN_TEST")
 )
 
+restore_worker_count = int(os.getenv("RESTORE_WORKER_COUNT", "5"))
+# The number of tickets whose close buttons are restored concurrently by the restore_tickets command.
+archive_worker_count = int(os.getenv("ARCHIVE_WORKER_COUNT", "2"))
+archive_queue_max_pending = int(os.getenv("ARCHIVE_QUEUE_MAX_PENDING", "100"))
+close_dm_concurrency = int(os.getenv("CLOSE_DM_CONCURRENCY", "5"))
+db_pool_min_size = int(os.getenv("DB_POOL_MIN_SIZE", "2"))
+db_pool_max_size = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+db_statement_cache_size = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+db_command_timeout = float(os.getenv("DB_COMMAND_TIMEOUT", "30"))
+db_copy_threshold = int(os.getenv("DB_COPY_THRESHOLD", "1000"))
+command_sync_state_file = os.getenv("COMMAND_SYNC_STATE_FILE", ".command_tree_sync.json")
+# Where the fingerprint of the last synced command tree is kept.
+feedback_leaderboard_refresh_interval = float(
+    os.getenv("FEEDBACK_LEADERBOARD_REFRESH_INTERVAL", "3600")
+)
+# Seconds between refreshes of the feedback_leaderboard materialized view, 0 disables them.
 
 eng_to_chinese = {
     "Monday": "一",
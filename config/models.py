@@ -256,6 +256,54 @@ class FeedbackLeaderboardEntry:
     average_rating: float
 
 
+@dataclass
+class ArchiveQueueStats:
+    pending: int
+    running: int
+    completed: int
+    failed: int
+    average_wait: float
+    max_wait: float
+    average_run: float
+
+
+@dataclass
+class StartupPhase:
+    name: str
+    started_at: float
+    # Seconds since the start of the startup
+    duration: float
+    group: Optional[str] = None
+    # The phases of a group ran concurrently
+    ok: bool = True
+
+
+@dataclass
+class StartupReport:
+    phases: List[StartupPhase]
+    total: float
+
+    def slowest(self, count: int = 3) -> List[StartupPhase]:
+        return sorted(self.phases, key=lambda phase: phase.duration, reverse=True)[
+            :count
+        ]
+
+    def to_dict(self) -> Dict:
+        return {
+            "total": round(self.total, 3),
+            "phases": [
+                {
+                    "name": phase.name,
+                    "group": phase.group,
+                    "started_at": round(phase.started_at, 3),
+                    "duration": round(phase.duration, 3),
+                    "ok": phase.ok,
+                }
+                for phase in self.phases
+            ],
+        }
+
+
 class FeedbackPromptMessageType(Enum):
     RATING = (0, "評價")
     SELECT = (1, "評語")
@@ -0,0 +1,162 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Deque, Dict, List, Optional
+from discord import TextChannel
+from config.models import ArchiveQueueStats
+from core.exceptions import ArchiveQueueFull
+
+
+@dataclass
+class ArchiveJob:
+    """
+    A pending or running transcript export. Await `future` to get (transcript bytes, filename).
+    """
+
+    channel: TextChannel
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.perf_counter)
+    started_at: Optional[float] = None
+
+    @property
+    def channel_id(self) -> int:
+        return self.channel.id
+
+    @property
+    def guild_id(self) -> int:
+        return self.channel.guild.id
+
+
+class ArchiveJobQueue:
+    """
+    A bounded queue of transcript exports served by a fixed number of workers.
+
+    - Jobs are queued per guild and the workers take them round-robin across guilds,
+      so one busy guild cannot starve the others.
+    - Submitting a channel that is already queued or being exported returns the
+      existing job, so concurrent archive requests share one export.
+    - The exports run on their own workers instead of the loop's default executor.
+    """
+
+    def __init__(
+        self,
+        export: Callable[[TextChannel], Awaitable[tuple[bytes, str]]],
+        logger: logging.Logger,
+        worker_count: int = 2,
+        max_pending: int = 100,
+    ):
+        self._export = export
+        self.logger = logger
+        self.worker_count = worker_count
+        self.max_pending = max_pending
+        self._pending: OrderedDict[int, Deque[ArchiveJob]] = OrderedDict()
+        # key: guild_id, value: the guild's queued jobs. The order of the keys is the round-robin order.
+        self._jobs: Dict[int, ArchiveJob] = dict()
+        # key: channel_id, value: the queued or running job of the channel
+        self._available = asyncio.Semaphore(0)
+        self._workers: List[asyncio.Task] = []
+        self._pending_count = 0
+        self._running_count = 0
+        self._completed = 0
+        self._failed = 0
+        self._total_wait = 0.0
+        self._total_run = 0.0
+        self._max_wait = 0.0
+
+    @property
+    def depth(self) -> int:
+        return self._pending_count
+
+    def _ensure_workers(self):
+        if self._workers:
+            return
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"archive-worker-{i}")
+            for i in range(self.worker_count)
+        ]
+
+    def submit(self, channel: TextChannel) -> ArchiveJob:
+        """
+        Queues an export of the channel and returns its job handle.
+        Raises ArchiveQueueFull if too many exports are already waiting.
+        """
+        if job := self._jobs.get(channel.id):
+            return job
+        if self._pending_count >= self.max_pending:
+            raise ArchiveQueueFull()
+        self._ensure_workers()
+        job = ArchiveJob(
+            channel=channel, future=asyncio.get_running_loop().create_future()
+        )
+        self._jobs[channel.id] = job
+        self._pending.setdefault(job.guild_id, deque()).append(job)
+        self._pending_count += 1
+        self._available.release()
+        return job
+
+    def _next_job(self) -> ArchiveJob:
+        guild_id, jobs = next(iter(self._pending.items()))
+        job = jobs.popleft()
+        if jobs:
+            # Move the guild to the back of the round-robin.
+            self._pending.move_to_end(guild_id)
+        else:
+            del self._pending[guild_id]
+        self._pending_count -= 1
+        return job
+
+    async def _worker(self):
+        while True:
+            await self._available.acquire()
+            job = self._next_job()
+            job.started_at = time.perf_counter()
+            wait_time = job.started_at - job.enqueued_at
+            self._total_wait += wait_time
+            self._max_wait = max(self._max_wait, wait_time)
+            self._running_count += 1
+            try:
+                result = await self._export(job.channel)
+            except asyncio.CancelledError:
+                job.future.cancel()
+                raise
+            except Exception as e:
+                self._failed += 1
+                if not job.future.done():
+                    job.future.set_exception(e)
+            else:
+                self._completed += 1
+                if not job.future.done():
+                    job.future.set_result(result)
+            finally:
+                run_time = time.perf_counter() - job.started_at
+                self._total_run += run_time
+                self._running_count -= 1
+                self._jobs.pop(job.channel_id, None)
+                self.logger.debug(
+                    f"Archived channel {job.channel_id} (waited {wait_time:.2f}s, ran {run_time:.2f}s, {self.depth} jobs left)."
+                )
+
+    def stats(self) -> ArchiveQueueStats:
+        finished = self._completed + self._failed
+        return ArchiveQueueStats(
+            pending=self._pending_count,
+            running=self._running_count,
+            completed=self._completed,
+            failed=self._failed,
+            average_wait=self._total_wait / finished if finished else 0.0,
+            max_wait=self._max_wait,
+            average_run=self._total_run / finished if finished else 0.0,
+        )
+
+    async def close(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        for job in self._jobs.values():
+            job.future.cancel()
+        self._jobs.clear()
+        self._pending.clear()
+        self._pending_count = 0
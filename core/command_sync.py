@@ -0,0 +1,93 @@
+import hashlib
+import json
+import logging
+import os
+from typing import Dict, Optional
+import discord
+from discord import app_commands
+
+
+class CommandTreeSyncer:
+    """
+    Syncs the guild's application commands only when they changed.
+
+    The command definitions that a sync would upload are serialized and hashed.
+    The hash of the last successful sync is kept in `state_file`, keyed by application
+    and guild, so restarts and reconnects with an unchanged tree skip the rate-limited
+    bulk overwrite entirely.
+    """
+
+    def __init__(
+        self,
+        tree: app_commands.CommandTree,
+        guild: discord.abc.Snowflake,
+        state_file: str,
+        logger: logging.Logger,
+    ):
+        self.tree = tree
+        self.guild = guild
+        self.state_file = state_file
+        self.logger = logger
+
+    def _prepare(self):
+        # copy_global_to copies the commands as they are now, so a reloaded cog would leave
+        # stale copies behind. The guild only holds copies of the global commands, rebuild them.
+        self.tree.clear_commands(guild=self.guild)
+        self.tree.copy_global_to(guild=self.guild)
+
+    def fingerprint(self) -> str:
+        self._prepare()
+        payload = sorted(
+            (command.to_dict(self.tree) for command in self.tree.get_commands(guild=self.guild)),
+            key=lambda command: (command.get("type", 1), command["name"]),
+        )
+        serialized = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(serialized.encode()).hexdigest()
+
+    @property
+    def _state_key(self) -> str:
+        return f"{self.tree.client.application_id}:{self.guild.id}"
+
+    def _load_state(self) -> Dict[str, str]:
+        try:
+            with open(self.state_file, "r") as file:
+                return json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return dict()
+
+    def _save_state(self, state: Dict[str, str]):
+        # Write to a temporary file first, so a crash mid-write can't leave a truncated state.
+        temp_file = f"{self.state_file}.tmp"
+        with open(temp_file, "w") as file:
+            json.dump(state, file, indent=2)
+        os.replace(temp_file, self.state_file)
+
+    def synced_fingerprint(self) -> Optional[str]:
+        return self._load_state().get(self._state_key)
+
+    async def sync(self, force: bool = False) -> bool:
+        """
+        Syncs the commands if they changed since the last sync (or if force is set).
+        Returns whether a sync was sent.
+        """
+        fingerprint = self.fingerprint()
+        if not force and fingerprint == self.synced_fingerprint():
+            self.logger.info(
+                f"Application commands unchanged ({fingerprint[:12]}), skipping the sync."
+            )
+            return False
+        try:
+            synced = await self.tree.sync(guild=self.guild)
+        except discord.HTTPException as e:
+            self.logger.error(f"Failed to sync the application commands: {e}")
+            return False
+        state = self._load_state()
+        state[self._state_key] = fingerprint
+        try:
+            self._save_state(state)
+        except OSError as e:
+            self.logger.warning(f"Could not save the command tree fingerprint: {e}")
+        self.logger.info(
+            f"Synced {len(synced)} application commands ({fingerprint[:12]})."
+        )
+        return True
@@ -52,3 +52,19 @@ class DBNotInit(Exception):
     def __init__(self, message="AsyncDatabaseManager not initialized!"):
         self.message = message
         super().__init__(self.message)
+
+
+class TranscriptExportFailed(Exception):
+    """
+    Raised when a ticket channel could not be exported to a transcript.
+    """
+
+    def __init__(self, message="Failed to export the channel transcript."):
+        self.message = message
+        super().__init__(self.message)
+
+
+class ArchiveQueueFull(Exception):
+    def __init__(self, message="Too many archive jobs are waiting, try again later."):
+        self.message = message
+        super().__init__(self.message)
@@ -1,9 +1,14 @@
-from typing import Dict, List
+import asyncio
+import logging
+from typing import AsyncIterator, List, Tuple
 import asyncpg
 from discord import Client, Embed, Guild
 from discord.ext.commands import Bot
 from core.exceptions import DBNotInit
+from core.feedback_stats import FeedbackStatsIndex
+from db.cache_invalidation import CacheInvalidationListener
 from db.database_manager import AsyncDatabaseManager
+from db.models import CacheChangeEvent
 from config.models import (
     FeedbackEntry,
     FeedbackLeaderboardEntry,
@@ -12,7 +17,11 @@ from config.models import (
     FeedbackStats,
 )
 from utils.embed_utils import add_std_footer, create_themed_embed
-from utils.discord_utils import try_get_member
+from utils.discord_utils import MemberNameCache
+
+
+# An arbitrary key for pg_try_advisory_lock, so only one process refreshes the leaderboard view at a time.
+LEADERBOARD_REFRESH_LOCK_KEY = 0x44524746
 
 
 class NotEnoughFeedbacks(Exception):
@@ -20,27 +29,124 @@ class NotEnoughFeedbacks(Exception):
 
 
 class FeedbackManager:
-    def __init__(self, bot: Bot | Client, database_manager: AsyncDatabaseManager):
+    def __init__(
+        self,
+        bot: Bot | Client,
+        database_manager: AsyncDatabaseManager,
+        logger: logging.Logger,
+    ):
         self.bot = bot
         self.database_manager = database_manager
+        self.logger = logger
         self.feedbacks_table_name = "feedbacks"
         self.feedback_prompts_table_name = "feedback_prompts"
-        self.average_rating_cache: Dict[int, float] = dict()
-        self.total_ratings_cache: Dict[int, int] = dict()
+        self.feedback_leaderboard_view_name = "feedback_leaderboard"
+        self.stats_index = FeedbackStatsIndex()
+        self._stats_loading = asyncio.Lock()
+        self.member_names = MemberNameCache()
+        self._leaderboard_refresher: asyncio.Task | None = None
+
+    async def init_cache(self):
+        """
+        Seeds the feedback statistics of every guild and customer with a single aggregate query.
+        This function should be called when the bot starts.
+        """
+        sql_query = f"""
+        SELECT guild_id, customer_id, rating, COUNT(*) AS ratings
+        FROM {self.feedbacks_table_name}
+        GROUP BY guild_id, customer_id, rating
+        """
+        if not self.database_manager._pool:
+            raise DBNotInit
+        async with self._stats_loading:
+            async with self.database_manager.acquire(
+                self.feedbacks_table_name, "seed_stats", readonly=True
+            ) as conn:
+                rows: List[asyncpg.Record] = await conn.fetch(sql_query)
+            self.stats_index.clear()
+            for row in rows:
+                self.stats_index.add(
+                    guild_id=row["guild_id"],
+                    customer_id=row["customer_id"],
+                    rating=row["rating"],
+                    times=row["ratings"],
+                )
+            self.stats_index.loaded = True
+
+    def start_leaderboard_refresh(self, interval: float):
+        """
+        Refreshes the feedback_leaderboard materialized view every `interval` seconds.
+        The bot serves the leaderboard from memory, the view is kept for queries made outside of it.
+        """
+        if interval <= 0 or self._leaderboard_refresher:
+            return
+        self._leaderboard_refresher = asyncio.create_task(
+            self._refresh_leaderboard_view_loop(interval),
+            name="feedback-leaderboard-refresh",
+        )
 
-    # async def init_caches(self):
-    #     distinct_guild_counts = 0
-    #     if not self.database_manager._pool:
-    #         raise DBNotInit
-    #     async with self.database_manager._pool.acquire() as conn:
-    #         sql_query = (
-    #             " SELECT COUNT(DISTINCT guild_id) AS unique_guild_count FROM feedback;"
-    #         )
-    #         stats_row: asyncpg.Record | None = await conn.fetchrow(sql_query)
-    #         if stats_row:
-    #             distinct_guild_counts = stats_row["unique_guild_count"]
-    #     if not distinct_guild_counts:
-    #         return
+    async def _refresh_leaderboard_view_loop(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.refresh_leaderboard_view()
+            except (OSError, asyncpg.PostgresError) as e:
+                self.logger.error(f"Failed to refresh the feedback leaderboard view: {e}")
+
+    async def refresh_leaderboard_view(self) -> bool:
+        """
+        Refreshes the view without blocking its readers. Returns False if another process
+        is refreshing it right now, every process runs the schedule but one refresh is enough.
+        """
+        async with self.database_manager.acquire(
+            self.feedback_leaderboard_view_name, "refresh"
+        ) as conn:
+            if not await conn.fetchval(
+                "SELECT pg_try_advisory_lock($1)", LEADERBOARD_REFRESH_LOCK_KEY
+            ):
+                return False
+            try:
+                await conn.execute(
+                    f"REFRESH MATERIALIZED VIEW CONCURRENTLY {self.feedback_leaderboard_view_name}"
+                )
+            finally:
+                await conn.execute(
+                    "SELECT pg_advisory_unlock($1)", LEADERBOARD_REFRESH_LOCK_KEY
+                )
+        return True
+
+    async def close(self):
+        if self._leaderboard_refresher:
+            self._leaderboard_refresher.cancel()
+            self._leaderboard_refresher = None
+
+    async def _ensure_stats_loaded(self):
+        if not self.stats_index.loaded:
+            await self.init_cache()
+
+    def register_cache_listener(self, listener: CacheInvalidationListener) -> None:
+        """
+        Applies the feedbacks written by other processes to the statistics.
+        """
+        listener.register(self.feedbacks_table_name, self._on_feedback_change)
+        listener.register_resync(self.resync_cache)
+
+    async def resync_cache(self):
+        # Notifications were missed, a lagging replica may not have those changes either.
+        with self.database_manager.read_from_primary():
+            await self.init_cache()
+
+    def _on_feedback_change(self, event: CacheChangeEvent) -> None:
+        if event.old_row:
+            old = event.old_row
+            self.stats_index.remove(old["guild_id"], old["customer_id"], old["rating"])
+        if event.operation == "DELETE":
+            row = event.row
+            self.stats_index.remove(row["guild_id"], row["customer_id"], row["rating"])
+            return
+        self.stats_index.add(
+            event.row["guild_id"], event.row["customer_id"], event.row["rating"]
+        )
 
     async def insert_feedback_prompt(
         self,
@@ -67,6 +173,28 @@ class FeedbackManager:
         except asyncpg.UniqueViolationError:
             pass
 
+    async def insert_feedback_prompts(self, prompts: List[FeedbackPrompt]):
+        """
+        Inserts every prompt in one batch. Prompts that already exist are skipped.
+        """
+        if not prompts:
+            return
+        await self.database_manager.insert_many(
+            table_name=self.feedback_prompts_table_name,
+            data=[
+                {
+                    "user_id": prompt.user_id,
+                    "ticket_id": prompt.ticket_id,
+                    "guild_id": prompt.guild_id,
+                    "message_id": prompt.message_id,
+                    "channel_id": prompt.channel_id,
+                    "message_type": prompt.message_type.db_id,
+                }
+                for prompt in prompts
+            ],
+            on_conflict_do_nothing=True,
+        )
+
     async def update_feedback_prompt_msg_type(
         self,
         user_id: int,
@@ -89,21 +217,25 @@ class FeedbackManager:
             criteria={"user_id": user_id, "ticket_id": ticket_id, "guild_id": guild_id},
         )
 
-    async def get_all_feedback_prompts(self) -> List[FeedbackPrompt]:
-        raw_data = await self.database_manager.select(
-            table_name=self.feedback_prompts_table_name
+    @staticmethod
+    def _feedback_prompt_from_record(data) -> FeedbackPrompt:
+        return FeedbackPrompt(
+            user_id=data["user_id"],
+            guild_id=data["guild_id"],
+            ticket_id=data["ticket_id"],
+            message_id=data["message_id"],
+            channel_id=data["channel_id"],
+            message_type=FeedbackPromptMessageType.from_id(data["message_type"]),
         )
-        return [
-            FeedbackPrompt(
-                user_id=data["user_id"],
-                guild_id=data["guild_id"],
-                ticket_id=data["ticket_id"],
-                message_id=data["message_id"],
-                channel_id=data["channel_id"],
-                message_type=FeedbackPromptMessageType.from_id(data["message_type"]),
-            )
-            for data in raw_data
-        ]
+
+    async def iter_feedback_prompts(self) -> AsyncIterator[FeedbackPrompt]:
+        """
+        Streams every feedback prompt from the database without loading the whole table.
+        """
+        async for data in self.database_manager.iterate(
+            table_name=self.feedback_prompts_table_name
+        ):
+            yield self._feedback_prompt_from_record(data)
 
     async def insert_feedback_entry(self, feedback_entry: FeedbackEntry):
         try:
@@ -117,19 +249,11 @@ class FeedbackManager:
                 },
                 returning_col="ticket_id",
             )
-            if self.total_ratings_cache.get(feedback_entry.guild_id):
-                self.total_ratings_cache[feedback_entry.guild_id] += 1
-            else:
-                self.total_ratings_cache[feedback_entry.guild_id] = 1
-            if self.average_rating_cache.get(feedback_entry.guild_id):
-                self.average_rating_cache[feedback_entry.guild_id] = (
-                    self.average_rating_cache[feedback_entry.guild_id]
-                    + feedback_entry.rating
-                ) / self.total_ratings_cache[feedback_entry.guild_id]
-            else:
-                self.average_rating_cache[feedback_entry.guild_id] = (
-                    feedback_entry.rating
-                )
+            self.stats_index.add(
+                guild_id=feedback_entry.guild_id,
+                customer_id=feedback_entry.customer_id,
+                rating=feedback_entry.rating,
+            )
         except asyncpg.UniqueViolationError:
             # The ticket was reopened, in this case we don't count.
             pass
@@ -148,21 +272,12 @@ class FeedbackManager:
         )
 
     async def get_avg_rating(self, guild_id: int) -> float | None:
-        sql_query = (
-            "SELECT AVG(rating) AS average_rating FROM feedbacks WHERE guild_id = $1"
-        )
-        if not self.database_manager._pool:
-            raise DBNotInit
-        async with self.database_manager._pool.acquire() as conn:
-            stats_row: asyncpg.Record | None = await conn.fetchrow(sql_query, guild_id)
-        if not stats_row:
-            return None
-        self.average_rating_cache[guild_id] = stats_row["average_rating"]
-        return float(stats_row["average_rating"])
+        await self._ensure_stats_loaded()
+        return self.stats_index.average(guild_id)
 
     async def get_feedback_rating(self, guild_id: int) -> FeedbackStats | None:
         """
-        Fetches and calculates feedback statistics for a specific guild.
+        Returns the feedback statistics of a guild, from memory.
 
         Args:
             guild_id: The ID of the guild to fetch statistics for.
@@ -170,53 +285,41 @@ class FeedbackManager:
         Returns:
             A FeedbackStats object or None if no feedback exists for that guild.
         """
-        sql_query = """
-        SELECT
-            AVG(rating) AS average_rating,
-            COUNT(*) AS total_ratings,
-            COUNT(*) FILTER (WHERE rating = 5) AS five_star_ratings,
-            COUNT(*) FILTER (WHERE rating = 4) AS four_star_ratings,
-            COUNT(*) FILTER (WHERE rating = 3) AS three_star_ratings,
-            COUNT(*) FILTER (WHERE rating = 2) AS two_star_ratings,
-            COUNT(*) FILTER (WHERE rating = 1) AS one_star_ratings
-        FROM
-        feedbacks
-        WHERE guild_id = $1;
+        await self._ensure_stats_loaded()
+        return self.stats_index.stats(guild_id)
+
+    async def get_feedback_overview(
+        self, guild_id: int, limit: int = 5
+    ) -> Tuple[FeedbackStats | None, List[FeedbackLeaderboardEntry] | None]:
         """
-        if not self.database_manager._pool:
-            raise DBNotInit
-        async with self.database_manager._pool.acquire() as conn:
-            stats_row: asyncpg.Record | None = await conn.fetchrow(sql_query, guild_id)
-        if not stats_row or stats_row["total_ratings"] == 0:
-            return None
-        self.average_rating_cache[guild_id] = float(stats_row["average_rating"])
-        self.total_ratings_cache[guild_id] = int(stats_row["total_ratings"])
-        return FeedbackStats(
-            average_rating=float(stats_row["average_rating"]),
-            total_ratings=stats_row["total_ratings"],
-            five_star_ratings=stats_row["five_star_ratings"],
-            four_star_ratings=stats_row["four_star_ratings"],
-            three_star_ratings=stats_row["three_star_ratings"],
-            two_star_ratings=stats_row["two_star_ratings"],
-            one_star_ratings=stats_row["one_star_ratings"],
-        )
+        Returns the rating statistics and the leaderboard of a guild.
+        """
+        stats = await self.get_feedback_rating(guild_id=guild_id)
+        leaderboard = await self.get_feedback_leaderboard(guild_id=guild_id, limit=limit)
+        return stats, leaderboard
 
     async def to_feedback_leaderboard_embed(
-        self, leaderboard: List[FeedbackLeaderboardEntry], guild: Guild
+        self,
+        leaderboard: List[FeedbackLeaderboardEntry],
+        guild: Guild,
+        stats: FeedbackStats | None = None,
     ) -> Embed | None:
         if not leaderboard:
             raise NotEnoughFeedbacks
+        description = f"{guild.name}的排行榜\n此功能為鼓勵填寫回饋單而製作"
+        if stats:
+            description += f"\n伺服器平均評價：{round(stats.average_rating, 1)}（共{stats.total_ratings}筆）"
         embed = create_themed_embed(
             title="回饋單填寫排行榜",
-            description=f"{guild.name}的排行榜\n此功能為鼓勵填寫回饋單而製作",
+            description=description,
             client=self.bot,
         )
         add_std_footer(embed=embed, client=self.bot)
+        names = await self.member_names.resolve(
+            guild=guild, member_ids=[entry.customer_id for entry in leaderboard]
+        )
         for entry in leaderboard:
-            display_name = entry.customer_id
-            member = await try_get_member(guild=guild, member_id=entry.customer_id)
-            if member:
-                display_name = member.display_name
+            display_name = names.get(entry.customer_id, entry.customer_id)
             field_value = f"回饋單填寫次數：{entry.feedback_count}\n平均評價：{round(entry.average_rating, 1)}"
             embed.add_field(
                 name=f"顧客：{display_name}", value=field_value, inline=False
@@ -226,38 +329,5 @@ class FeedbackManager:
     async def get_feedback_leaderboard(
         self, guild_id: int, limit: int = 5
     ) -> List[FeedbackLeaderboardEntry] | None:
-        sql_query = """
-            SELECT
-                customer_id,
-                COUNT(*) AS feedback_count,
-                AVG(rating) AS average_rating
-            FROM
-                feedbacks
-            WHERE
-                guild_id = $1
-            GROUP BY
-                customer_id
-            ORDER BY
-                average_rating DESC, feedback_count DESC
-            LIMIT $2;
-            """
-        if not self.database_manager._pool:
-            raise DBNotInit
-        async with self.database_manager._pool.acquire() as conn:
-            assert isinstance(conn, asyncpg.connection.Connection)
-            rows: List[asyncpg.Record] = await conn.fetch(
-                sql_query,
-                guild_id,
-                limit,
-            )
-        if not rows:
-            return None
-
-        return [
-            FeedbackLeaderboardEntry(
-                customer_id=row["customer_id"],
-                feedback_count=row["feedback_count"],
-                average_rating=row["average_rating"],
-            )
-            for row in rows
-        ]
+        await self._ensure_stats_loaded()
+        return self.stats_index.leaderboard(guild_id, limit) or None
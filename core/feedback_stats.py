@@ -0,0 +1,151 @@
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Tuple
+from config.models import FeedbackLeaderboardEntry, FeedbackStats
+
+MIN_RATING = 1
+MAX_RATING = 5
+
+# (-average, -count, customer_id), ascending order is the leaderboard order.
+RankKey = Tuple[float, int, int]
+
+
+class RatingTally:
+    """
+    The count, the sum and the per-star histogram of a set of ratings.
+    Adding or removing a rating is O(1) and the average is always exact (sum / count),
+    unlike a running average that is updated in place.
+    """
+
+    __slots__ = ("count", "total", "histogram")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0
+        # histogram[star] is the number of ratings with that many stars, index 0 is unused.
+        self.histogram = [0] * (MAX_RATING + 1)
+
+    def add(self, rating: int, times: int = 1) -> None:
+        self.count += times
+        self.total += rating * times
+        self.histogram[rating] += times
+
+    def remove(self, rating: int) -> None:
+        if self.histogram[rating] <= 0:
+            return
+        self.count -= 1
+        self.total -= rating
+        self.histogram[rating] -= 1
+
+    @property
+    def average(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+
+class FeedbackStatsIndex:
+    """
+    The in-memory feedback statistics used by the FeedbackManager.
+
+    Keeps a RatingTally per guild and per (guild, customer), so the guild statistics
+    and the leaderboard are answered without aggregating the feedbacks table.
+    Every rating inserted into (or removed from) the table must be recorded here.
+
+    The customers of each guild are also kept ranked in a sorted list, which is updated
+    with a binary search whenever one of their tallies changes. The top K of the leaderboard
+    is then the first K entries, and a customer dropping out of the top K is simply
+    overtaken by the next one.
+    """
+
+    def __init__(self) -> None:
+        self._guilds: Dict[int, RatingTally] = dict()
+        self._customers: Dict[int, Dict[int, RatingTally]] = dict()
+        # key: guild_id, value: the tallies of the guild's customers keyed by customer_id
+        self._rankings: Dict[int, List[RankKey]] = dict()
+        # key: guild_id, value: the rank keys of the guild's customers, sorted
+        self.loaded = False
+
+    @staticmethod
+    def _rank_key(customer_id: int, tally: RatingTally) -> RankKey:
+        return (-tally.total / tally.count, -tally.count, customer_id)
+
+    def _unrank(self, guild_id: int, customer_id: int, tally: RatingTally) -> None:
+        ranking = self._rankings.get(guild_id)
+        if not ranking or not tally.count:
+            return
+        key = self._rank_key(customer_id, tally)
+        index = bisect_left(ranking, key)
+        if index < len(ranking) and ranking[index] == key:
+            del ranking[index]
+
+    def _rank(self, guild_id: int, customer_id: int, tally: RatingTally) -> None:
+        if tally.count:
+            insort(
+                self._rankings.setdefault(guild_id, []),
+                self._rank_key(customer_id, tally),
+            )
+
+    def add(self, guild_id: int, customer_id: int, rating: int, times: int = 1) -> None:
+        if not MIN_RATING <= rating <= MAX_RATING:
+            return
+        if (tally := self._guilds.get(guild_id)) is None:
+            tally = self._guilds[guild_id] = RatingTally()
+        tally.add(rating, times)
+        customers = self._customers.setdefault(guild_id, dict())
+        if (customer := customers.get(customer_id)) is None:
+            customer = customers[customer_id] = RatingTally()
+        self._unrank(guild_id, customer_id, customer)
+        customer.add(rating, times)
+        self._rank(guild_id, customer_id, customer)
+
+    def remove(self, guild_id: int, customer_id: int, rating: int) -> None:
+        if not MIN_RATING <= rating <= MAX_RATING:
+            return
+        if tally := self._guilds.get(guild_id):
+            tally.remove(rating)
+        customers = self._customers.get(guild_id, {})
+        if customer := customers.get(customer_id):
+            self._unrank(guild_id, customer_id, customer)
+            customer.remove(rating)
+            self._rank(guild_id, customer_id, customer)
+            if not customer.count:
+                del customers[customer_id]
+
+    def average(self, guild_id: int) -> Optional[float]:
+        tally = self._guilds.get(guild_id)
+        return tally.average if tally else None
+
+    def stats(self, guild_id: int) -> Optional[FeedbackStats]:
+        tally = self._guilds.get(guild_id)
+        if not tally or not tally.count:
+            return None
+        return FeedbackStats(
+            average_rating=tally.total / tally.count,
+            total_ratings=tally.count,
+            five_star_ratings=tally.histogram[5],
+            four_star_ratings=tally.histogram[4],
+            three_star_ratings=tally.histogram[3],
+            two_star_ratings=tally.histogram[2],
+            one_star_ratings=tally.histogram[1],
+        )
+
+    def leaderboard(self, guild_id: int, limit: int) -> List[FeedbackLeaderboardEntry]:
+        """
+        The top `limit` customers of the guild, ordered by average rating, then by number of feedbacks.
+        """
+        customers = self._customers.get(guild_id, {})
+        entries = []
+        for _, _, customer_id in self._rankings.get(guild_id, [])[:limit]:
+            tally = customers[customer_id]
+            entries.append(
+                FeedbackLeaderboardEntry(
+                    customer_id=customer_id,
+                    feedback_count=tally.count,
+                    average_rating=tally.total / tally.count,
+                )
+            )
+        return entries
+
+    def clear(self) -> None:
+        self._guilds.clear()
+        self._customers.clear()
+        self._rankings.clear()
+        self.loaded = False
@@ -2,7 +2,10 @@ from typing import List, Optional, Union, Dict, Any
 from discord import Guild, TextChannel
 from discord.ext import commands
 from config.models import Keyword, KeywordType
+from core.keyword_matcher import KeywordMatcher
+from db.cache_invalidation import CacheInvalidationListener
 from db.database_manager import AsyncDatabaseManager
+from db.models import CacheChangeEvent
 
 
 class KeywordManager:
@@ -13,15 +16,19 @@ class KeywordManager:
         self.database_manager = database_manager
         self.keywords_table_name = "keywords"
         self.keyword_channel_table_name = "keyword_channel"
-        self.keyword_cache: Dict[str, Keyword] = dict()
+        self.keyword_cache: Dict[int, Dict[str, Keyword]] = dict()
+        # key: guild_id, value: the guild's keywords keyed by trigger
+        self.keyword_matchers: Dict[int, KeywordMatcher] = dict()
+        # key: guild_id, value: the compiled matcher of the guild's keywords
 
     async def initialize_cache(self):
-        keyword_channel_mapping = await self.database_manager.select(
-            table_name=self.keyword_channel_table_name
-        )
-
-        keyword_records = await self.database_manager.select(
-            table_name=self.keywords_table_name
+        keyword_channel_mapping, keyword_records = (
+            await self.database_manager.gather_queries(
+                self.database_manager.select(
+                    table_name=self.keyword_channel_table_name
+                ),
+                self.database_manager.select(table_name=self.keywords_table_name),
+            )
         )
         if not keyword_records:
             print("No keywords found in database to cache.")
@@ -34,21 +41,119 @@ class KeywordManager:
             channels_by_keyword[word_id].append(mapping["channel_id"])
         assert not isinstance(keyword_records, dict)
         for record in keyword_records:
-            kw_id = record["id"]
-            trigger = record["trigger"]
-            keyword = Keyword(
-                id=kw_id,
-                trigger=trigger,
-                response=record["response"],
-                kw_type=KeywordType(record["kw_type"]),
-                in_ticket_only=record["in_ticket_only"],
-                guild_id=record["guild_id"],
-                mention_participants=record["mention_participants"],
-                allowed_channel_ids=channels_by_keyword.get(kw_id, []),
+            keyword = self._keyword_from_record(
+                record, channels_by_keyword.get(record["id"], [])
             )
-            self.keyword_cache[trigger] = keyword
+            self._get_guild_keywords(keyword.guild_id)[keyword.trigger] = keyword
+        for guild_id, keywords in self.keyword_cache.items():
+            self.keyword_matchers[guild_id] = KeywordMatcher(keywords.values())
+
+    @staticmethod
+    def _keyword_from_record(record, allowed_channel_ids: List[int]) -> Keyword:
+        return Keyword(
+            id=record["id"],
+            trigger=record["trigger"],
+            response=record["response"],
+            kw_type=KeywordType(record["kw_type"]),
+            in_ticket_only=record["in_ticket_only"],
+            guild_id=record["guild_id"],
+            mention_participants=record["mention_participants"],
+            allowed_channel_ids=allowed_channel_ids,
+        )
+
+    def register_cache_listener(self, listener: CacheInvalidationListener) -> None:
+        """
+        Applies the keyword changes made by other processes to the cache and the matchers.
+        """
+        listener.register(self.keywords_table_name, self._on_keyword_change)
+        listener.register(self.keyword_channel_table_name, self._on_channel_change)
+        listener.register_resync(self.resync_cache)
+
+    async def resync_cache(self):
+        self.keyword_cache.clear()
+        self.keyword_matchers.clear()
+        # Notifications were missed, a lagging replica may not have those changes either.
+        with self.database_manager.read_from_primary():
+            await self.initialize_cache()
+
+    def _get_cached_keyword_by_id(self, keyword_id: int) -> Optional[Keyword]:
+        for keywords in self.keyword_cache.values():
+            for keyword in keywords.values():
+                if keyword.id == keyword_id:
+                    return keyword
+        return None
+
+    def _uncache_keyword(self, keyword_id: int, trigger: str, guild_id: int) -> None:
+        keyword = self.keyword_cache.get(guild_id, {}).get(trigger)
+        if keyword and keyword.id == keyword_id:
+            self._get_guild_keywords(guild_id).pop(trigger)
+            self._get_matcher(guild_id).remove(trigger)
+
+    async def _on_keyword_change(self, event: CacheChangeEvent) -> None:
+        row = event.row
+        if event.operation == "DELETE":
+            self._uncache_keyword(row["id"], row["trigger"], row["guild_id"])
+            return
+        allowed_channel_ids = []
+        if event.old_row:
+            old = event.old_row
+            if cached := self._get_cached_keyword_by_id(old["id"]):
+                allowed_channel_ids = cached.allowed_channel_ids
+            self._uncache_keyword(old["id"], old["trigger"], old["guild_id"])
+        # The response is not part of the notification, read the row back.
+        # From the primary, a replica may not have the change yet when the notification arrives.
+        with self.database_manager.read_from_primary():
+            record = await self.database_manager.select(
+                table_name=self.keywords_table_name,
+                criteria={"id": row["id"]},
+                fetch_one=True,
+            )
+        if not record:
+            return
+        keyword = self._keyword_from_record(record, allowed_channel_ids)
+        self._get_guild_keywords(keyword.guild_id)[keyword.trigger] = keyword
+        self._get_matcher(keyword.guild_id).add(keyword)
+
+    def _on_channel_change(self, event: CacheChangeEvent) -> None:
+        if event.old_row:
+            old = event.old_row
+            if keyword := self._get_cached_keyword_by_id(old["keyword_id"]):
+                keyword.allowed_channel_ids = [
+                    cid for cid in keyword.allowed_channel_ids if cid != old["channel_id"]
+                ]
+        keyword = self._get_cached_keyword_by_id(event.row["keyword_id"])
+        if not keyword:
+            return
+        channel_id = event.row["channel_id"]
+        if event.operation == "DELETE":
+            keyword.allowed_channel_ids = [
+                cid for cid in keyword.allowed_channel_ids if cid != channel_id
+            ]
+        elif channel_id not in keyword.allowed_channel_ids:
+            keyword.allowed_channel_ids.append(channel_id)
+
+    def _get_guild_keywords(self, guild_id: int) -> Dict[str, Keyword]:
+        if (keywords := self.keyword_cache.get(guild_id)) is None:
+            keywords = self.keyword_cache[guild_id] = dict()
+        return keywords
 
-    def get_all_keywords(self) -> Dict[str, Keyword]:
+    def _get_matcher(self, guild_id: int) -> KeywordMatcher:
+        if (matcher := self.keyword_matchers.get(guild_id)) is None:
+            matcher = self.keyword_matchers[guild_id] = KeywordMatcher()
+        return matcher
+
+    def match_keywords(self, guild_id: int, content: str) -> List[Keyword]:
+        """
+        Returns all keywords of the guild triggered by the message content.
+        MATCH_START keywords match if the content starts with the trigger,
+        IS_SUBSTR keywords match if the trigger appears anywhere in the content.
+        """
+        matcher = self.keyword_matchers.get(guild_id)
+        if not matcher:
+            return []
+        return matcher.match(content)
+
+    def get_all_keywords(self) -> Dict[int, Dict[str, Keyword]]:
         return self.keyword_cache
 
     def get_keyword_by_trigger(self, trigger: str, guild_id: int) -> Optional[Keyword]:
@@ -57,20 +162,18 @@ class KeywordManager:
         Returns None if not found.
         Args:
             trigger: The word that triggers the keyword.
+            guild_id: The guild this keyword belongs to.
         Returns:
             Keyword object or None if not found.
         """
-        kw = self.keyword_cache.get(trigger)
-        if not kw:
-            return None
-        return kw if kw.guild_id == guild_id else None
+        return self.keyword_cache.get(guild_id, {}).get(trigger)
 
-    def get_all_keywords_in_guild(self, guild_id: int):
-        return {
-            key: word
-            for key, word in self.keyword_cache.items()
-            if word.guild_id == guild_id
-        }
+    def get_all_keywords_in_guild(self, guild_id: int) -> Dict[str, Keyword]:
+        """
+        Returns the guild's keywords keyed by trigger.
+        This is the cache itself, not a copy, so do not mutate it.
+        """
+        return self.keyword_cache.get(guild_id, {})
 
     async def create_keyword(
         self,
@@ -97,28 +200,28 @@ class KeywordManager:
         Returns:
             The newly created, fully hydrated Keyword object.
         """
-        keyword_id = await self.database_manager.insert(
-            table_name=self.keywords_table_name,
-            data={
-                "trigger": trigger,
-                "response": response,
-                "kw_type": kw_type.value,
-                "in_ticket_only": in_ticket_only,
-                "guild_id": guild_id,
-                "mention_participants": mention_participants,
-            },
-            returning_col="id",
-        )
-
         final_channel_ids = allowed_channel_ids or []
-        if final_channel_ids:
-            channel_data = [
-                {"keyword_id": keyword_id, "channel_id": cid}
-                for cid in final_channel_ids
-            ]
-            await self.database_manager.insert_many(
-                table_name=self.keyword_channel_table_name, data=channel_data
+        async with self.database_manager.transaction() as tx:
+            keyword_id = await tx.insert(
+                table_name=self.keywords_table_name,
+                data={
+                    "trigger": trigger,
+                    "response": response,
+                    "kw_type": kw_type.value,
+                    "in_ticket_only": in_ticket_only,
+                    "guild_id": guild_id,
+                    "mention_participants": mention_participants,
+                },
+                returning_col="id",
             )
+            if final_channel_ids:
+                channel_data = [
+                    {"keyword_id": keyword_id, "channel_id": cid}
+                    for cid in final_channel_ids
+                ]
+                await tx.insert_many(
+                    table_name=self.keyword_channel_table_name, data=channel_data
+                )
 
         new_keyword = Keyword(
             id=keyword_id,
@@ -131,16 +234,16 @@ class KeywordManager:
             allowed_channel_ids=final_channel_ids,
         )
 
-        self.keyword_cache[trigger] = new_keyword
+        self._get_guild_keywords(guild_id)[trigger] = new_keyword
+        self._get_matcher(guild_id).add(new_keyword)
         return new_keyword
 
     async def delete_keyword(self, trigger: str, guild_id: int):
-        kw = self.keyword_cache.get(trigger, None)
+        kw = self.get_keyword_by_trigger(trigger, guild_id=guild_id)
         if not kw:
             return False
-        if kw.guild_id == guild_id:
-            self.keyword_cache.pop(trigger, None)
-        # Remove from cache if exists and guild id matches
+        self._get_guild_keywords(guild_id).pop(trigger, None)
+        self._get_matcher(guild_id).remove(trigger)
         rows_affected = await self.database_manager.delete(
             table_name=self.keywords_table_name,
             criteria={"trigger": trigger, "guild_id": guild_id},
@@ -151,9 +254,10 @@ class KeywordManager:
         cached_keyword = self.get_keyword_by_trigger(trigger, guild_id=guild_id)
         if not cached_keyword:
             return None
+        guild_keywords = self._get_guild_keywords(guild_id)
         new_trigger = data.get("trigger")
         if new_trigger and new_trigger != trigger:
-            self.keyword_cache.pop(trigger)
+            guild_keywords.pop(trigger)
             trigger_to_update = new_trigger
         else:
             trigger_to_update = trigger
@@ -168,7 +272,10 @@ class KeywordManager:
             if hasattr(cached_keyword, key):
                 setattr(cached_keyword, key, value)
 
-        self.keyword_cache[trigger_to_update] = cached_keyword
+        guild_keywords[trigger_to_update] = cached_keyword
+        matcher = self._get_matcher(guild_id)
+        matcher.remove(trigger)
+        matcher.add(cached_keyword)
 
         return cached_keyword
 
@@ -195,7 +302,7 @@ class KeywordManager:
         )
         # Update the cache
         keyword.allowed_channel_ids += channel_ids
-        self.keyword_cache[trigger] = keyword
+        self._get_guild_keywords(guild_id)[trigger] = keyword
         return keyword
 
     async def get_keyword_channels(self, trigger: str, guild_id: int) -> List[int]:
@@ -252,5 +359,5 @@ class KeywordManager:
         keyword.allowed_channel_ids = [
             cid for cid in keyword.allowed_channel_ids if cid not in channel_ids
         ]
-        self.keyword_cache[trigger] = keyword
+        self._get_guild_keywords(guild_id)[trigger] = keyword
         return keyword
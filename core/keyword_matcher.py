@@ -0,0 +1,183 @@
+from collections import deque
+from typing import Dict, Iterable, List, Optional
+from config.models import Keyword, KeywordType
+
+
+class _TrieNode:
+    __slots__ = ("children", "fail", "dict_link", "trigger")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, "_TrieNode"] = dict()
+        self.fail: Optional["_TrieNode"] = None
+        # The nearest node on the fail chain that ends a trigger.
+        self.dict_link: Optional["_TrieNode"] = None
+        # The trigger that ends at this node, if any.
+        self.trigger: Optional[str] = None
+
+
+class PrefixTrie:
+    """
+    A character trie answering "which triggers does this text start with?".
+    Lookups cost O(length of the longest trigger), independent of the number of triggers.
+    """
+
+    def __init__(self) -> None:
+        self.root = _TrieNode()
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, trigger: str) -> None:
+        node = self.root
+        for char in trigger:
+            node = node.children.setdefault(char, _TrieNode())
+        if node.trigger is None:
+            self._size += 1
+        node.trigger = trigger
+
+    def remove(self, trigger: str) -> bool:
+        """
+        Removes a trigger, pruning branches that no longer lead to any trigger.
+        Returns False if the trigger was not in the trie.
+        """
+        path = [self.root]
+        for char in trigger:
+            node = path[-1].children.get(char)
+            if node is None:
+                return False
+            path.append(node)
+        if path[-1].trigger is None:
+            return False
+        path[-1].trigger = None
+        self._size -= 1
+        for i in range(len(trigger), 0, -1):
+            node = path[i]
+            if node.trigger is not None or node.children:
+                break
+            del path[i - 1].children[trigger[i - 1]]
+        return True
+
+    def prefixes_of(self, text: str) -> List[str]:
+        found = []
+        node = self.root
+        for char in text:
+            node = node.children.get(char)
+            if node is None:
+                break
+            if node.trigger is not None:
+                found.append(node.trigger)
+        return found
+
+
+class AhoCorasick(PrefixTrie):
+    """
+    An Aho-Corasick automaton finding every trigger that occurs anywhere in a text in a single pass.
+
+    Triggers can be added and removed at any time; the goto trie is updated in place
+    and the failure links are rebuilt lazily on the next search.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._dirty = False
+
+    def add(self, trigger: str) -> None:
+        super().add(trigger)
+        self._dirty = True
+
+    def remove(self, trigger: str) -> bool:
+        removed = super().remove(trigger)
+        self._dirty = self._dirty or removed
+        return removed
+
+    def _build(self) -> None:
+        root = self.root
+        root.fail = None
+        root.dict_link = None
+        queue = deque()
+        for child in root.children.values():
+            child.fail = root
+            child.dict_link = None
+            queue.append(child)
+        while queue:
+            node = queue.popleft()
+            for char, child in node.children.items():
+                fail = node.fail
+                while fail is not None and char not in fail.children:
+                    fail = fail.fail
+                child.fail = fail.children[char] if fail is not None else root
+                child.dict_link = (
+                    child.fail if child.fail.trigger is not None else child.fail.dict_link
+                )
+                queue.append(child)
+        self._dirty = False
+
+    def find_all(self, text: str) -> List[str]:
+        """
+        Returns the distinct triggers found in the text, ordered by where they first end.
+        """
+        if not self._size:
+            return []
+        if self._dirty:
+            self._build()
+        root = self.root
+        node = root
+        found: Dict[str, None] = dict()
+        for char in text:
+            while node is not root and char not in node.children:
+                assert node.fail
+                node = node.fail
+            node = node.children.get(char, root)
+            match = node if node.trigger is not None else node.dict_link
+            while match is not None:
+                assert match.trigger is not None
+                found.setdefault(match.trigger, None)
+                match = match.dict_link
+        return list(found)
+
+
+class KeywordMatcher:
+    """
+    The compiled keyword matcher of a single guild.
+    IS_SUBSTR keywords are matched with an Aho-Corasick automaton and MATCH_START keywords
+    with a prefix trie, so the cost of matching a message grows with the message length
+    rather than with the number of keywords in the guild.
+    """
+
+    def __init__(self, keywords: Iterable[Keyword] = ()) -> None:
+        self._keywords: Dict[str, Keyword] = dict()
+        self._substr = AhoCorasick()
+        self._prefix = PrefixTrie()
+        for keyword in keywords:
+            self.add(keyword)
+
+    def __len__(self) -> int:
+        return len(self._keywords)
+
+    def add(self, keyword: Keyword) -> None:
+        """
+        Adds or replaces the keyword with the same trigger.
+        """
+        self.remove(keyword.trigger)
+        self._keywords[keyword.trigger] = keyword
+        if keyword.kw_type == KeywordType.MATCH_START:
+            self._prefix.add(keyword.trigger)
+        else:
+            self._substr.add(keyword.trigger)
+
+    def remove(self, trigger: str) -> Optional[Keyword]:
+        keyword = self._keywords.pop(trigger, None)
+        if keyword is None:
+            return None
+        # The keyword type may have been changed in place, so we clear both structures.
+        self._prefix.remove(trigger)
+        self._substr.remove(trigger)
+        return keyword
+
+    def match(self, content: str) -> List[Keyword]:
+        """
+        Returns every keyword triggered by the given message content.
+        """
+        triggers = self._prefix.prefixes_of(content) + self._substr.find_all(content)
+        return [self._keywords[trigger] for trigger in triggers]
@@ -2,7 +2,9 @@ from discord.ext import commands
 from typing import Dict, Optional, Set
 
 from config.models import RoleRequestChannelType, RoleRequestData
+from db.cache_invalidation import CacheInvalidationListener
 from db.database_manager import AsyncDatabaseManager
+from db.models import CacheChangeEvent
 
 
 class NoRequestableRolestoRemove(Exception):
@@ -29,12 +31,20 @@ class RoleRequestManager:
         # key: guild_id, value: RoleRequestData dataclass
 
     async def init_cache(self):
-        role_request_data = await self.database_manager.select(
-            table_name=self.role_request_table_name
+        # Every guild's config and requestable roles, with one query per table.
+        role_request_data, roles_data = await self.database_manager.gather_queries(
+            self.database_manager.select(table_name=self.role_request_table_name),
+            self.database_manager.select(
+                table_name=self.guild_requestable_roles_table_name,
+                columns=("guild_id", "role_id"),
+            ),
         )
         if not role_request_data:
             return
         assert isinstance(role_request_data, list)
+        roles_by_guild: Dict[int, Set[int]] = dict()
+        for role in roles_data:
+            roles_by_guild.setdefault(role["guild_id"], set()).add(role["role_id"])
         for data in role_request_data:
             print(
                 f"Found guild ID {data['guild_id']} in table {self.role_request_table_name}, adding to role_request_cache."
@@ -43,11 +53,55 @@ class RoleRequestManager:
                 guild_id=data["guild_id"],
                 request_channel_id=data["request_channel_id"],
                 approval_channel_id=data["approval_channel_id"],
-                requestable_roles=await self.get_requestable_roles(
-                    guild_id=data["guild_id"]
-                ),
+                requestable_roles=roles_by_guild.get(data["guild_id"], set()),
+            )
+
+    def register_cache_listener(self, listener: CacheInvalidationListener) -> None:
+        """
+        Applies the role request changes made by other processes to the cache.
+        """
+        listener.register(self.role_request_table_name, self._on_config_change)
+        listener.register(
+            self.guild_requestable_roles_table_name, self._on_requestable_role_change
+        )
+        listener.register_resync(self.resync_cache)
+
+    async def resync_cache(self):
+        self.role_request_cache.clear()
+        # Notifications were missed, a lagging replica may not have those changes either.
+        with self.database_manager.read_from_primary():
+            await self.init_cache()
+
+    def _on_config_change(self, event: CacheChangeEvent) -> None:
+        guild_id = event.row["guild_id"]
+        if event.operation == "DELETE":
+            self.role_request_cache.pop(guild_id, None)
+            return
+        if config := self.role_request_cache.get(guild_id):
+            config.request_channel_id = event.row["request_channel_id"]
+            config.approval_channel_id = event.row["approval_channel_id"]
+        elif event.operation == "INSERT":
+            self.role_request_cache[guild_id] = RoleRequestData(
+                guild_id=guild_id,
+                request_channel_id=event.row["request_channel_id"],
+                approval_channel_id=event.row["approval_channel_id"],
+                requestable_roles=set(),
             )
 
+    def _on_requestable_role_change(self, event: CacheChangeEvent) -> None:
+        if event.old_row:
+            old = event.old_row
+            if config := self.role_request_cache.get(old["guild_id"]):
+                config.requestable_roles.discard(old["role_id"])
+        config = self.role_request_cache.get(event.row["guild_id"])
+        if not config:
+            # Loaded with its roles on the next lookup.
+            return
+        if event.operation == "DELETE":
+            config.requestable_roles.discard(event.row["role_id"])
+        else:
+            config.requestable_roles.add(event.row["role_id"])
+
     async def _get_or_create_config(self, guild_id: int) -> RoleRequestData:
         """
         The single source of truth for getting a guild's config.
@@ -56,19 +110,24 @@ class RoleRequestManager:
         if config := self.role_request_cache.get(guild_id):
             return config
 
-        # Not in cache, check DB
-        config_data = await self.database_manager.select(
-            table_name=self.role_request_table_name,
-            criteria={"guild_id": guild_id},
-            fetch_one=True,
-        )
+        # Not in cache, check DB. The roles are fetched alongside the config instead of after it.
+        # Read from the primary, a lagging replica could miss a config created moments ago.
+        with self.database_manager.read_from_primary():
+            config_data, roles_data = await self.database_manager.gather_queries(
+                self.database_manager.select(
+                    table_name=self.role_request_table_name,
+                    criteria={"guild_id": guild_id},
+                    fetch_one=True,
+                ),
+                self.database_manager.select(
+                    table_name=self.guild_requestable_roles_table_name,
+                    criteria={"guild_id": guild_id},
+                    columns=("role_id",),
+                ),
+            )
 
         if config_data:
             # Found in DB, populate cache
-            roles_data = await self.database_manager.select(
-                table_name=self.guild_requestable_roles_table_name,
-                criteria={"guild_id": guild_id},
-            )
             requestable_roles = (
                 {role["role_id"] for role in roles_data} if roles_data else set()
             )
@@ -96,6 +155,9 @@ class RoleRequestManager:
         self.role_request_cache[guild_id] = config
         return config
 
+    async def get_config(self, guild_id: int) -> RoleRequestData:
+        return await self._get_or_create_config(guild_id=guild_id)
+
     async def get_typed_channel_id(
         self, guild_id: int, cnl_type: RoleRequestChannelType
     ) -> Optional[int]:
@@ -0,0 +1,88 @@
+import asyncio
+import json
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Dict, List, Optional
+from config.models import StartupPhase, StartupReport
+
+
+class StartupProfiler:
+    """
+    Times the phases of the bot startup and runs the independent ones concurrently.
+
+    Usage:
+        async with startup.phase("connect"):
+            await db.connect()
+        await startup.run_concurrently("caches", {"keywords": ..., "tickets": ...})
+        startup.finish()
+    """
+
+    def __init__(self, logger: logging.Logger):
+        self.logger = logger
+        self._start = time.perf_counter()
+        self._phases: List[StartupPhase] = []
+        self.report: Optional[StartupReport] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.report is not None
+
+    @asynccontextmanager
+    async def phase(self, name: str, group: Optional[str] = None) -> AsyncIterator[None]:
+        started = time.perf_counter()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            duration = time.perf_counter() - started
+            self._phases.append(
+                StartupPhase(
+                    name=name,
+                    started_at=started - self._start,
+                    duration=duration,
+                    group=group,
+                    ok=ok,
+                )
+            )
+            self.logger.info(
+                f"Startup phase {name} {'done' if ok else 'failed'} in {duration:.3f}s."
+            )
+
+    async def run_concurrently(
+        self, group: str, steps: Dict[str, Awaitable[Any]]
+    ) -> Dict[str, Any]:
+        """
+        Runs independent steps concurrently, timing each of them and the whole group.
+        Returns their results keyed by step name. The first failure is raised once every step has finished.
+        """
+
+        async def run(name: str, step: Awaitable[Any]) -> Any:
+            async with self.phase(name, group=group):
+                return await step
+
+        async with self.phase(group):
+            results = await asyncio.gather(
+                *(run(name, step) for name, step in steps.items()),
+                return_exceptions=True,
+            )
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return dict(zip(steps, results))
+
+    def finish(self) -> StartupReport:
+        self.report = StartupReport(
+            phases=sorted(self._phases, key=lambda phase: phase.started_at),
+            total=time.perf_counter() - self._start,
+        )
+        lines = [f"Startup finished in {self.report.total:.3f}s:"]
+        for phase in self.report.phases:
+            indent = "    " if phase.group else "  "
+            lines.append(
+                f"{indent}{phase.name:<24} {phase.duration:>8.3f}s (at {phase.started_at:.3f}s){'' if phase.ok else ' FAILED'}"
+            )
+        self.logger.info("\n".join(lines))
+        self.logger.debug(f"Startup report: {json.dumps(self.report.to_dict())}")
+        return self.report
@@ -0,0 +1,155 @@
+from collections import OrderedDict, defaultdict
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+from config.models import Ticket, TicketStatus
+
+
+class TicketIndex:
+    """
+    The in-memory ticket cache used by the TicketManager.
+
+    Tickets are stored in a primary map keyed by the ticket's database id, with
+    secondary indexes by channel id, guild id and status so that the lookups done
+    on every message (e.g. "is this channel a ticket?") are O(1) instead of a scan
+    over every cached ticket.
+
+    Every mutation of a cached ticket that affects an indexed field must go through
+    this class, otherwise the indexes will drift from the primary map.
+    """
+
+    def __init__(self) -> None:
+        self._by_id: Dict[int, Ticket] = dict()
+        self._by_channel: Dict[int, int] = dict()
+        self._by_guild: Dict[int, Set[int]] = defaultdict(set)
+        self._by_status: Dict[TicketStatus, Set[int]] = defaultdict(set)
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def __contains__(self, ticket_id: int) -> bool:
+        return ticket_id in self._by_id
+
+    def __iter__(self) -> Iterator[Ticket]:
+        return iter(list(self._by_id.values()))
+
+    def values(self) -> List[Ticket]:
+        return list(self._by_id.values())
+
+    def get(self, ticket_id: int) -> Optional[Ticket]:
+        return self._by_id.get(ticket_id)
+
+    def get_by_channel(self, channel_id: int) -> Optional[Ticket]:
+        ticket_id = self._by_channel.get(channel_id)
+        if ticket_id is None:
+            return None
+        return self._by_id.get(ticket_id)
+
+    def in_guild(self, guild_id: int) -> List[Ticket]:
+        return [self._by_id[tid] for tid in self._by_guild.get(guild_id, ())]
+
+    def with_status(self, status: TicketStatus) -> List[Ticket]:
+        return [self._by_id[tid] for tid in self._by_status.get(status, ())]
+
+    def _unindex(self, ticket: Ticket) -> None:
+        if self._by_channel.get(ticket.channel_id) == ticket.db_id:
+            del self._by_channel[ticket.channel_id]
+        guild_ids = self._by_guild.get(ticket.guild_id)
+        if guild_ids is not None:
+            guild_ids.discard(ticket.db_id)
+            if not guild_ids:
+                del self._by_guild[ticket.guild_id]
+        status_ids = self._by_status.get(ticket.status)
+        if status_ids is not None:
+            status_ids.discard(ticket.db_id)
+            if not status_ids:
+                del self._by_status[ticket.status]
+
+    def _index(self, ticket: Ticket) -> None:
+        self._by_channel[ticket.channel_id] = ticket.db_id
+        self._by_guild[ticket.guild_id].add(ticket.db_id)
+        self._by_status[ticket.status].add(ticket.db_id)
+
+    def add(self, ticket: Ticket) -> Ticket:
+        """
+        Inserts or replaces a ticket in the cache, keeping every index consistent.
+        """
+        if old := self._by_id.get(ticket.db_id):
+            self._unindex(old)
+        self._by_id[ticket.db_id] = ticket
+        self._index(ticket)
+        return ticket
+
+    def remove(self, ticket_id: int) -> Optional[Ticket]:
+        """
+        Removes a ticket from the cache. Returns the removed ticket, or None if it was not cached.
+        """
+        ticket = self._by_id.pop(ticket_id, None)
+        if ticket:
+            self._unindex(ticket)
+        return ticket
+
+    def remove_many(self, ticket_ids: Iterable[int]) -> None:
+        for ticket_id in ticket_ids:
+            self.remove(ticket_id)
+
+    def set_status(self, ticket: Ticket, new_status: TicketStatus) -> None:
+        """
+        Changes the status of a ticket and moves it to the matching status index.
+        The ticket is (re)inserted into the cache if it was not cached yet.
+        """
+        cached = self._by_id.get(ticket.db_id)
+        if cached is not None:
+            self._unindex(cached)
+        ticket.status = new_status
+        self._by_id[ticket.db_id] = ticket
+        self._index(ticket)
+
+    def add_participants(self, ticket_id: int, participants_id: Iterable[int]) -> None:
+        if ticket := self._by_id.get(ticket_id):
+            ticket.participants.update(participants_id)
+
+    def remove_participants(
+        self, ticket_id: int, participants_id: Iterable[int]
+    ) -> None:
+        if ticket := self._by_id.get(ticket_id):
+            ticket.participants.difference_update(participants_id)
+
+    def clear(self) -> None:
+        self._by_id.clear()
+        self._by_channel.clear()
+        self._by_guild.clear()
+        self._by_status.clear()
+
+
+class NonTicketChannelCache:
+    """
+    A bounded LRU set of channel ids that are known not to be tickets.
+
+    Without it, every message sent in an ordinary channel misses the TicketIndex and
+    falls through to a database query. Entries must be invalidated whenever a channel
+    might become a ticket (e.g. on ticket creation).
+    """
+
+    def __init__(self, max_size: int = 10000) -> None:
+        self.max_size = max_size
+        self._channels: OrderedDict[int, None] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._channels)
+
+    def __contains__(self, channel_id: int) -> bool:
+        if channel_id not in self._channels:
+            return False
+        self._channels.move_to_end(channel_id)
+        return True
+
+    def add(self, channel_id: int) -> None:
+        self._channels[channel_id] = None
+        self._channels.move_to_end(channel_id)
+        while len(self._channels) > self.max_size:
+            self._channels.popitem(last=False)
+
+    def discard(self, channel_id: int) -> None:
+        self._channels.pop(channel_id, None)
+
+    def clear(self) -> None:
+        self._channels.clear()
@@ -3,29 +3,48 @@ import logging
 import discord
 from discord import Guild, User, Member, Embed, TextChannel, Client
 from discord.abc import GuildChannel
-import functools
 from typing import Union, List, Optional, Dict, Set
 from discord.ext.commands import Bot
 from discord.ext.commands.errors import ChannelNotFound
 from discord.ui import View
-import yaml
 from config.models import (
     CloseMessageType,
+    FeedbackPrompt,
     FeedbackPromptMessageType,
     Ticket,
     TicketStatus,
     TicketType,
     PanelMessageData,
+    ArchiveQueueStats,
 )
 from core.feedback_manager import FeedbackManager
+from core.ticket_index import NonTicketChannelCache, TicketIndex
+from core.archive_queue import ArchiveJob, ArchiveJobQueue
 from db.database_manager import AsyncDatabaseManager
-from core.exceptions import ChannelCreationFail, ChannelNotTicket, TicketNotFound
+from db.cache_invalidation import CacheInvalidationListener
+from db.models import CacheChangeEvent
+from core.exceptions import (
+    ArchiveQueueFull,
+    ChannelCreationFail,
+    ChannelNotTicket,
+    TicketNotFound,
+    TranscriptExportFailed,
+)
+from core.transcript_exporter import (
+    CliTranscriptExporter,
+    NativeTranscriptExporter,
+    UTC_to_GMT,
+)
 from config.constants import (
     cus_service_role_id,
     eng_to_chinese,
     THEME_COLOR,
     archive_channel_id,
     exporter_bot_token,
+    transcript_exporter_backend,
+    archive_worker_count,
+    archive_queue_max_pending,
+    close_dm_concurrency,
 )
 
 import asyncio
@@ -37,14 +56,16 @@ from utils.discord_utils import (
     try_get_member,
 )
 from utils.embed_utils import create_themed_embed
-import subprocess
-from datetime import datetime, timedelta
+from utils.lazy_import import lazy_import
+from datetime import datetime
 
-import tempfile
-import pathlib
+import time
 
 from view.feedback_views import FeedBackSystem, feedbackEmbed
 
+# Only read when the business hours are shown.
+yaml = lazy_import("yaml")
+
 
 class TicketManager:
     def __init__(
@@ -62,7 +83,20 @@ class TicketManager:
         self.ticket_panels_table_name = "ticket_panels"
         self.ticket_participants_table_name = "ticket_participants"
         self.panel_messages: Dict[int, PanelMessageData] = dict()
-        self.ticket_caches: Dict[int, Ticket] = dict()
+        self.ticket_caches = TicketIndex()
+        self.non_ticket_channels = NonTicketChannelCache()
+        self.native_exporter = NativeTranscriptExporter()
+        self.cli_exporter = (
+            CliTranscriptExporter(token=exporter_bot_token)
+            if exporter_bot_token
+            else None
+        )
+        self.archive_queue = ArchiveJobQueue(
+            export=self._export_transcript,
+            logger=self.logger,
+            worker_count=archive_worker_count,
+            max_pending=archive_queue_max_pending,
+        )
 
     async def _try_get_channel_by_bot(
         self, channel_id: int
@@ -78,10 +112,25 @@ class TicketManager:
         """
         Attempts to get a ticket by channel ID from the cache.
         """
-        for ticket in self.ticket_caches.values():
-            if ticket.channel_id == channel_id:
-                return ticket
-        return None
+        return self.ticket_caches.get_by_channel(channel_id)
+
+    @staticmethod
+    def _ticket_from_record(ticket_data) -> Ticket:
+        """
+        Builds a Ticket from a row of the tickets table.
+        """
+        return Ticket(
+            db_id=ticket_data["id"],
+            channel_id=ticket_data["channel_id"],
+            auto_timeout=ticket_data["auto_timeout"],
+            timed_out=ticket_data["timed_out"],
+            close_msg_id=ticket_data["close_msg_id"],
+            status=TicketStatus.from_id(ticket_data["status"]),
+            ticket_type=TicketType(ticket_data["ticket_type"]),
+            guild_id=ticket_data["guild_id"],
+            close_msg_type=CloseMessageType(ticket_data["close_msg_type"]),
+            participants=set(),
+        )
 
     async def _try_get_guild(self, guild_id: int) -> Optional[Guild]:
         return await try_get_guild(bot=self.bot, guild_id=guild_id)
@@ -109,10 +158,24 @@ class TicketManager:
         Initialize the cache for ticket panels and tickets.
         This function should be called when the bot starts.
         """
-        # Load ticket panels into cache
-        self.logger.info("Loading ticket panels into cache...")
-        ticket_panels = await self.database_manager.select(
-            table_name=self.ticket_panels_table_name
+        # The panels, the tickets and all of their participants are independent,
+        # so they are fetched concurrently with one query per table.
+        self.logger.info("Loading ticket panels and tickets into cache...")
+        phase_start = time.perf_counter()
+        (
+            ticket_panels,
+            tickets,
+            participant_rows,
+        ) = await self.database_manager.gather_queries(
+            self.database_manager.select(table_name=self.ticket_panels_table_name),
+            self.database_manager.select(table_name=self.ticket_table_name),
+            self.database_manager.select(
+                table_name=self.ticket_participants_table_name,
+                columns=("ticket_id", "participant_id"),
+            ),
+        )
+        self.logger.info(
+            f"Fetched {len(ticket_panels)} panels, {len(tickets)} tickets and {len(participant_rows)} ticket participants in {time.perf_counter() - phase_start:.3f}s."
         )
         for panel in ticket_panels:
             self.panel_messages[panel["guild_id"]] = PanelMessageData(
@@ -120,28 +183,76 @@ class TicketManager:
                 channel_id=panel["channel_id"],
                 guild_id=panel["guild_id"],
             )
-        self.logger.info("Ticket panels loaded into cache.")
-        self.logger.info("Loading tickets into cache...")
-        # Load tickets into cache
-        tickets = await self.database_manager.select(table_name=self.ticket_table_name)
+        phase_start = time.perf_counter()
+        participants_by_ticket: Dict[int, Set[int]] = dict()
+        for row in participant_rows:
+            participants_by_ticket.setdefault(row["ticket_id"], set()).add(
+                row["participant_id"]
+            )
         for ticket_data in tickets:
-            ticket = Ticket(
-                db_id=ticket_data["id"],
-                channel_id=ticket_data["channel_id"],
-                auto_timeout=ticket_data["auto_timeout"],
-                timed_out=ticket_data["timed_out"],
-                close_msg_id=ticket_data["close_msg_id"],
-                status=TicketStatus.from_id(ticket_data["status"]),
-                ticket_type=TicketType(ticket_data["ticket_type"]),
-                guild_id=ticket_data["guild_id"],
-                close_msg_type=CloseMessageType(ticket_data["close_msg_type"]),
-                participants=set(),
-            )
-            participants = await self.get_ticket_participants_id(ticket_id=ticket.db_id)
-            ticket.participants = set(participants) if participants else set()
-
-            self.ticket_caches[ticket.db_id] = ticket
-        self.logger.info("Tickets loaded into cache.")
+            ticket = self._ticket_from_record(ticket_data)
+            ticket.participants = participants_by_ticket.get(ticket.db_id, set())
+            self.ticket_caches.add(ticket)
+        self.logger.info(
+            f"Tickets loaded into cache ({len(self.ticket_caches)} tickets, {time.perf_counter() - phase_start:.3f}s)."
+        )
+
+    def register_cache_listener(self, listener: CacheInvalidationListener) -> None:
+        """
+        Applies the ticket, participant and panel changes made by other processes to the cache.
+        """
+        listener.register(self.ticket_table_name, self._on_ticket_change)
+        listener.register(
+            self.ticket_participants_table_name, self._on_participant_change
+        )
+        listener.register(self.ticket_panels_table_name, self._on_panel_change)
+        listener.register_resync(self.resync_cache)
+
+    async def resync_cache(self):
+        self.ticket_caches.clear()
+        self.non_ticket_channels.clear()
+        self.panel_messages.clear()
+        # Notifications were missed, a lagging replica may not have those changes either.
+        with self.database_manager.read_from_primary():
+            await self.init_cache()
+
+    def _on_ticket_change(self, event: CacheChangeEvent) -> None:
+        if event.operation == "DELETE":
+            self.ticket_caches.remove(event.row["id"])
+            return
+        ticket = self._ticket_from_record(event.row)
+        if cached := self.ticket_caches.get(ticket.db_id):
+            ticket.participants = cached.participants
+        self.ticket_caches.add(ticket)
+        self.non_ticket_channels.discard(ticket.channel_id)
+
+    def _on_participant_change(self, event: CacheChangeEvent) -> None:
+        if event.operation == "UPDATE":
+            old = event.old_row
+            assert old
+            self.ticket_caches.remove_participants(
+                old["ticket_id"], [old["participant_id"]]
+            )
+        if event.operation == "DELETE":
+            self.ticket_caches.remove_participants(
+                event.row["ticket_id"], [event.row["participant_id"]]
+            )
+        else:
+            self.ticket_caches.add_participants(
+                event.row["ticket_id"], [event.row["participant_id"]]
+            )
+
+    def _on_panel_change(self, event: CacheChangeEvent) -> None:
+        if event.old_row:
+            self.panel_messages.pop(event.old_row["guild_id"], None)
+        if event.operation == "DELETE":
+            self.panel_messages.pop(event.row["guild_id"], None)
+            return
+        self.panel_messages[event.row["guild_id"]] = PanelMessageData(
+            message_id=event.row["message_id"],
+            channel_id=event.row["channel_id"],
+            guild_id=event.row["guild_id"],
+        )
 
     async def is_ticket_channel(self, channel_id: int) -> bool:
         return True if await self.get_ticket(channel_id=channel_id) else False
@@ -160,12 +271,13 @@ class TicketManager:
                 "This function must be called with exactly one keyword argument."
             )
 
-        if ticket_id and (ticket := self.ticket_caches.get(ticket_id, None)):
+        if ticket_id and (ticket := self.ticket_caches.get(ticket_id)):
             return ticket
         if channel_id:
-            for ticket in self.ticket_caches.values():
-                if ticket.channel_id == channel_id:
-                    return ticket
+            if ticket := self.ticket_caches.get_by_channel(channel_id):
+                return ticket
+            if channel_id in self.non_ticket_channels:
+                return None
         # No cache hit. Select from database.
         ticket_data = await self.database_manager.select(
             table_name="tickets",
@@ -173,21 +285,18 @@ class TicketManager:
             fetch_one=True,
         )
         if not ticket_data:
+            if channel_id:
+                self.non_ticket_channels.add(channel_id)
             return None
-        ticket = Ticket(
-            db_id=ticket_data["id"],
-            channel_id=ticket_data["channel_id"],
-            auto_timeout=ticket_data["auto_timeout"],
-            timed_out=ticket_data["timed_out"],
-            close_msg_id=ticket_data["close_msg_id"],
-            status=TicketStatus.from_id(ticket_data["status"]),
-            ticket_type=TicketType(ticket_data["ticket_type"]),
-            guild_id=ticket_data["guild_id"],
-            close_msg_type=ticket_data["close_msg_type"],
-        )
+        ticket = self._ticket_from_record(ticket_data)
         # Cache on read
-        self.ticket_caches[ticket.db_id] = ticket
-        return ticket
+        return self.ticket_caches.add(ticket)
+
+    def forget_channel(self, channel_id: int) -> None:
+        """
+        Drops any negative-lookup entry for the channel, so the next lookup hits the index or the database.
+        """
+        self.non_ticket_channels.discard(channel_id)
 
     async def get_ticket_participants_id(self, ticket_id: int) -> Set[int]:
         if ticket := self.ticket_caches.get(ticket_id):
@@ -195,6 +304,7 @@ class TicketManager:
         participants = await self.database_manager.select(
             table_name=self.ticket_participants_table_name,
             criteria={"ticket_id": ticket_id},
+            columns=("participant_id",),
         )
         if not participants:
             return set()
@@ -202,11 +312,23 @@ class TicketManager:
         participants_set = {p["participant_id"] for p in participants}
         return participants_set
 
-    async def archive_ticket(self, channel_id: int) -> tuple[bytes, str]:
+    async def _export_transcript(self, channel: TextChannel) -> tuple[bytes, str]:
+        if transcript_exporter_backend == "cli" and self.cli_exporter:
+            return await self.cli_exporter.export(channel=channel)
+        try:
+            return await self.native_exporter.export(channel=channel)
+        except TranscriptExportFailed as e:
+            if not self.cli_exporter or not self.cli_exporter.is_available():
+                raise
+            self.logger.warning(f"{e}. Falling back to DiscordChatExporter.Cli.")
+            return await self.cli_exporter.export(channel=channel)
+
+    async def submit_archive_job(self, channel_id: int) -> ArchiveJob:
         """
-        Archive the ticket with the given ticket_id.
-        This function will return a bytes object which can be loaded with discord.File and the name of the exported file.
-        Raises: ChannelNotTicket if ticket is not found, ChannelNotFound if the channelid cannot be found in the guild.
+        Queues an export of the ticket channel and returns the job handle.
+        If the channel is already being exported, the existing job is returned.
+        Raises: ChannelNotTicket if ticket is not found, ChannelNotFound if the channelid cannot be found in the guild,
+        ArchiveQueueFull if too many exports are waiting.
         """
         ticket = await self.get_ticket(channel_id=channel_id)
         if not ticket:
@@ -217,19 +339,24 @@ class TicketManager:
                 f"Channel with ID {ticket.channel_id} not found in the guild."
             )
         assert isinstance(channel, TextChannel)
-        transcript_bytes: bytes
-        with tempfile.TemporaryDirectory() as temp_dir:
-            exporter_sync = functools.partial(
-                self._run_archive_exporter_sync, channel_id, temp_dir
-            )
-            transcript_path_str = await self.bot.loop.run_in_executor(
-                None, exporter_sync
-            )
-            transcript_path = pathlib.Path(transcript_path_str)
-            transcript_bytes = transcript_path.read_bytes()
-            filename = transcript_path.name
+        return self.archive_queue.submit(channel)
+
+    async def archive_ticket(self, channel_id: int) -> tuple[bytes, str]:
+        """
+        Archive the ticket with the given ticket_id.
+        This function will return a bytes object which can be loaded with discord.File and the name of the exported file.
+        Raises: ChannelNotTicket if ticket is not found, ChannelNotFound if the channelid cannot be found in the guild,
+        ArchiveQueueFull if too many exports are waiting, TranscriptExportFailed if the export failed.
+        """
+        job = await self.submit_archive_job(channel_id=channel_id)
+        # The job may be shared with other callers, so cancelling this caller must not cancel the export.
+        return await asyncio.shield(job.future)
 
-        return transcript_bytes, filename
+    def archive_queue_stats(self) -> ArchiveQueueStats:
+        return self.archive_queue.stats()
+
+    async def close(self):
+        await self.archive_queue.close()
 
     async def get_ticket_participants_member(
         self, ticket_id: int
@@ -292,7 +419,7 @@ class TicketManager:
                 data={"ticket_id": ticket.db_id, "participant_id": participant_id},
                 returning_col="ticket_id",
             )
-            self.ticket_caches[ticket.db_id].participants.add(participant_id)
+            self.ticket_caches.add_participants(ticket.db_id, [participant_id])
         except Exception as e:
             self.logger.error(
                 f"Error occured when adding user with id {participant_id} into database. {e}"
@@ -389,9 +516,7 @@ class TicketManager:
             table_name=self.ticket_participants_table_name,
             data=data,
         )
-        self.ticket_caches[ticket.db_id].participants = self.ticket_caches[
-            ticket.db_id
-        ].participants.union(member_to_add_to_db)
+        self.ticket_caches.add_participants(ticket.db_id, member_to_add_to_db)
         return member_to_add_to_db
 
     async def remove_ticket_participants(
@@ -435,16 +560,13 @@ class TicketManager:
                 "participant_id": member_to_remove_from_db,
             },
         )
-        self.ticket_caches[ticket.db_id].participants.difference_update(
-            member_to_remove_from_db
-        )
+        self.ticket_caches.remove_participants(ticket.db_id, member_to_remove_from_db)
         return member_to_remove_from_db
 
     async def get_close_msg_id(self, channel_id: int) -> Union[int, None]:
         """Get the close message ID for a given channel ID."""
-        for ticket in self.ticket_caches.values():
-            if ticket.channel_id == channel_id:
-                return ticket.close_msg_id
+        if ticket := self.ticket_caches.get_by_channel(channel_id):
+            return ticket.close_msg_id
         result = await self.database_manager.select(
             table_name=self.ticket_table_name,
             criteria={"channel_id": channel_id},
@@ -452,21 +574,11 @@ class TicketManager:
         )
         try:
             assert result, "No ticket found for the given channel ID."
-            assert isinstance(result, dict)
-            self.ticket_caches[result["id"]] = Ticket(
-                db_id=result["id"],
-                channel_id=channel_id,
-                auto_timeout=result["auto_timeout"],
-                timed_out=result["timed_out"],
-                close_msg_id=result["close_msg_id"],
-                status=result["status"],
-                ticket_type=result["ticket_type"],
-                guild_id=result["guild_id"],
-                close_msg_type=result["close_msg_id"],
-                participants=await self.get_ticket_participants_id(
-                    ticket_id=result["id"]
-                ),
+            ticket = self._ticket_from_record(result)
+            ticket.participants = await self.get_ticket_participants_id(
+                ticket_id=ticket.db_id
             )
+            self.ticket_caches.add(ticket)
             return result["close_msg_id"]
         except (AssertionError, KeyError):
             self.logger.error(
@@ -483,7 +595,7 @@ class TicketManager:
         assert ticket
         ticket.close_msg_id = close_msg_id
         ticket.close_msg_type = close_msg_type
-        self.ticket_caches[ticket.db_id] = ticket
+        self.ticket_caches.add(ticket)
         await self.database_manager.update(
             table_name=self.ticket_table_name,
             data={"close_msg_id": close_msg_id, "close_msg_type": close_msg_type},
@@ -514,120 +626,101 @@ class TicketManager:
         new_channel = await guild.create_text_channel(
             name=f"{ticket_type}-temp", overwrites=overwrites
         )
+        self.non_ticket_channels.discard(new_channel.id)
         # set next channel name
         msg = await new_channel.send(
             content=f"{user.mention}Hi，有什麼需要服務的嗎~留下訊息後請等待{cus_service_role.mention}回應😊",
             embed=self.get_business_hours_embed(),
             view=close_view,
         )
-        new_ticket_id = await self.database_manager.insert(
-            table_name=self.ticket_table_name,
-            data={
-                "channel_id": new_channel.id,
-                "auto_timeout": 48,
-                "timed_out": 0,
-                "close_msg_id": msg.id,
-                "status": TicketStatus.OPEN.id,
-                "ticket_type": TicketType(ticket_type),
-                "guild_id": guild.id,
-                "close_msg_type": CloseMessageType.CLOSE_TOGGLE,
-            },
-            returning_col="id",
-        )
-        self.ticket_caches[new_ticket_id] = Ticket(
-            db_id=new_ticket_id,
-            channel_id=new_channel.id,
-            auto_timeout=48,
-            timed_out=0,
-            close_msg_id=msg.id,
-            status=TicketStatus.OPEN,
-            ticket_type=TicketType(ticket_type),
-            guild_id=guild.id,
-            close_msg_type=CloseMessageType.CLOSE_TOGGLE,
+        async with self.database_manager.transaction() as tx:
+            new_ticket_id = await tx.insert(
+                table_name=self.ticket_table_name,
+                data={
+                    "channel_id": new_channel.id,
+                    "auto_timeout": 48,
+                    "timed_out": 0,
+                    "close_msg_id": msg.id,
+                    "status": TicketStatus.OPEN.id,
+                    "ticket_type": TicketType(ticket_type),
+                    "guild_id": guild.id,
+                    "close_msg_type": CloseMessageType.CLOSE_TOGGLE,
+                },
+                returning_col="id",
+            )
+            await tx.insert(
+                table_name=self.ticket_participants_table_name,
+                data={"ticket_id": new_ticket_id, "participant_id": user.id},
+                returning_col="ticket_id",
+            )
+        self.ticket_caches.add(
+            Ticket(
+                db_id=new_ticket_id,
+                channel_id=new_channel.id,
+                auto_timeout=48,
+                timed_out=0,
+                close_msg_id=msg.id,
+                status=TicketStatus.OPEN,
+                ticket_type=TicketType(ticket_type),
+                guild_id=guild.id,
+                close_msg_type=CloseMessageType.CLOSE_TOGGLE,
+                participants={user.id},
+            )
         )
         # We just set it manually since creating a Ticket object here is meaningless.
         await new_channel.edit(
             name=f"{ticket_type}-{new_ticket_id:04d}-{TicketStatus.OPEN.string_repr}"
         )
-        await self.database_manager.insert(
-            table_name=self.ticket_participants_table_name,
-            data={"ticket_id": new_ticket_id, "participant_id": user.id},
-            returning_col="ticket_id",
-        )
-        self.ticket_caches[new_ticket_id].participants.add(user.id)
 
         return new_channel
 
-    def _run_archive_exporter_sync(self, channel_id: int, temp_dir: str) -> str:
-        """
-        A synchronous, blocking function that runs the chat exporter.
-        This is designed to be run in an executor.
-        It returns the path to the exported file.
-        """
-        output_path = pathlib.Path(temp_dir)
-        command = [
-            "vendor/DiscordChatExporterCLI/DiscordChatExporter.Cli",
-            "export",
-            "--channel",
-            str(channel_id),
-            "--token",
-            exporter_bot_token,
-            "--output",
-            str(output_path),
-        ]
-        # This is the blocking call
-        subprocess.run(command, capture_output=True, text=True, check=True)
-
-        exported_files = list(output_path.glob("*.html"))
-        if not exported_files:
-            raise FileNotFoundError(
-                "Chat export completed, but no HTML file was found."
-            )
-
-        # Return the full path to the transcript
-        return str(exported_files[0])
-
     async def close_ticket(self, channel: TextChannel, client: Client):
         ticket = await self.get_ticket(channel_id=channel.id)
         if not ticket:
             raise TicketNotFound
-        await self.set_ticket_status(ticket=ticket, new_status=TicketStatus.CLOSED)
-
-        async def _sync_update_and_select():
-            self.ticket_caches[ticket.db_id].status = TicketStatus.CLOSED
-            await self.database_manager.update(
-                table_name=self.ticket_table_name,
-                data={"status": TicketStatus.CLOSED.id},
-                criteria={"id": ticket.db_id},
+        status_changed = ticket.status != TicketStatus.CLOSED
+        # Close the ticket and read its participants on one connection.
+        async with self.database_manager.transaction() as tx:
+            if status_changed:
+                await tx.update(
+                    table_name=self.ticket_table_name,
+                    data={"status": TicketStatus.CLOSED.id},
+                    criteria={"id": ticket.db_id},
+                )
+            participants = await tx.select(
+                table_name=self.ticket_participants_table_name,
+                criteria={"ticket_id": ticket.db_id},
+                columns=("participant_id",),
             )
-            # We can also fetch the participants in the same transaction
-            return await self.get_ticket_participants_id(ticket_id=ticket.db_id)
-
-        participants_id = await _sync_update_and_select()
-        customers_mention = customer_name = ""
-        customers: List[Union[User, Member]] = []
+        participants_id = {p["participant_id"] for p in participants}
+        if status_changed:
+            self.ticket_caches.set_status(ticket, TicketStatus.CLOSED)
+            await self._rename_after_status_change(ticket=ticket)
         assert participants_id and isinstance(participants_id, set)
-        cus_num = 0
+        # Queue the export once the ticket is closed, so nothing raised before it leaves the job unawaited,
+        # and it still runs while the permissions are being revoked.
+        # A full queue leaves the ticket closed, its transcript can still be exported with the archive command.
+        try:
+            archive_job = await self.submit_archive_job(channel_id=channel.id)
+        except ArchiveQueueFull as e:
+            self.logger.error(f"Error archiving channel {channel.id}: {e}")
+            await channel.send(content="錯誤：歸檔佇列已滿，請稍後再試。")
+            raise Exception("錯誤：歸檔佇列已滿，請稍後再試。")
+        customers: List[Member] = []
         for part_id in participants_id:
             member = channel.guild.get_member(part_id)
             if member:
-                await channel.set_permissions(target=member, read_messages=False)
-                customers_mention += member.mention + ", "
-                customer_name += member.name + ", "
                 customers.append(member)
-                cus_num += 1
             else:
                 self.logger.warning(
                     f"Could not find member with ID {part_id} in guild with id {ticket.guild_id}."
                 )
-            # Generate the channel history archive
-        customers_mention = customers_mention.rstrip(", ")
-        customer_name = customer_name.rstrip(", ")
+        await self._revoke_customers_permissions(channel=channel, customers=customers)
+        customers_mention = ", ".join(customer.mention for customer in customers)
+        customer_name = ", ".join(customer.name for customer in customers)
         try:
             transcript_bytes: bytes
-            transcript_bytes, filename = await self.archive_ticket(
-                channel_id=channel.id
-            )
+            transcript_bytes, filename = await asyncio.shield(archive_job.future)
 
             archive_channel = await self._try_get_channel_by_bot(
                 channel_id=archive_channel_id
@@ -642,73 +735,116 @@ class TicketManager:
                 filename=f"{filename}",
             )
 
-            UTC_to_GMT = timedelta(hours=8)
             new = channel.created_at + UTC_to_GMT
             created_time_str = new.strftime("%Y/%m/%d %H:%M:%S")
             closed_time_str = datetime.now().strftime("%Y/%m/%d %H:%M:%S")
 
             archive_embed = discord.Embed(
                 title=f"頻道 「{channel.name}」紀錄",
-                description=f"顧客：{customers_mention}\n{customer_name}\n此頻道開啟於{created_time_str}\n顧客數量{cus_num}\n關閉於{closed_time_str}",
+                description=f"顧客：{customers_mention}\n{customer_name}\n此頻道開啟於{created_time_str}\n顧客數量{len(customers)}\n關閉於{closed_time_str}",
                 color=THEME_COLOR,
             )
 
-            new = await archive_channel.send(embed=archive_embed, file=transcript_file)
-
             feedback_embed = feedbackEmbed(channel=channel, client=client)
             assert feedback_embed.description
             feedback_embed.description += "\n說明：點選星數來代表今天服務的滿意度"
-            for customer in customers:
-                if customer:
-                    try:
-                        view = FeedBackSystem(
-                            user_id=customer.id,
-                            ticket_id=ticket.db_id,
-                            guild_id=ticket.guild_id,
-                            feedback_manager=self.feedback_manager,
-                        )
-                        customer_transcript_file = discord.File(
-                            io.BytesIO(transcript_bytes), filename=filename
-                        )
-                        msg = await customer.send(
-                            content="此為對話記錄檔案以及回饋按鈕：",
-                            embeds=[archive_embed, feedback_embed],
-                            file=customer_transcript_file,
-                            view=view,
-                        )
-                        view.message = msg
-                        await self.feedback_manager.insert_feedback_prompt(
-                            user_id=customer.id,
-                            ticket_id=ticket.db_id,
-                            guild_id=ticket.guild_id,
-                            message_id=msg.id,
-                            channel_id=msg.channel.id,
-                            message_type=FeedbackPromptMessageType.RATING,
-                        )
-                    except discord.errors.Forbidden:
-                        self.logger.error(
-                            f"User {customer.name} does not allow private messages, skipping..."
-                        )
-                    except Exception as e:
-                        self.logger.error(e)
-        except subprocess.CalledProcessError as e:
-            # This block will run if the exporter command fails
+            # The archive post and the customer DMs don't depend on each other.
+            await asyncio.gather(
+                archive_channel.send(embed=archive_embed, file=transcript_file),
+                self._send_feedback_prompts(
+                    ticket=ticket,
+                    customers=customers,
+                    embeds=[archive_embed, feedback_embed],
+                    transcript_bytes=transcript_bytes,
+                    filename=filename,
+                ),
+            )
+        except TranscriptExportFailed as e:
+            # This block will run if every exporter backend failed
             self.logger.error(f"Error exporting channel {channel.id}: {e}")
             await channel.send(content="錯誤：生成頻道紀錄時發生問題，請檢查後台日誌。")
             raise Exception("錯誤：生成頻道紀錄時發生問題，請檢查後台日誌。")
-        except FileNotFoundError:
-            # This block will run if the DiscordChatExporter.Cli executable is not found
-            self.logger.error("DiscordChatExporter.Cli not found.")
-            await channel.send(content="錯誤：找不到匯出工具。")
-            raise FileNotFoundError("Error: DiscordChatExporter.Cli not found.")
+
+    async def _revoke_customers_permissions(
+        self, channel: TextChannel, customers: List[Member]
+    ):
+        results = await asyncio.gather(
+            *(
+                channel.set_permissions(target=customer, read_messages=False)
+                for customer in customers
+            ),
+            return_exceptions=True,
+        )
+        for customer, result in zip(customers, results):
+            if isinstance(result, Exception):
+                self.logger.error(
+                    f"Failed to revoke the permissions of {customer.name} in channel {channel.id}: {result}"
+                )
+
+    async def _send_feedback_prompts(
+        self,
+        ticket: Ticket,
+        customers: List[Member],
+        embeds: List[Embed],
+        transcript_bytes: bytes,
+        filename: str,
+    ):
+        """
+        DMs the transcript and the rating buttons to every customer, at most close_dm_concurrency at a time,
+        then records every sent prompt with a single batched insert.
+        """
+        semaphore = asyncio.Semaphore(close_dm_concurrency)
+        # A discord.File is consumed by the request that sends it, so every DM needs its own.
+
+        async def send_prompt(customer: Member) -> Optional[FeedbackPrompt]:
+            view = FeedBackSystem(
+                user_id=customer.id,
+                ticket_id=ticket.db_id,
+                guild_id=ticket.guild_id,
+                feedback_manager=self.feedback_manager,
+            )
+            try:
+                async with semaphore:
+                    msg = await customer.send(
+                        content="此為對話記錄檔案以及回饋按鈕：",
+                        embeds=embeds,
+                        file=discord.File(io.BytesIO(transcript_bytes), filename=filename),
+                        view=view,
+                    )
+            except discord.errors.Forbidden:
+                self.logger.error(
+                    f"User {customer.name} does not allow private messages, skipping..."
+                )
+                return None
+            except Exception as e:
+                self.logger.error(e)
+                return None
+            view.message = msg
+            return FeedbackPrompt(
+                user_id=customer.id,
+                guild_id=ticket.guild_id,
+                ticket_id=ticket.db_id,
+                message_id=msg.id,
+                channel_id=msg.channel.id,
+                message_type=FeedbackPromptMessageType.RATING,
+            )
+
+        prompts = await asyncio.gather(*(send_prompt(c) for c in customers))
+        try:
+            await self.feedback_manager.insert_feedback_prompts(
+                prompts=[prompt for prompt in prompts if prompt]
+            )
+        except Exception as e:
+            self.logger.error(
+                f"Failed to save the feedback prompts of ticket {ticket.db_id}: {e}"
+            )
 
     async def delete_ticket(self, channel: TextChannel):
         ticket = await self.get_ticket(channel_id=channel.id)
         if not ticket:
             raise ChannelNotTicket
         # Delete the ticket from the cache
-        if ticket.db_id in self.ticket_caches.keys():
-            del self.ticket_caches[ticket.db_id]
+        self.ticket_caches.remove(ticket.db_id)
         await self.database_manager.delete(
             table_name=self.ticket_table_name, criteria={"id": ticket.db_id}
         )
@@ -748,13 +884,15 @@ class TicketManager:
         """
         if ticket.status == new_status:
             return
-        ticket.status = new_status
+        self.ticket_caches.set_status(ticket, new_status)
         await self.database_manager.update(
             table_name=self.ticket_table_name,
             data={"status": new_status.id},
             criteria={"id": ticket.db_id},
         )
-        self.ticket_caches[ticket.db_id] = ticket
+        await self._rename_after_status_change(ticket=ticket)
+
+    async def _rename_after_status_change(self, ticket: Ticket) -> None:
         try:
             await self.set_ticket_channel_name(ticket=ticket)
         except TicketNotFound as e:
@@ -762,7 +900,7 @@ class TicketManager:
                 f"{e}. The channel with the ticket's channel_id was not found in the guild."
             )
             # We delete the record in the cache since the ticket should likely have been deleted
-            self.ticket_caches.pop(ticket.db_id)
+            self.ticket_caches.remove(ticket.db_id)
             raise e
 
     async def set_ticket_channel_name(
@@ -793,11 +931,13 @@ class TicketManager:
             )
         assert isinstance(ticket_channel, TextChannel)
         status_name = ticket.status.string_repr
+        new_name = f"{ticket.ticket_type.value}-{ticket.db_id:04d}-{status_name if status_name else '未知'}"
+        if ticket_channel.name == new_name:
+            # Channel renames are heavily rate limited, don't waste one on a no-op.
+            return
         try:
             # Just to be really safe.
-            await ticket_channel.edit(
-                name=f"{ticket.ticket_type.value}-{ticket.db_id:04d}-{status_name if status_name else '未知'}"
-            )
+            await ticket_channel.edit(name=new_name)
         except (discord.errors.HTTPException, discord.errors.NotFound):
             raise TicketNotFound(
                 f"Ticket channel with ID {ticket.channel_id} not found in the guild with ID {ticket.guild_id}."
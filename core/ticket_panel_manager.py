@@ -5,6 +5,8 @@ from discord import Client, Guild, TextChannel
 from discord.ext.commands import Bot
 from discord.message import Message, PartialMessage
 from db.database_manager import AsyncDatabaseManager
+from db.cache_invalidation import CacheInvalidationListener
+from db.models import CacheChangeEvent
 from config.models import PanelMessageData
 from utils.discord_utils import (
     try_get_message,
@@ -30,6 +32,47 @@ class TicketPanelManager:
         self.ticket_panels_table_name = "ticket_panels"
         self.ticket_panels: Dict[int, PanelMessageData] = dict()
 
+    def register_cache_listener(self, listener: CacheInvalidationListener) -> None:
+        """
+        Applies the panel changes made by other processes to the cache.
+        """
+        listener.register(self.ticket_panels_table_name, self._on_panel_change)
+        listener.register_resync(self.resync_cache)
+
+    async def init_cache(self):
+        """
+        Loads every panel from the database, without fetching the panel messages.
+        The panel buttons are handled by the persistent TicketCreationView.
+        This function should be called when the bot starts.
+        """
+        panels = await self.database_manager.select(
+            table_name=self.ticket_panels_table_name
+        )
+        self.ticket_panels.clear()
+        for panel in panels:
+            self.ticket_panels[panel["guild_id"]] = PanelMessageData(
+                guild_id=panel["guild_id"],
+                channel_id=panel["channel_id"],
+                message_id=panel["message_id"],
+            )
+
+    async def resync_cache(self):
+        # Notifications were missed, a lagging replica may not have those changes either.
+        with self.database_manager.read_from_primary():
+            await self.init_cache()
+
+    def _on_panel_change(self, event: CacheChangeEvent) -> None:
+        if event.old_row:
+            self.ticket_panels.pop(event.old_row["guild_id"], None)
+        if event.operation == "DELETE":
+            self.ticket_panels.pop(event.row["guild_id"], None)
+            return
+        self.ticket_panels[event.row["guild_id"]] = PanelMessageData(
+            guild_id=event.row["guild_id"],
+            channel_id=event.row["channel_id"],
+            message_id=event.row["message_id"],
+        )
+
     async def _try_get_guild(self, guild_id: int) -> Guild | None:
         return await try_get_guild(bot=self.bot, guild_id=guild_id)
 
@@ -104,8 +147,9 @@ class TicketPanelManager:
 
     async def load_ticket_panel_messages(self) -> List[Message]:
         """
-        Load all ticket panels from the database and store them in the ticket_panels dictionary.
-        (Initializes the cache.)
+        Load all ticket panels from the database and store them in the ticket_panels dictionary,
+        deleting the panels whose guild or channel no longer exists.
+        This fetches every panel, it is run through the restore_tickets command.
         """
         all_panels = await self.database_manager.select(
             table_name=self.ticket_panels_table_name
@@ -0,0 +1,187 @@
+import asyncio
+import html
+import io
+import pathlib
+import tempfile
+from datetime import timedelta
+from typing import BinaryIO, Optional
+import discord
+from discord import Message, TextChannel
+from core.exceptions import TranscriptExportFailed
+
+UTC_to_GMT = timedelta(hours=8)
+
+_HTML_HEAD = """<!DOCTYPE html>
+<html lang="zh-Hant">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+body {{ background: #313338; color: #dbdee1; font-family: "Noto Sans TC", sans-serif; margin: 0; }}
+header {{ padding: 16px; border-bottom: 1px solid #1e1f22; }}
+header h1 {{ margin: 0; font-size: 20px; }}
+header p {{ margin: 4px 0 0; color: #949ba4; font-size: 13px; }}
+.message {{ display: flex; padding: 6px 16px; }}
+.message:hover {{ background: #2e3035; }}
+.avatar {{ width: 40px; height: 40px; border-radius: 50%; margin-right: 12px; flex-shrink: 0; }}
+.author {{ font-weight: 600; color: #f2f3f5; }}
+.bot-tag {{ background: #5865f2; color: #fff; font-size: 10px; padding: 1px 4px; border-radius: 3px; margin-left: 4px; }}
+.timestamp {{ color: #949ba4; font-size: 12px; margin-left: 6px; }}
+.content {{ white-space: pre-wrap; word-wrap: break-word; }}
+.attachment img {{ max-width: 400px; max-height: 300px; border-radius: 4px; margin-top: 4px; }}
+.embed {{ border-left: 4px solid #202225; background: #2b2d31; padding: 8px 12px; margin-top: 4px; border-radius: 4px; max-width: 520px; }}
+.embed-title {{ font-weight: 600; color: #f2f3f5; }}
+.embed-field-name {{ font-weight: 600; margin-top: 4px; }}
+footer {{ padding: 16px; color: #949ba4; font-size: 13px; border-top: 1px solid #1e1f22; }}
+</style>
+</head>
+<body>
+<header><h1>{title}</h1><p>{subtitle}</p></header>
+<main>
+"""
+
+_HTML_TAIL = """</main>
+<footer>Exported {count} message(s)</footer>
+</body>
+</html>
+"""
+
+
+def _format_time(message: Message) -> str:
+    return (message.created_at + UTC_to_GMT).strftime("%Y/%m/%d %H:%M:%S")
+
+
+def _render_embed(embed: discord.Embed) -> str:
+    color = f"#{embed.color.value:06x}" if embed.color else "#202225"
+    parts = [f'<div class="embed" style="border-left-color: {color}">']
+    if embed.title:
+        parts.append(f'<div class="embed-title">{html.escape(embed.title)}</div>')
+    if embed.description:
+        parts.append(f'<div class="content">{html.escape(embed.description)}</div>')
+    for field in embed.fields:
+        parts.append(
+            f'<div class="embed-field-name">{html.escape(str(field.name))}</div>'
+            f'<div class="content">{html.escape(str(field.value))}</div>'
+        )
+    parts.append("</div>")
+    return "".join(parts)
+
+
+def _render_message(message: Message) -> str:
+    author = message.author
+    parts = [
+        '<div class="message">',
+        f'<img class="avatar" src="{html.escape(author.display_avatar.url)}" alt="">',
+        "<div>",
+        f'<span class="author" title="{html.escape(author.name)}">{html.escape(author.display_name)}</span>',
+    ]
+    if author.bot:
+        parts.append('<span class="bot-tag">BOT</span>')
+    parts.append(f'<span class="timestamp">{_format_time(message)}</span>')
+    if message.content:
+        parts.append(f'<div class="content">{html.escape(message.clean_content)}</div>')
+    for attachment in message.attachments:
+        url = html.escape(attachment.url)
+        if attachment.content_type and attachment.content_type.startswith("image/"):
+            parts.append(
+                f'<div class="attachment"><a href="{url}"><img src="{url}" alt="{html.escape(attachment.filename)}"></a></div>'
+            )
+        else:
+            parts.append(
+                f'<div class="attachment"><a href="{url}">{html.escape(attachment.filename)}</a></div>'
+            )
+    for embed in message.embeds:
+        parts.append(_render_embed(embed))
+    parts.append("</div></div>\n")
+    return "".join(parts)
+
+
+class NativeTranscriptExporter:
+    """
+    Exports a channel to a HTML transcript using the bot's own HTTP client.
+    The history is paged through oldest first and every message is rendered and
+    written as soon as it arrives, so the whole channel never has to be held in memory.
+    """
+
+    def __init__(self, history_limit: Optional[int] = None):
+        self.history_limit = history_limit
+
+    @staticmethod
+    def transcript_filename(channel: TextChannel) -> str:
+        return f"{channel.guild.name} - {channel.name} [{channel.id}].html"
+
+    async def export_to(self, channel: TextChannel, fp: BinaryIO) -> int:
+        """
+        Streams the transcript of the channel into fp.
+        Returns the number of exported messages.
+        """
+        title = html.escape(f"{channel.guild.name} - #{channel.name}")
+        subtitle = html.escape(f"Channel ID {channel.id}")
+        fp.write(_HTML_HEAD.format(title=title, subtitle=subtitle).encode("utf-8"))
+        count = 0
+        try:
+            async for message in channel.history(
+                limit=self.history_limit, oldest_first=True
+            ):
+                fp.write(_render_message(message).encode("utf-8"))
+                count += 1
+        except discord.errors.HTTPException as e:
+            raise TranscriptExportFailed(
+                f"Failed to read the history of channel {channel.id}: {e}"
+            )
+        fp.write(_HTML_TAIL.format(count=count).encode("utf-8"))
+        return count
+
+    async def export(self, channel: TextChannel) -> tuple[bytes, str]:
+        buffer = io.BytesIO()
+        await self.export_to(channel=channel, fp=buffer)
+        return buffer.getvalue(), self.transcript_filename(channel)
+
+
+class CliTranscriptExporter:
+    """
+    Exports a channel with the vendored DiscordChatExporter CLI.
+    The process is awaited asynchronously, so no thread is held while it runs.
+    """
+
+    def __init__(
+        self,
+        token: str,
+        executable: str = "vendor/DiscordChatExporterCLI/DiscordChatExporter.Cli",
+    ):
+        self.token = token
+        self.executable = executable
+
+    def is_available(self) -> bool:
+        return pathlib.Path(self.executable).is_file()
+
+    async def export(self, channel: TextChannel) -> tuple[bytes, str]:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            output_path = pathlib.Path(temp_dir)
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    self.executable,
+                    "export",
+                    "--channel",
+                    str(channel.id),
+                    "--token",
+                    self.token,
+                    "--output",
+                    str(output_path),
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                )
+            except FileNotFoundError:
+                raise TranscriptExportFailed("DiscordChatExporter.Cli not found.")
+            _, stderr = await process.communicate()
+            if process.returncode != 0:
+                raise TranscriptExportFailed(
+                    f"DiscordChatExporter.Cli exited with code {process.returncode}: {stderr.decode(errors='replace')}"
+                )
+            exported_files = list(output_path.glob("*.html"))
+            if not exported_files:
+                raise TranscriptExportFailed(
+                    "Chat export completed, but no HTML file was found."
+                )
+            transcript_path = exported_files[0]
+            return transcript_path.read_bytes(), transcript_path.name
@@ -0,0 +1,138 @@
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from typing import Awaitable, Callable, Dict, List, Optional, Union
+import asyncpg
+from db.models import CacheChangeEvent
+
+CACHE_CHANGES_CHANNEL = "dragonbot_cache_changes"
+
+CacheChangeHandler = Callable[[CacheChangeEvent], Union[Awaitable[None], None]]
+ResyncHandler = Callable[[], Awaitable[None]]
+
+
+class CacheInvalidationListener:
+    """
+    Keeps the in-process caches of every bot process coherent.
+
+    Every write to a cached table fires a trigger (see db/migrations.py) that NOTIFYs the
+    changed row on CACHE_CHANGES_CHANNEL, whether it came from a bot process or from an
+    out-of-band edit. This listener LISTENs on a dedicated connection (outside of the pool,
+    since pooled connections UNLISTEN on release) and hands every event to the handlers
+    registered for its table, in the order the events were committed.
+
+    Events whose origin is this process are skipped, the managers have already applied them.
+    If the connection drops, notifications sent meanwhile are lost, so after reconnecting
+    the resync handlers are called to reload the caches.
+    """
+
+    def __init__(
+        self,
+        db_url: str,
+        origin: str,
+        logger: logging.Logger,
+        reconnect_delay: float = 5,
+    ):
+        self._db_url = db_url
+        self.origin = origin
+        self.logger = logger
+        self.reconnect_delay = reconnect_delay
+        self._handlers: Dict[str, List[CacheChangeHandler]] = defaultdict(list)
+        self._resync_handlers: List[ResyncHandler] = []
+        self._connection: Optional[asyncpg.Connection] = None
+        self._events: asyncio.Queue[CacheChangeEvent] = asyncio.Queue()
+        self._consumer: Optional[asyncio.Task] = None
+        self._reconnect: Optional[asyncio.Task] = None
+        self._closing = False
+
+    def register(self, table_name: str, handler: CacheChangeHandler):
+        self._handlers[table_name].append(handler)
+
+    def register_resync(self, handler: ResyncHandler):
+        self._resync_handlers.append(handler)
+
+    async def listen(self):
+        """
+        LISTENs without applying the events yet, they are queued until start() is called.
+        Call it before loading the caches, so the changes committed meanwhile are not lost.
+        """
+        self._closing = False
+        if not self._connection or self._connection.is_closed():
+            await self._listen()
+
+    async def start(self):
+        await self.listen()
+        if not self._consumer:
+            self._consumer = asyncio.create_task(
+                self._consume(), name="cache-invalidation"
+            )
+
+    async def close(self):
+        self._closing = True
+        for task in (self._consumer, self._reconnect):
+            if task:
+                task.cancel()
+        if self._connection and not self._connection.is_closed():
+            await self._connection.close()
+        self._connection = None
+        self._consumer = None
+        self._reconnect = None
+
+    async def _listen(self):
+        self._connection = await asyncpg.connect(self._db_url)
+        self._connection.add_termination_listener(self._on_terminated)
+        await self._connection.add_listener(CACHE_CHANGES_CHANNEL, self._on_notify)
+        self.logger.debug(f"Listening for cache changes as {self.origin}.")
+
+    def _on_notify(self, connection, pid: int, channel: str, payload: str):
+        try:
+            data = json.loads(payload)
+            event = CacheChangeEvent(
+                table=data["table"],
+                operation=data["op"],
+                row=data["row"],
+                old_row=data.get("old"),
+                origin=data.get("origin"),
+            )
+        except (ValueError, KeyError) as e:
+            self.logger.error(f"Malformed cache change notification {payload!r}: {e}")
+            return
+        if event.origin == self.origin:
+            return
+        self._events.put_nowait(event)
+
+    def _on_terminated(self, connection):
+        if self._closing:
+            return
+        self.logger.warning("Cache invalidation connection lost, reconnecting...")
+        self._reconnect = asyncio.create_task(self._reconnect_loop())
+
+    async def _reconnect_loop(self):
+        while not self._closing:
+            await asyncio.sleep(self.reconnect_delay)
+            try:
+                await self._listen()
+            except (OSError, asyncpg.PostgresError) as e:
+                self.logger.warning(f"Reconnecting the cache listener failed: {e}")
+                continue
+            self.logger.info("Cache invalidation connection restored, resyncing caches.")
+            for handler in self._resync_handlers:
+                try:
+                    await handler()
+                except Exception as e:
+                    self.logger.error(f"Cache resync failed: {e}")
+            return
+
+    async def _consume(self):
+        while True:
+            event = await self._events.get()
+            for handler in self._handlers.get(event.table, ()):
+                try:
+                    result = handler(event)
+                    if asyncio.iscoroutine(result):
+                        await result
+                except Exception as e:
+                    self.logger.error(
+                        f"Failed to apply {event.operation} on {event.table} to the cache: {e}"
+                    )
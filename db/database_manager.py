@@ -1,213 +1,310 @@
-from asyncio import subprocess
-from typing import Any, Dict, Union, List
-import psycopg2
-from psycopg2.extras import RealDictCursor, RealDictRow
+import asyncio
+import itertools
+import os
+import struct
+import threading
+import uuid
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from decimal import Decimal
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Coroutine,
+    Dict,
+    Iterator,
+    Sequence,
+    TypeVar,
+    Union,
+    List,
+)
 import asyncpg
-import shutil
-
-
-class DatabaseManager:
-    """
-    A simple database manager for PostgreSQL using psycopg2.
-    Since discord.py is built on top of asyncio, it is not recommended to use this if you want the maximum performance.
-    """
+import time
+from db.metrics import PoolMetrics
+from db.models import LatencySummary, PoolStats, StatementCacheStats
+from db.statement_cache import StatementCache
+
+T = TypeVar("T")
+
+# Set while a transaction is open in the current task, so its reads go to the primary.
+_pinned_to_primary: ContextVar[bool] = ContextVar("pinned_to_primary", default=False)
+
+
+# numeric is exchanged in the binary format, COPY (see insert_many) has no text fallback.
+# The wire format is a header of (ndigits, weight, sign, dscale) followed by ndigits
+# base-10000 digits, the first of which is worth 10000 ** weight.
+_NUMERIC_HEADER = struct.Struct("!hhHH")
+_NUMERIC_POS = 0x0000
+_NUMERIC_NEG = 0x4000
+_NUMERIC_NAN = 0xC000
+_NUMERIC_PINF = 0xD000
+_NUMERIC_NINF = 0xF000
+
+
+def _decode_numeric(data: bytes) -> Union[int, Decimal]:
+    # Discord IDs are stored as numeric(30), decode them straight to int.
+    # Non-integral values (e.g. AVG results) stay Decimal.
+    ndigits, weight, sign, dscale = _NUMERIC_HEADER.unpack_from(data)
+    if sign == _NUMERIC_NAN:
+        return Decimal("NaN")
+    if sign in (_NUMERIC_PINF, _NUMERIC_NINF):
+        return Decimal("-Infinity" if sign == _NUMERIC_NINF else "Infinity")
+    value = 0
+    for digit in struct.unpack_from(f"!{ndigits}H", data, _NUMERIC_HEADER.size):
+        value = value * 10000 + digit
+    # The decimal exponent of the last digit.
+    exponent = 4 * (weight - ndigits + 1)
+    if dscale == 0:
+        if exponent > 0:
+            value *= 10**exponent
+        elif exponent < 0:
+            value //= 10**-exponent
+        return -value if sign == _NUMERIC_NEG else value
+    digits = str(value)
+    if exponent > -dscale:
+        digits += "0" * (exponent + dscale)
+    elif exponent < -dscale:
+        digits = digits[: exponent + dscale] or "0"
+    return Decimal((sign == _NUMERIC_NEG, tuple(map(int, digits)), -dscale))
+
+
+def _encode_numeric(value: Union[int, float, Decimal, str]) -> bytes:
+    if isinstance(value, int):
+        sign, digits, exponent = value < 0, str(abs(value)), 0
+    else:
+        number = Decimal(repr(value) if isinstance(value, float) else value)
+        if number.is_nan():
+            return _NUMERIC_HEADER.pack(0, 0, _NUMERIC_NAN, 0)
+        if number.is_infinite():
+            return _NUMERIC_HEADER.pack(
+                0, 0, _NUMERIC_NINF if number.is_signed() else _NUMERIC_PINF, 0
+            )
+        sign_bit, digit_tuple, exponent = number.as_tuple()
+        sign, digits = bool(sign_bit), "".join(map(str, digit_tuple))
+        assert isinstance(exponent, int)
+    dscale = max(-exponent, 0)
+    if exponent > 0:
+        digits += "0" * exponent
+    # Pad the fraction on the right and the integer part on the left to whole base-10000 digits.
+    digits += "0" * (-dscale % 4)
+    fraction_groups = (dscale + 3) // 4
+    digits = "0" * (-len(digits) % 4) + digits
+    groups = [int(digits[i : i + 4]) for i in range(0, len(digits), 4)]
+    weight = len(groups) - fraction_groups - 1
+    while groups and groups[0] == 0:
+        groups.pop(0)
+        weight -= 1
+    while groups and groups[-1] == 0:
+        groups.pop()
+    if not groups:
+        sign, weight = False, 0
+    return _NUMERIC_HEADER.pack(
+        len(groups), weight, _NUMERIC_NEG if sign else _NUMERIC_POS, dscale
+    ) + struct.pack(f"!{len(groups)}H", *groups)
+
+
+async def _init_connection(connection: asyncpg.Connection):
+    await connection.set_type_codec(
+        "numeric",
+        encoder=_encode_numeric,
+        decoder=_decode_numeric,
+        schema="pg_catalog",
+        format="binary",
+    )
 
-    def __init__(self, database_url: str):
-        if not database_url:
-            raise ValueError("Database URL cannot be empty.")
-        self.database_url: str = database_url
 
-        self.cursor = None
-        self.conn = None
+class AsyncDatabaseManager:
+    def __init__(
+        self,
+        db_url: str,
+        min_size: int = 2,
+        max_size: int = 10,
+        statement_cache_size: int = 100,
+        command_timeout: float | None = 30,
+        copy_threshold: int = 1000,
+        application_name: str | None = None,
+        replica_urls: Sequence[str] = (),
+    ):
+        self._db_url = db_url
+        self._pool: asyncpg.Pool | None = None
+        self._replica_urls = list(replica_urls)
+        self._replica_pools: List[asyncpg.Pool] = []
+        self._next_replica: Iterator[asyncpg.Pool] = iter(())
+        # Set as the application_name of every pooled connection. The cache change triggers
+        # report it as the origin of a write, so a process can skip its own notifications.
+        self.application_name = (
+            application_name or f"dragonbot-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        )
+        self._statements = StatementCache()
+        self.min_size = min_size
+        self.max_size = max_size
+        self.statement_cache_size = statement_cache_size
+        self.command_timeout = command_timeout
+        self.copy_threshold = copy_threshold
+        self._staging_tables = 0
+        self.metrics = PoolMetrics()
+
+    def _create_pool(self, url: str) -> Awaitable[asyncpg.Pool]:
+        return asyncpg.create_pool(
+            url,
+            min_size=self.min_size,
+            max_size=self.max_size,
+            statement_cache_size=self.statement_cache_size,
+            command_timeout=self.command_timeout,
+            init=_init_connection,
+            server_settings={"application_name": self.application_name},
+        )
 
-    def __enter__(self):
+    async def connect(self):
+        """Creates the connection pools. Call this once on bot startup."""
+        if not self._pool:
+            self._pool = await self._create_pool(self._db_url)
+            print("Successfully created async database connection pool.")
+        if self._replica_urls and not self._replica_pools:
+            # A replica that cannot be reached is left out, its reads go to the others or the primary.
+            for i, url in enumerate(self._replica_urls):
+                try:
+                    self._replica_pools.append(await self._create_pool(url))
+                except (OSError, asyncpg.PostgresError) as e:
+                    print(f"Could not connect to read replica #{i}: {e}")
+            self._next_replica = itertools.cycle(self._replica_pools)
+            print(f"Routing reads to {len(self._replica_pools)} read replica(s).")
+
+    def _read_pool(self) -> asyncpg.Pool | None:
+        if not self._replica_pools or _pinned_to_primary.get():
+            return self._pool
+        return next(self._next_replica)
+
+    @asynccontextmanager
+    async def acquire(
+        self, table_name: str = "", operation: str = "query", readonly: bool = False
+    ) -> AsyncIterator[asyncpg.Connection]:
         """
-        Establishes the database connection.
+        Acquires a connection, recording the time spent waiting for it
+        and the time it was held under (table_name, operation).
+        readonly connections come from a read replica when replicas are configured,
+        unless a transaction is open in the current task. Only run reads on them.
         """
+        if not self._pool:
+            raise RuntimeError(
+                "Database pool is not initialized. Call connect() first."
+            )
+        pool = self._read_pool() if readonly else self._pool
+        assert pool
+        start = time.perf_counter()
         try:
-            self.conn = psycopg2.connect(self.database_url)
-            self.cursor = self.conn.cursor(cursor_factory=RealDictCursor)
-            return self
-        except psycopg2.Error as e:
-            print(f"Database connection error: {e}")
-            raise
-
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        """
-        Closes the cursor and the connection.
-        """
+            connection = await pool.acquire()
+        except (OSError, asyncpg.PostgresConnectionError):
+            if pool is self._pool:
+                raise
+            # The replica went away, serve the read from the primary.
+            pool = self._pool
+            connection = await pool.acquire()
+        acquired = time.perf_counter()
+        self.metrics.connection_acquired(wait=acquired - start)
         try:
-            assert self.conn is not None and self.cursor is not None
-            if exc_type is not None:
-                print(f"Exception {exc_val}. Rolling back...")
-                self.conn.rollback()
-            else:
-                self.conn.commit()
-            if self.cursor:
-                self.cursor.close()
-            if self.conn:
-                self.conn.close()
-        except AssertionError:
-            print("Database connection or cursor was not initialized correctly.")
-            return True
+            yield connection
         finally:
-            return False
-
-    def _build_where_clause(self, criteria: Dict[str, Any]) -> tuple[str, tuple]:
-        """
-        Builds a WHERE clause and a tuple of values from a criteria dict.
-        Handles both single values (=) and lists (IN).
-        """
-        if not criteria:
-            return "", ()
-
-        conditions = []
-        values: list[Any] = []
-        for key, value in criteria.items():
-            if isinstance(value, (list, tuple)):
-                if not value:
-                    # Handle empty list case to prevent SQL errors.
-                    # This condition will always be false, correctly returning no rows.
-                    conditions.append("1 = 0")
-                    continue
-                conditions.append(f'"{key}" IN %s')
-                values.append(
-                    tuple(value)
-                )  # psycopg2 expects a tuple for the IN clause
-            else:
-                conditions.append(f'"{key}" = %s')
-                values.append(value)
-
-        where_clause = "WHERE " + " AND ".join(conditions)
-        return where_clause, tuple(values)
-
-    def create_table(self, table_name: str, columns: List[tuple] = []):
-        assert self.cursor is not None
-        if not columns:
-            raise ValueError("Columns must be provided to create a table.")
-        column_definitions = ", ".join([f'"{name}" {ctype}' for name, ctype in columns])
-        sql = f"CREATE TABLE IF NOT EXISTS {table_name} ({column_definitions})"
-        self.cursor.execute(sql)
-        print(f"Table '{table_name}' created or already exists.")
-
-    def select(
-        self, table_name: str, criteria: Dict[str, Any] = dict(), fetch_one=False
-    ) -> Union[List[RealDictRow], Dict[str, Any], None]:
-        assert self.cursor is not None
-        where_clause, values = self._build_where_clause(criteria)
-        sql = f"SELECT * FROM {table_name} {where_clause}"
-        self.cursor.execute(sql, values)
-        if fetch_one:
-            return self.cursor.fetchone()
-        else:
-            return self.cursor.fetchall()
-
-    def insert(self, table_name: str, data: Dict[str, Any], returning_col="id") -> Any:
-        """
-        Inserts a new record into a table.
+            self.metrics.connection_released(
+                table_name=table_name,
+                operation=operation,
+                elapsed=time.perf_counter() - acquired,
+            )
+            await pool.release(connection)
+
+    @asynccontextmanager
+    async def _use(
+        self,
+        table_name: str,
+        operation: str,
+        connection: asyncpg.Connection | None = None,
+        readonly: bool = False,
+    ) -> AsyncIterator[asyncpg.Connection]:
+        if connection is None:
+            async with self.acquire(table_name, operation, readonly) as connection:
+                yield connection
+            return
+        start = time.perf_counter()
+        try:
+            yield connection
+        finally:
+            self.metrics.record_query(
+                table_name=table_name,
+                operation=operation,
+                elapsed=time.perf_counter() - start,
+            )
 
-        Args:
-            table_name (str): The name of the table.
-            data (dict): A dictionary where keys are column names and
-                         values are the data to insert.
-        Returns:
-            The value of the specified returning column.
-        Raises:
-            AssertionError: If the cursor is not initialized.
-            ValueError: If data is not provided.
+    async def gather_queries(
+        self, *queries: Awaitable[Any], max_concurrency: int | None = None
+    ) -> List[Any]:
         """
-        if not data:
-            raise ValueError("Data must be provided for insert operation.")
-        assert self.cursor is not None
-
-        columns = ", ".join([f'"{k}"' for k in data.keys()])
-        placeholders = ", ".join(["%s"] * len(data))
-        sql = f'INSERT INTO "{table_name}" ({columns}) VALUES ({placeholders}) RETURNING "{returning_col}"'
-        self.cursor.execute(sql, tuple(data.values()))
-        result = self.cursor.fetchone()
-        if result:
-            return result[returning_col]
-        return None
-
-    def insert_many(self, table_name: str, data: List[Dict[str, Any]]):
+        Runs independent queries concurrently, each on its own pooled connection,
+        and returns their results in the order they were given.
+        At most max_concurrency queries (half of the pool by default) run at once,
+        so a large batch can't starve the other callers of connections.
+
+        Usage:
+            keywords, channels = await db.gather_queries(
+                db.select("keywords"), db.select("keyword_channel")
+            )
         """
-        Inserts multiple rows into a table in a single transaction.
+        semaphore = asyncio.Semaphore(max_concurrency or max(1, self.max_size // 2))
 
-        Args:
-            table_name (str): The table name to insert data.
-            data (List[Dict[str, Any]]): The data list to insert.
-        """
-        if not data:
-            return
-
-        columns = data[0].keys()
-        columns_sql = ", ".join(columns)
-        placeholders_sql = ", ".join(["%s"] * len(columns))
-
-        values_to_insert = [tuple(row[col] for col in columns) for row in data]
+        async def run(query: Awaitable[Any]) -> Any:
+            async with semaphore:
+                return await query
 
-        query = f"INSERT INTO {table_name} ({columns_sql}) VALUES ({placeholders_sql})"
+        return list(await asyncio.gather(*(run(query) for query in queries)))
 
-        try:
-            assert self.cursor
-            self.cursor.executemany(query, values_to_insert)
-        except Exception as e:
-            print(f"Error during bulk insert: {e}")
-            raise
-
-    def update(self, table_name: str, data, criteria: Dict[str, Any] = dict()) -> int:
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator["Transaction"]:
         """
-        Updates records from a table where the criteria match.
+        Runs a group of statements on a single connection inside a database transaction.
+        The transaction is committed when the block exits and rolled back if it raises.
 
-        Args:
-            table_name (str): The name of the table.
-            criteria (dict): (Must be an non-empty dict) The WHERE clause to select records to delete.
-        Returns:
-            Rows affected (int)
+        Usage:
+            async with db.transaction() as tx:
+                ticket_id = await tx.insert(...)
+                await tx.insert_many(...)
         """
-        if not criteria:
-            raise ValueError("Criteria must be provided for update operation.")
-        assert self.cursor is not None
+        with self.read_from_primary():
+            async with self.acquire("", "transaction") as connection:
+                async with connection.transaction():
+                    yield Transaction(manager=self, connection=connection)
 
-        set_clause = ", ".join([f'"{key}" = %s' for key in data.keys()])
-        where_clause, where_values = self._build_where_clause(criteria=criteria)
-        sql = f"UPDATE {table_name} SET {set_clause} {where_clause}"
-        values = tuple(data.values()) + tuple(where_values)
-        self.cursor.execute(sql, values)
-        return self.cursor.rowcount
-
-    def delete(self, table_name: str, criteria: Dict[str, Any] = dict()):
+    @contextmanager
+    def read_from_primary(self) -> Iterator[None]:
         """
-        Deletes records from a table where the criteria match.
-
-        Args:
-            table_name (str): The name of the table.
-            criteria (dict): (Must be an non-empty dict) The WHERE clause to select records to delete.
-        Returns:
-            Rows affected (int)
+        Routes the reads of the current task to the primary for the duration of the block,
+        for reads that must see a write that was just made (or is about to be made).
         """
-        if not criteria:
-            raise ValueError("Criteria must be provided for delete operation.")
-        assert self.cursor is not None
-        where_clause, values = self._build_where_clause(criteria=criteria)
-        sql = f"DELETE FROM {table_name} {where_clause}"
-        self.cursor.execute(sql, values)
-        return self.cursor.rowcount
-
-
-class AsyncDatabaseManager:
-    def __init__(self, db_url: str):
-        self._db_url = db_url
-        self._pool: asyncpg.Pool | None = None
+        token = _pinned_to_primary.set(True)
+        try:
+            yield
+        finally:
+            _pinned_to_primary.reset(token)
+
+    def pool_stats(self) -> PoolStats:
+        return PoolStats(
+            size=self._pool.get_size() if self._pool else 0,
+            idle=self._pool.get_idle_size() if self._pool else 0,
+            in_use=self.metrics.in_use,
+            peak_in_use=self.metrics.peak_in_use,
+            max_size=self.max_size,
+            acquire_wait=self.metrics.acquire_wait.summary(),
+            replicas=len(self._replica_pools),
+        )
 
-    async def connect(self):
-        """Creates the connection pool. Call this once on bot startup."""
-        if not self._pool:
-            self._pool = await asyncpg.create_pool(self._db_url)
-            print("Successfully created async database connection pool.")
+    def query_latencies(self) -> Dict[tuple[str, str], LatencySummary]:
+        return self.metrics.query_latencies()
 
     async def close(self):
-        """Closes the connection pool. Call this on bot shutdown."""
+        """Closes the connection pools. Call this on bot shutdown."""
+        for replica_pool in self._replica_pools:
+            await replica_pool.close()
+        self._replica_pools = []
         if self._pool:
             await self._pool.close()
 
@@ -235,23 +332,187 @@ class AsyncDatabaseManager:
         where_clause = "WHERE " + " AND ".join(conditions)
         return where_clause, values
 
+    @staticmethod
+    def _criteria_shape(criteria: Dict[str, Any]) -> tuple[tuple, Dict[str, Any]]:
+        """
+        Sorts the criteria by column, so that the same column set always produces the same SQL,
+        and returns its shape (column names and whether they are matched against a list).
+        """
+        sorted_criteria = {key: criteria[key] for key in sorted(criteria)}
+        shape = tuple(
+            (key, isinstance(value, (list, tuple)))
+            for key, value in sorted_criteria.items()
+        )
+        return shape, sorted_criteria
+
+    @staticmethod
+    def _where_values(criteria: Dict[str, Any]) -> list[Any]:
+        return [
+            list(value) if isinstance(value, (list, tuple)) else value
+            for value in criteria.values()
+        ]
+
+    def statement_cache_stats(self) -> StatementCacheStats:
+        return self._statements.stats()
+
+    async def create_table(self, table_name: str, columns: List[tuple] = []):
+        if not columns:
+            raise ValueError("Columns must be provided to create a table.")
+        column_definitions = ", ".join([f'"{name}" {ctype}' for name, ctype in columns])
+        async with self.acquire(table_name, "create_table") as connection:
+            await connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {table_name} ({column_definitions})"
+            )
+        print(f"Table '{table_name}' created or already exists.")
+
+    def _build_select(
+        self,
+        table_name: str,
+        criteria: Dict[str, Any],
+        columns: Sequence[str] | None,
+        order_by: Sequence[str] | str | None,
+        descending: bool,
+        limit: int | None,
+        offset: int | None,
+        after: Sequence[Any] | None,
+    ) -> tuple[str, list[Any]]:
+        """
+        Builds (or fetches from the statement cache) a SELECT and its parameters.
+        limit, offset and the keyset values are passed as parameters, so every page of
+        the same query shares one statement.
+        """
+        shape, criteria = self._criteria_shape(criteria)
+        projection = tuple(columns) if columns else None
+        order = (order_by,) if isinstance(order_by, str) else tuple(order_by or ())
+        if after is not None and len(after) != len(order):
+            raise ValueError("Keyset pagination needs one `after` value per order_by column.")
+
+        def build() -> str:
+            where_clause, _ = self._build_where_clause(criteria)
+            index = len(criteria) + 1
+            if after is not None:
+                keyset_columns = ", ".join(f'"{col}"' for col in order)
+                keyset_placeholders = ", ".join(
+                    f"${i}" for i in range(index, index + len(order))
+                )
+                keyset = f"({keyset_columns}) {'<' if descending else '>'} ({keyset_placeholders})"
+                where_clause = (
+                    f"{where_clause} AND {keyset}" if where_clause else f"WHERE {keyset}"
+                )
+                index += len(order)
+            projection_sql = (
+                ", ".join(f'"{col}"' for col in projection) if projection else "*"
+            )
+            parts = [f"SELECT {projection_sql} FROM {table_name}", where_clause]
+            if order:
+                direction = "DESC" if descending else "ASC"
+                parts.append(
+                    "ORDER BY " + ", ".join(f'"{col}" {direction}' for col in order)
+                )
+            if limit is not None:
+                parts.append(f"LIMIT ${index}")
+                index += 1
+            if offset is not None:
+                parts.append(f"OFFSET ${index}")
+            return " ".join(part for part in parts if part)
+
+        query = self._statements.get(
+            (
+                "select",
+                table_name,
+                shape,
+                projection,
+                order,
+                descending,
+                limit is not None,
+                offset is not None,
+                after is not None,
+            ),
+            build,
+        )
+        params = self._where_values(criteria)
+        if after is not None:
+            params.extend(after)
+        if limit is not None:
+            params.append(limit)
+        if offset is not None:
+            params.append(offset)
+        return query, params
+
     async def select(
-        self, table_name: str, criteria: Dict[str, Any] = dict(), fetch_one=False
+        self,
+        table_name: str,
+        criteria: Dict[str, Any] = dict(),
+        fetch_one=False,
+        connection: asyncpg.Connection | None = None,
+        columns: Sequence[str] | None = None,
+        order_by: Sequence[str] | str | None = None,
+        descending: bool = False,
+        limit: int | None = None,
+        offset: int | None = None,
+        after: Sequence[Any] | None = None,
     ):
-        if not self._pool:
-            raise RuntimeError(
-                "Database pool is not initialized. Call connect() first."
-            )
-        where_clause, params = self._build_where_clause(criteria)
-        query = f"SELECT * FROM {table_name} {where_clause}"
+        """
+        Selects records from a table.
 
-        async with self._pool.acquire() as connection:
+        Args:
+            table_name (str): The name of the table.
+            criteria (dict): The WHERE clause, list values are matched with = ANY.
+            fetch_one (bool): Return only the first record (or None).
+            connection: Run on this connection instead of acquiring one (see transaction()).
+            columns: The columns to return, all of them if None.
+            order_by: The column(s) to sort by.
+            descending (bool): Sort (and page) in descending order.
+            limit / offset: Return at most `limit` records, skipping the first `offset`.
+            after: Keyset pagination, only return the records that sort after these
+                   order_by values (e.g. the order_by values of the last record of the previous page).
+        """
+        query, params = self._build_select(
+            table_name, criteria, columns, order_by, descending, limit, offset, after
+        )
+        async with self._use(
+            table_name, "select", connection, readonly=True
+        ) as connection:
             if fetch_one:
                 return await connection.fetchrow(query, *params)
             return await connection.fetch(query, *params)
 
+    async def iterate(
+        self,
+        table_name: str,
+        criteria: Dict[str, Any] = dict(),
+        columns: Sequence[str] | None = None,
+        order_by: Sequence[str] | str | None = None,
+        descending: bool = False,
+        prefetch: int = 500,
+    ) -> AsyncIterator[asyncpg.Record]:
+        """
+        Streams the records of a table through a server-side cursor, `prefetch` records at a time,
+        so walking a whole table uses constant memory.
+        The connection is held until the iteration finishes, so consume it fully (or break out of
+        the `async for`) instead of keeping it around.
+
+        Usage:
+            async for record in db.iterate("tickets", columns=["id"]):
+                ...
+        """
+        query, params = self._build_select(
+            table_name, criteria, columns, order_by, descending, None, None, None
+        )
+        async with self.acquire(table_name, "iterate", readonly=True) as connection:
+            # Cursors only live inside a transaction.
+            async with connection.transaction():
+                async for record in connection.cursor(
+                    query, *params, prefetch=prefetch
+                ):
+                    yield record
+
     async def insert(
-        self, table_name: str, data: Dict[str, Any], returning_col: str
+        self,
+        table_name: str,
+        data: Dict[str, Any],
+        returning_col: str,
+        connection: asyncpg.Connection | None = None,
     ) -> Any:
         """
         Inserts a new record into a table.
@@ -260,6 +521,7 @@ class AsyncDatabaseManager:
             table_name (str): The name of the table.
             data (dict): A dictionary where keys are column names and
                          values are the data to insert.
+            connection: Run on this connection instead of acquiring one (see transaction()).
         Returns:
             The value of the specified returning column.
         Raises:
@@ -268,51 +530,119 @@ class AsyncDatabaseManager:
         """
         if not data:
             raise ValueError("Data must be provided for insert operation.")
-        if not self._pool:
-            raise RuntimeError(
-                "Database pool is not initialized. Call connect() first."
-            )
-        columns = ", ".join([f'"{k}"' for k in data.keys()])
-        placeholders = ", ".join([f"${i}" for i in range(1, len(data) + 1)])
-        sql = f'INSERT INTO "{table_name}" ({columns}) VALUES ({placeholders}) RETURNING "{returning_col}"'
-        async with self._pool.acquire() as connection:
+        data = {key: data[key] for key in sorted(data)}
+
+        def build() -> str:
+            columns = ", ".join([f'"{k}"' for k in data.keys()])
+            placeholders = ", ".join([f"${i}" for i in range(1, len(data) + 1)])
+            return f'INSERT INTO "{table_name}" ({columns}) VALUES ({placeholders}) RETURNING "{returning_col}"'
+
+        sql = self._statements.get(
+            ("insert", table_name, tuple(data), returning_col), build
+        )
+        async with self._use(table_name, "insert", connection) as connection:
             result = await connection.fetchrow(sql, *data.values())
             if result:
                 return result[returning_col]
             return None
 
-    async def insert_many(self, table_name: str, data: List[Dict[str, Any]]):
+    async def insert_many(
+        self,
+        table_name: str,
+        data: List[Dict[str, Any]],
+        connection: asyncpg.Connection | None = None,
+        on_conflict_do_nothing: bool = False,
+        use_copy: bool | None = None,
+    ):
         """
         Inserts multiple rows into a table in a single transaction.
+        Batches of at least copy_threshold rows are loaded with COPY instead of executemany.
 
         Args:
             table_name (str): The table name to insert data.
             data (List[Dict[str, Any]]): The data list to insert.
+            connection: Run on this connection instead of acquiring one (see transaction()).
+            on_conflict_do_nothing (bool): Skip the rows that violate a unique constraint.
+            use_copy (bool | None): Force (True) or disable (False) COPY. None picks it by the row count.
         """
         if not data:
             return
-        if not self._pool:
-            raise RuntimeError(
-                "Database pool is not initialized. Call connect() first."
-            )
-
-        columns = data[0].keys()
-        columns_sql = ", ".join(columns)
-        placeholders_sql = ", ".join([f"${i}" for i in range(1, len(columns) + 1)])
 
+        columns = tuple(sorted(data[0].keys()))
         values_to_insert = [tuple(row[col] for col in columns) for row in data]
-
-        query = f"INSERT INTO {table_name} ({columns_sql}) VALUES ({placeholders_sql})"
+        if use_copy is None:
+            use_copy = len(values_to_insert) >= self.copy_threshold
 
         try:
-            async with self._pool.acquire() as connection:
+            if use_copy:
+                async with self._use(table_name, "copy", connection) as connection:
+                    await self._copy_records(
+                        connection=connection,
+                        table_name=table_name,
+                        columns=columns,
+                        records=values_to_insert,
+                        on_conflict_do_nothing=on_conflict_do_nothing,
+                    )
+                return
+
+            def build() -> str:
+                columns_sql = ", ".join(columns)
+                placeholders_sql = ", ".join(
+                    [f"${i}" for i in range(1, len(columns) + 1)]
+                )
+                on_conflict = " ON CONFLICT DO NOTHING" if on_conflict_do_nothing else ""
+                return f"INSERT INTO {table_name} ({columns_sql}) VALUES ({placeholders_sql}){on_conflict}"
+
+            query = self._statements.get(
+                ("insert_many", table_name, columns, on_conflict_do_nothing), build
+            )
+            async with self._use(table_name, "insert_many", connection) as connection:
                 await connection.executemany(query, values_to_insert)
         except Exception as e:
             print(f"Error during bulk insert: {e}")
             raise
 
+    async def _copy_records(
+        self,
+        connection: asyncpg.Connection,
+        table_name: str,
+        columns: tuple[str, ...],
+        records: List[tuple],
+        on_conflict_do_nothing: bool,
+    ):
+        """
+        Loads the records with the COPY protocol.
+        COPY has no ON CONFLICT clause, so to skip duplicates the records are copied into a
+        temporary staging table first and moved over with INSERT ... SELECT ... ON CONFLICT DO NOTHING.
+        """
+        if not on_conflict_do_nothing:
+            await connection.copy_records_to_table(
+                table_name, records=records, columns=list(columns)
+            )
+            return
+        self._staging_tables += 1
+        staging_table = f"_staging_{table_name}_{self._staging_tables}"
+        columns_sql = ", ".join(f'"{col}"' for col in columns)
+        # The staging table only has the copied columns and no defaults, so serial columns are drawn once, by the INSERT.
+        # A savepoint if the connection is already in a transaction.
+        async with connection.transaction():
+            await connection.execute(
+                f'CREATE TEMPORARY TABLE "{staging_table}" ON COMMIT DROP AS SELECT {columns_sql} FROM {table_name} WITH NO DATA'
+            )
+            await connection.copy_records_to_table(
+                staging_table, records=records, columns=list(columns)
+            )
+            await connection.execute(
+                f'INSERT INTO {table_name} ({columns_sql}) SELECT {columns_sql} FROM "{staging_table}" ON CONFLICT DO NOTHING'
+            )
+            await connection.execute(f'DROP TABLE "{staging_table}"')
+
     async def update(
-        self, table_name: str, data, criteria: Dict[str, Any] = dict()
+        self,
+        table_name: str,
+        data,
+        criteria: Dict[str, Any] = dict(),
+        connection: asyncpg.Connection | None = None,
     ) -> int:
         """
         Updates records from a table where the criteria match.
@@ -320,49 +650,288 @@ class AsyncDatabaseManager:
         Args:
             table_name (str): The name of the table.
             criteria (dict): (Must be an non-empty dict) The WHERE clause to select records to delete.
+            connection: Run on this connection instead of acquiring one (see transaction()).
         Returns:
             Rows affected (int)
         """
         if not criteria:
             raise ValueError("Criteria must be provided for update operation.")
-        if not self._pool:
-            raise RuntimeError(
-                "Database pool is not initialized. Call connect() first."
-            )
 
-        # Build SET clause
-        set_clause = ", ".join(
-            [f'"{key}" = ${i + 1}' for i, key in enumerate(data.keys())]
-        )
+        data = {key: data[key] for key in sorted(data)}
+        shape, criteria = self._criteria_shape(criteria)
 
-        # Build WHERE clause, starting placeholder index after the SET values
-        where_clause, where_values = self._build_where_clause(
-            criteria, start_index=len(data) + 1
-        )
-        sql = f"UPDATE {table_name} SET {set_clause} {where_clause}"
-        all_values = tuple(data.values()) + tuple(where_values)
-        async with self._pool.acquire() as connection:
+        def build() -> str:
+            # Build SET clause
+            set_clause = ", ".join(
+                [f'"{key}" = ${i + 1}' for i, key in enumerate(data.keys())]
+            )
+            # Build WHERE clause, starting placeholder index after the SET values
+            where_clause, _ = self._build_where_clause(
+                criteria, start_index=len(data) + 1
+            )
+            return f"UPDATE {table_name} SET {set_clause} {where_clause}"
+
+        sql = self._statements.get(("update", table_name, tuple(data), shape), build)
+        all_values = tuple(data.values()) + tuple(self._where_values(criteria))
+        async with self._use(table_name, "update", connection) as connection:
             status = await connection.execute(sql, *all_values)
             return int(status.split()[-1])
 
-    async def delete(self, table_name: str, criteria: Dict[str, Any] = dict()):
+    async def delete(
+        self,
+        table_name: str,
+        criteria: Dict[str, Any] = dict(),
+        connection: asyncpg.Connection | None = None,
+    ):
         """
         Deletes records from a table where the criteria match.
 
         Args:
             table_name (str): The name of the table.
             criteria (dict): (Must be an non-empty dict) The WHERE clause to select records to delete.
+            connection: Run on this connection instead of acquiring one (see transaction()).
         Returns:
             Rows affected (int)
         """
         if not criteria:
             raise ValueError("Criteria must be provided for delete operation.")
-        if not self._pool:
-            raise RuntimeError(
-                "Database pool is not initialized. Call connect() first."
-            )
-        where_clause, values = self._build_where_clause(criteria=criteria)
-        sql = f"DELETE FROM {table_name} {where_clause}"
-        async with self._pool.acquire() as connection:
+        shape, criteria = self._criteria_shape(criteria)
+        sql = self._statements.get(
+            ("delete", table_name, shape),
+            lambda: f"DELETE FROM {table_name} {self._build_where_clause(criteria)[0]}",
+        )
+        values = self._where_values(criteria)
+        async with self._use(table_name, "delete", connection) as connection:
             status = await connection.execute(sql, *values)
             return int(status.split()[-1])
+
+
+class Transaction:
+    """
+    The handle yielded by AsyncDatabaseManager.transaction().
+    It has the same select/insert/insert_many/update/delete methods as the manager,
+    but every statement runs on the transaction's connection.
+    """
+
+    def __init__(self, manager: AsyncDatabaseManager, connection: asyncpg.Connection):
+        self._manager = manager
+        self.connection = connection
+
+    async def select(
+        self,
+        table_name: str,
+        criteria: Dict[str, Any] = dict(),
+        fetch_one=False,
+        columns: Sequence[str] | None = None,
+        order_by: Sequence[str] | str | None = None,
+        descending: bool = False,
+        limit: int | None = None,
+        offset: int | None = None,
+        after: Sequence[Any] | None = None,
+    ):
+        return await self._manager.select(
+            table_name,
+            criteria,
+            fetch_one,
+            connection=self.connection,
+            columns=columns,
+            order_by=order_by,
+            descending=descending,
+            limit=limit,
+            offset=offset,
+            after=after,
+        )
+
+    async def insert(
+        self, table_name: str, data: Dict[str, Any], returning_col: str
+    ) -> Any:
+        return await self._manager.insert(
+            table_name, data, returning_col, connection=self.connection
+        )
+
+    async def insert_many(
+        self,
+        table_name: str,
+        data: List[Dict[str, Any]],
+        on_conflict_do_nothing: bool = False,
+        use_copy: bool | None = None,
+    ):
+        return await self._manager.insert_many(
+            table_name,
+            data,
+            connection=self.connection,
+            on_conflict_do_nothing=on_conflict_do_nothing,
+            use_copy=use_copy,
+        )
+
+    async def update(
+        self, table_name: str, data, criteria: Dict[str, Any] = dict()
+    ) -> int:
+        return await self._manager.update(
+            table_name, data, criteria, connection=self.connection
+        )
+
+    async def delete(self, table_name: str, criteria: Dict[str, Any] = dict()) -> int:
+        return await self._manager.delete(
+            table_name, criteria, connection=self.connection
+        )
+
+
+class _RollbackTransaction(Exception):
+    """Raised inside DatabaseManager.transaction() to roll the async transaction back."""
+
+
+class SyncTransaction:
+    """
+    The handle yielded by DatabaseManager.transaction(), a blocking version of Transaction.
+    """
+
+    def __init__(self, manager: "DatabaseManager", transaction: Transaction):
+        self._manager = manager
+        self._transaction = transaction
+
+    def select(self, table_name: str, criteria: Dict[str, Any] = dict(), **kwargs):
+        return self._manager._run(
+            self._transaction.select(table_name, criteria, **kwargs)
+        )
+
+    def insert(self, table_name: str, data: Dict[str, Any], returning_col="id") -> Any:
+        return self._manager._run(
+            self._transaction.insert(table_name, data, returning_col)
+        )
+
+    def insert_many(self, table_name: str, data: List[Dict[str, Any]], **kwargs):
+        return self._manager._run(
+            self._transaction.insert_many(table_name, data, **kwargs)
+        )
+
+    def update(self, table_name: str, data, criteria: Dict[str, Any] = dict()) -> int:
+        return self._manager._run(
+            self._transaction.update(table_name, data, criteria)
+        )
+
+    def delete(self, table_name: str, criteria: Dict[str, Any] = dict()) -> int:
+        return self._manager._run(self._transaction.delete(table_name, criteria))
+
+
+class DatabaseManager:
+    """
+    A blocking facade over AsyncDatabaseManager, for scripts and migrations that are not async.
+
+    The async pool lives on a private event loop running in a daemon thread, every call is
+    submitted to that loop and waited on, so connections are reused across calls instead of
+    opening one per `with` block. Every statement commits on its own, use transaction() to
+    group statements.
+    Never use it from a coroutine, it blocks the calling loop. Use AsyncDatabaseManager instead.
+
+    Usage:
+        with DatabaseManager(database_url=url) as db:
+            db.select("tickets", {"guild_id": guild_id})
+    """
+
+    def __init__(self, database_url: str, min_size: int = 1, max_size: int = 4):
+        if not database_url:
+            raise ValueError("Database URL cannot be empty.")
+        self.database_url: str = database_url
+        self._async_manager = AsyncDatabaseManager(
+            db_url=database_url, min_size=min_size, max_size=max_size
+        )
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+
+    def __enter__(self):
+        self.connect()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+    def connect(self):
+        if self._loop:
+            return
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="DatabaseManagerLoop", daemon=True
+        )
+        self._thread.start()
+        self._run(self._async_manager.connect())
+
+    def close(self):
+        if not self._loop or not self._thread:
+            return
+        self._run(self._async_manager.close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+        self._thread = None
+
+    def _submit(self, coroutine: Coroutine[Any, Any, T]) -> "Future[T]":
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            coroutine.close()
+            raise RuntimeError(
+                "DatabaseManager blocks the event loop, use AsyncDatabaseManager in coroutines."
+            )
+        if not self._loop:
+            coroutine.close()
+            raise RuntimeError("Database is not connected. Call connect() first.")
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+
+    def _run(self, coroutine: Coroutine[Any, Any, T]) -> T:
+        return self._submit(coroutine).result()
+
+    @contextmanager
+    def transaction(self) -> Iterator[SyncTransaction]:
+        # The async transaction is entered and exited by one coroutine, so both happen in the
+        # same task (and contextvars Context). The statements of the block are submitted as
+        # separate calls and run on the transaction's connection.
+        entered: "Future[Transaction]" = Future()
+        # Set to whether the transaction should be rolled back when the block exits.
+        finished: "Future[bool]" = Future()
+
+        async def hold():
+            try:
+                async with self._async_manager.transaction() as transaction:
+                    entered.set_result(transaction)
+                    if await asyncio.wrap_future(finished):
+                        raise _RollbackTransaction()
+            except _RollbackTransaction:
+                pass
+
+        task = self._submit(hold())
+        wait((entered, task), return_when=FIRST_COMPLETED)
+        if not entered.done():
+            # Starting the transaction failed, raise its error.
+            task.result()
+        try:
+            yield SyncTransaction(manager=self, transaction=entered.result())
+        except BaseException:
+            finished.set_result(True)
+            task.result()
+            raise
+        else:
+            finished.set_result(False)
+            task.result()
+
+    def create_table(self, table_name: str, columns: List[tuple] = []):
+        self._run(self._async_manager.create_table(table_name, columns))
+
+    def select(self, table_name: str, criteria: Dict[str, Any] = dict(), **kwargs):
+        return self._run(self._async_manager.select(table_name, criteria, **kwargs))
+
+    def insert(self, table_name: str, data: Dict[str, Any], returning_col="id") -> Any:
+        return self._run(self._async_manager.insert(table_name, data, returning_col))
+
+    def insert_many(self, table_name: str, data: List[Dict[str, Any]], **kwargs):
+        return self._run(self._async_manager.insert_many(table_name, data, **kwargs))
+
+    def update(self, table_name: str, data, criteria: Dict[str, Any] = dict()) -> int:
+        return self._run(self._async_manager.update(table_name, data, criteria))
+
+    def delete(self, table_name: str, criteria: Dict[str, Any] = dict()) -> int:
+        return self._run(self._async_manager.delete(table_name, criteria))
@@ -0,0 +1,95 @@
+import bisect
+from collections import defaultdict
+from typing import Dict, List, Tuple
+from db.models import LatencySummary
+
+# Upper bounds of the histogram buckets, in milliseconds.
+LATENCY_BUCKETS_MS: Tuple[float, ...] = (
+    0.5,
+    1,
+    2,
+    5,
+    10,
+    25,
+    50,
+    100,
+    250,
+    500,
+    1000,
+    2500,
+    5000,
+    float("inf"),
+)
+
+
+class LatencyHistogram:
+    """
+    A fixed-bucket latency histogram. Recording is O(log buckets) and the memory use is
+    constant, so it can stay on for every query. Percentiles are reported as the upper
+    bound of the bucket they fall in.
+    """
+
+    def __init__(self, buckets_ms: Tuple[float, ...] = LATENCY_BUCKETS_MS):
+        self.buckets_ms = buckets_ms
+        self.counts: List[int] = [0] * len(buckets_ms)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, seconds: float):
+        ms = seconds * 1000
+        self.counts[bisect.bisect_left(self.buckets_ms, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets_ms, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def summary(self) -> LatencySummary:
+        return LatencySummary(
+            count=self.count,
+            average_ms=self.total_ms / self.count if self.count else 0.0,
+            max_ms=self.max_ms,
+            p50_ms=self.percentile(0.5),
+            p95_ms=self.percentile(0.95),
+            p99_ms=self.percentile(0.99),
+        )
+
+
+class PoolMetrics:
+    """
+    Counters for the AsyncDatabaseManager pool: how long callers wait for a connection,
+    how many connections are checked out, and how long each (table, operation) holds one.
+    """
+
+    def __init__(self):
+        self.acquire_wait = LatencyHistogram()
+        self.queries: Dict[Tuple[str, str], LatencyHistogram] = defaultdict(
+            LatencyHistogram
+        )
+        self.in_use = 0
+        self.peak_in_use = 0
+
+    def connection_acquired(self, wait: float):
+        self.acquire_wait.record(wait)
+        self.in_use += 1
+        self.peak_in_use = max(self.peak_in_use, self.in_use)
+
+    def connection_released(self, table_name: str, operation: str, elapsed: float):
+        self.in_use -= 1
+        self.record_query(table_name=table_name, operation=operation, elapsed=elapsed)
+
+    def record_query(self, table_name: str, operation: str, elapsed: float):
+        self.queries[(table_name, operation)].record(elapsed)
+
+    def query_latencies(self) -> Dict[Tuple[str, str], LatencySummary]:
+        return {key: hist.summary() for key, hist in self.queries.items()}
@@ -0,0 +1,332 @@
+import json
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Sequence, Tuple
+from db.cache_invalidation import CACHE_CHANGES_CHANNEL
+from db.database_manager import AsyncDatabaseManager
+
+MIGRATIONS_TABLE_NAME = "schema_migrations"
+# The tables mirrored in the managers' caches, their changes are NOTIFYed to every process.
+CACHED_TABLES = (
+    "tickets",
+    "ticket_participants",
+    "ticket_panels",
+    "keywords",
+    "keyword_channel",
+    "role_request",
+    "guild_requestable_roles",
+)
+# An arbitrary key for pg_advisory_lock, so two processes starting at once don't both migrate.
+MIGRATION_LOCK_KEY = 0x44524742
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    statements: Tuple[str, ...]
+
+
+# Append new migrations at the end, never edit one that has been released.
+# The tables are created with IF NOT EXISTS, so databases created by hand (see docs/DATABASE.md)
+# are adopted as they are.
+MIGRATIONS: Tuple[Migration, ...] = (
+    Migration(
+        version=1,
+        name="create tables",
+        statements=(
+            """
+            CREATE TABLE IF NOT EXISTS tickets (
+                id SERIAL PRIMARY KEY,
+                channel_id numeric(30) NOT NULL,
+                auto_timeout INT DEFAULT 48,
+                timed_out INT DEFAULT 0,
+                close_msg_id numeric(30) NOT NULL,
+                close_msg_type numeric(30) NOT NULL,
+                status INT,
+                guild_id numeric(30) NOT NULL,
+                ticket_type VARCHAR
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS ticket_participants (
+                ticket_id INT REFERENCES tickets(id) ON DELETE CASCADE,
+                participant_id numeric(30) NOT NULL
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS ticket_panels (
+                guild_id numeric(30) NOT NULL PRIMARY KEY,
+                channel_id numeric(30) NOT NULL,
+                message_id numeric(30) NOT NULL
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS keywords (
+                id SERIAL PRIMARY KEY,
+                trigger VARCHAR NOT NULL,
+                response VARCHAR,
+                guild_id numeric NOT NULL,
+                kw_type VARCHAR NOT NULL,
+                in_ticket_only BOOLEAN NOT NULL DEFAULT true,
+                mention_participants BOOLEAN NOT NULL DEFAULT true,
+                UNIQUE (trigger, guild_id)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS keyword_channel (
+                keyword_id BIGINT NOT NULL REFERENCES keywords(id) ON DELETE CASCADE,
+                channel_id numeric NOT NULL
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS role_request (
+                guild_id numeric(30) NOT NULL PRIMARY KEY,
+                request_channel_id numeric(30),
+                approval_channel_id numeric(30)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS guild_requestable_roles (
+                guild_id numeric(30) NOT NULL,
+                role_id numeric(30) NOT NULL,
+                PRIMARY KEY (guild_id, role_id)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS feedbacks (
+                ticket_id INT NOT NULL,
+                guild_id numeric(30) NOT NULL,
+                customer_id numeric(30) NOT NULL,
+                rating INT NOT NULL,
+                feedback_message VARCHAR,
+                created_at TIMESTAMPTZ DEFAULT now(),
+                PRIMARY KEY (ticket_id, customer_id)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS feedback_prompts (
+                user_id numeric(30) NOT NULL,
+                ticket_id INT NOT NULL,
+                guild_id numeric(30) NOT NULL,
+                message_id numeric(30) NOT NULL,
+                channel_id numeric(30) NOT NULL,
+                message_type INT NOT NULL,
+                PRIMARY KEY (user_id, ticket_id)
+            )
+            """,
+        ),
+    ),
+    Migration(
+        version=2,
+        name="index hot lookup columns",
+        statements=(
+            "CREATE INDEX IF NOT EXISTS idx_tickets_channel_id ON tickets (channel_id)",
+            "CREATE INDEX IF NOT EXISTS idx_ticket_participants_ticket_id ON ticket_participants (ticket_id)",
+            "CREATE INDEX IF NOT EXISTS idx_keywords_guild_id_trigger ON keywords (guild_id, trigger)",
+            "CREATE INDEX IF NOT EXISTS idx_keyword_channel_keyword_id ON keyword_channel (keyword_id)",
+            "CREATE INDEX IF NOT EXISTS idx_feedbacks_guild_id_customer_id ON feedbacks (guild_id, customer_id)",
+        ),
+    ),
+    Migration(
+        version=3,
+        name="notify cache changes",
+        statements=(
+            # The keyword response is dropped from the payload, NOTIFY payloads are capped at 8000 bytes.
+            f"""
+            CREATE OR REPLACE FUNCTION dragonbot_notify_cache_change() RETURNS trigger AS $$
+            BEGIN
+                PERFORM pg_notify(
+                    '{CACHE_CHANGES_CHANNEL}',
+                    json_build_object(
+                        'table', TG_TABLE_NAME,
+                        'op', TG_OP,
+                        'origin', current_setting('application_name', true),
+                        'row', CASE WHEN TG_OP = 'DELETE' THEN to_jsonb(OLD) ELSE to_jsonb(NEW) END - 'response',
+                        'old', CASE WHEN TG_OP = 'UPDATE' THEN to_jsonb(OLD) - 'response' END
+                    )::text
+                );
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+            """,
+            *(
+                statement
+                for table_name in CACHED_TABLES
+                for statement in (
+                    f"DROP TRIGGER IF EXISTS {table_name}_notify_cache_change ON {table_name}",
+                    f"""
+                    CREATE TRIGGER {table_name}_notify_cache_change
+                    AFTER INSERT OR UPDATE OR DELETE ON {table_name}
+                    FOR EACH ROW EXECUTE FUNCTION dragonbot_notify_cache_change()
+                    """,
+                )
+            ),
+        ),
+    ),
+    Migration(
+        version=4,
+        name="notify feedback changes",
+        statements=(
+            # Feedback messages can be long too, so they are dropped from the payload like the keyword responses.
+            f"""
+            CREATE OR REPLACE FUNCTION dragonbot_notify_cache_change() RETURNS trigger AS $$
+            BEGIN
+                PERFORM pg_notify(
+                    '{CACHE_CHANGES_CHANNEL}',
+                    json_build_object(
+                        'table', TG_TABLE_NAME,
+                        'op', TG_OP,
+                        'origin', current_setting('application_name', true),
+                        'row', CASE WHEN TG_OP = 'DELETE' THEN to_jsonb(OLD) ELSE to_jsonb(NEW) END - 'response' - 'feedback_message',
+                        'old', CASE WHEN TG_OP = 'UPDATE' THEN to_jsonb(OLD) - 'response' - 'feedback_message' END
+                    )::text
+                );
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+            """,
+            "DROP TRIGGER IF EXISTS feedbacks_notify_cache_change ON feedbacks",
+            """
+            CREATE TRIGGER feedbacks_notify_cache_change
+            AFTER INSERT OR UPDATE OR DELETE ON feedbacks
+            FOR EACH ROW EXECUTE FUNCTION dragonbot_notify_cache_change()
+            """,
+        ),
+    ),
+    Migration(
+        version=5,
+        name="feedback leaderboard view",
+        statements=(
+            """
+            CREATE MATERIALIZED VIEW IF NOT EXISTS feedback_leaderboard AS
+            SELECT
+                guild_id,
+                customer_id,
+                COUNT(*) AS feedback_count,
+                SUM(rating) AS rating_sum,
+                AVG(rating) AS average_rating,
+                RANK() OVER (
+                    PARTITION BY guild_id ORDER BY AVG(rating) DESC, COUNT(*) DESC
+                ) AS rank
+            FROM feedbacks
+            GROUP BY guild_id, customer_id
+            """,
+            # REFRESH ... CONCURRENTLY needs a unique index.
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_feedback_leaderboard_guild_id_customer_id ON feedback_leaderboard (guild_id, customer_id)",
+            "CREATE INDEX IF NOT EXISTS idx_feedback_leaderboard_guild_id_rank ON feedback_leaderboard (guild_id, rank)",
+        ),
+    ),
+)
+
+# (table, criteria) of the lookups the managers run on hot paths.
+# The criteria values only matter for their type, EXPLAIN never runs the query.
+HOT_LOOKUPS: Tuple[Tuple[str, Dict[str, Any]], ...] = (
+    ("tickets", {"channel_id": 0}),
+    ("ticket_participants", {"ticket_id": 0}),
+    ("keywords", {"guild_id": 0, "trigger": ""}),
+    ("keyword_channel", {"keyword_id": 0}),
+    ("feedbacks", {"guild_id": 0, "customer_id": 0}),
+)
+
+_INDEX_NODE_TYPES = {"Index Scan", "Index Only Scan", "Bitmap Index Scan"}
+
+
+def _plan_node_types(plan: Dict[str, Any]) -> List[str]:
+    node_types = [plan["Node Type"]]
+    for child in plan.get("Plans", []):
+        node_types += _plan_node_types(child)
+    return node_types
+
+
+class MigrationRunner:
+    """
+    Applies the pending MIGRATIONS in order, recording every applied version in
+    the schema_migrations table. Each migration runs in its own transaction.
+    """
+
+    def __init__(
+        self,
+        database_manager: AsyncDatabaseManager,
+        logger: logging.Logger,
+        migrations: Sequence[Migration] = MIGRATIONS,
+    ):
+        self.database_manager = database_manager
+        self.logger = logger
+        self.migrations = sorted(migrations, key=lambda m: m.version)
+
+    async def migrate(self) -> List[int]:
+        """
+        Applies every migration newer than the database. Returns the applied versions.
+        """
+        applied: List[int] = []
+        async with self.database_manager.acquire(
+            MIGRATIONS_TABLE_NAME, "migrate"
+        ) as connection:
+            await connection.execute("SELECT pg_advisory_lock($1)", MIGRATION_LOCK_KEY)
+            try:
+                await connection.execute(
+                    f"""
+                    CREATE TABLE IF NOT EXISTS {MIGRATIONS_TABLE_NAME} (
+                        version INT PRIMARY KEY,
+                        name VARCHAR NOT NULL,
+                        applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+                    )
+                    """
+                )
+                current = await connection.fetchval(
+                    f"SELECT COALESCE(MAX(version), 0) FROM {MIGRATIONS_TABLE_NAME}"
+                )
+                for migration in self.migrations:
+                    if migration.version <= current:
+                        continue
+                    self.logger.info(
+                        f"Applying migration {migration.version}: {migration.name}"
+                    )
+                    async with connection.transaction():
+                        for statement in migration.statements:
+                            await connection.execute(statement)
+                        await connection.execute(
+                            f"INSERT INTO {MIGRATIONS_TABLE_NAME} (version, name) VALUES ($1, $2)",
+                            migration.version,
+                            migration.name,
+                        )
+                    applied.append(migration.version)
+            finally:
+                await connection.execute(
+                    "SELECT pg_advisory_unlock($1)", MIGRATION_LOCK_KEY
+                )
+        if applied:
+            self.logger.info(f"Applied migrations {applied}.")
+        else:
+            self.logger.debug("Database schema is up to date.")
+        return applied
+
+    async def verify_indexes(self) -> Dict[str, bool]:
+        """
+        EXPLAINs the hot lookups, built exactly like AsyncDatabaseManager.select builds them,
+        and checks that each one can be served by an index.
+        Sequential scans are disabled for the check, since on small tables the planner
+        rightly prefers them even when a usable index exists.
+        Returns whether an index is used, keyed by table name.
+        """
+        results: Dict[str, bool] = dict()
+        async with self.database_manager.transaction() as tx:
+            await tx.connection.execute("SET LOCAL enable_seqscan = off")
+            for table_name, criteria in HOT_LOOKUPS:
+                query, params = self.database_manager._build_select(
+                    table_name, criteria, None, None, False, None, None, None
+                )
+                raw_plan = await tx.connection.fetchval(
+                    f"EXPLAIN (FORMAT JSON) {query}", *params
+                )
+                plan = json.loads(raw_plan) if isinstance(raw_plan, str) else raw_plan
+                node_types = _plan_node_types(plan[0]["Plan"])
+                results[table_name] = any(
+                    node_type in _INDEX_NODE_TYPES for node_type in node_types
+                )
+                if not results[table_name]:
+                    self.logger.warning(
+                        f"Lookup on {table_name} by {', '.join(criteria)} does not use an index ({' > '.join(node_types)})."
+                    )
+        return results
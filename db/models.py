@@ -0,0 +1,50 @@
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+
+@dataclass
+class StatementCacheStats:
+    size: int
+    hits: int
+    misses: int
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+@dataclass
+class LatencySummary:
+    count: int
+    average_ms: float
+    max_ms: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+
+
+@dataclass
+class PoolStats:
+    size: int
+    idle: int
+    in_use: int
+    peak_in_use: int
+    max_size: int
+    acquire_wait: LatencySummary
+    replicas: int = 0
+
+
+@dataclass
+class CacheChangeEvent:
+    """
+    A row change broadcast by the cache invalidation trigger.
+    `row` is the new row (the deleted row for DELETE), `old_row` the previous row for UPDATE.
+    Large text columns are left out of both to stay under the NOTIFY payload limit.
+    """
+
+    table: str
+    operation: str
+    row: Dict[str, Any]
+    old_row: Optional[Dict[str, Any]] = None
+    origin: Optional[str] = None
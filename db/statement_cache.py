@@ -0,0 +1,46 @@
+from collections import OrderedDict
+from typing import Callable, Hashable
+from db.models import StatementCacheStats
+
+
+class StatementCache:
+    """
+    A bounded LRU of generated SQL text, keyed by the shape of the statement
+    (operation, table and the sorted column set).
+
+    A hit skips the string building completely, and because the same shape always yields
+    the exact same text, asyncpg's per-connection prepared statement cache (which is keyed by
+    the query text) can reuse the server-side statement instead of parsing and planning it again.
+    """
+
+    def __init__(self, max_size: int = 512):
+        self.max_size = max_size
+        self._statements: OrderedDict[Hashable, str] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._statements)
+
+    def get(self, shape: Hashable, build: Callable[[], str]) -> str:
+        sql = self._statements.get(shape)
+        if sql is not None:
+            self.hits += 1
+            self._statements.move_to_end(shape)
+            return sql
+        self.misses += 1
+        sql = build()
+        self._statements[shape] = sql
+        if len(self._statements) > self.max_size:
+            self._statements.popitem(last=False)
+        return sql
+
+    def stats(self) -> StatementCacheStats:
+        return StatementCacheStats(
+            size=len(self._statements), hits=self.hits, misses=self.misses
+        )
+
+    def clear(self):
+        self._statements.clear()
+        self.hits = 0
+        self.misses = 0
@@ -11,14 +11,26 @@ from config import (
     VERSION,
     app_mode,
     db_url,
+    db_replica_urls,
     MY_GUILD,
+    db_pool_min_size,
+    db_pool_max_size,
+    db_statement_cache_size,
+    db_command_timeout,
+    db_copy_threshold,
+    command_sync_state_file,
+    feedback_leaderboard_refresh_interval,
 )
 from core.feedback_manager import FeedbackManager
 from core.role_requesting_manager import RoleRequestManager
 from core.ticket_manager import TicketManager
 from core.keyword_manager import KeywordManager
 from core.ticket_panel_manager import TicketPanelManager
-from db.database_manager import AsyncDatabaseManager, DatabaseManager
+from core.startup import StartupProfiler
+from core.command_sync import CommandTreeSyncer
+from db.cache_invalidation import CacheInvalidationListener
+from db.database_manager import AsyncDatabaseManager
+from db.migrations import MigrationRunner
 import signal
 from config.logger import setup_logger
 
@@ -35,13 +47,19 @@ class DragonBot(commands.Bot):
         )
         assert db_url is not None
         self.logger = logger
-
-        self.db_manager = DatabaseManager(database_url=db_url)
-        # Maybe we will need the Synchrounus database manager one day.
-
-        self.async_db_manager = AsyncDatabaseManager(db_url=db_url)
+        self.startup = StartupProfiler(logger=self.logger)
+
+        self.async_db_manager = AsyncDatabaseManager(
+            db_url=db_url,
+            min_size=db_pool_min_size,
+            max_size=db_pool_max_size,
+            statement_cache_size=db_statement_cache_size,
+            command_timeout=db_command_timeout,
+            copy_threshold=db_copy_threshold,
+            replica_urls=db_replica_urls,
+        )
         self.feedback_manager = FeedbackManager(
-            bot=self, database_manager=self.async_db_manager
+            bot=self, database_manager=self.async_db_manager, logger=self.logger
         )
         self.ticket_manager = TicketManager(
             bot=self,
@@ -58,31 +76,78 @@ class DragonBot(commands.Bot):
         self.role_request_manager = RoleRequestManager(
             bot=self, database_manager=self.async_db_manager
         )
+        self.cache_listener = CacheInvalidationListener(
+            db_url=db_url,
+            origin=self.async_db_manager.application_name,
+            logger=self.logger,
+        )
+        for manager in (
+            self.feedback_manager,
+            self.ticket_manager,
+            self.ticket_panel_manager,
+            self.keyword_manager,
+            self.role_request_manager,
+        ):
+            manager.register_cache_listener(self.cache_listener)
+        self.command_syncer = CommandTreeSyncer(
+            tree=self.tree,
+            guild=MY_GUILD,
+            state_file=command_sync_state_file,
+            logger=self.logger,
+        )
 
     async def on_ready(self):
         self.logger.info(f"{self.user} is now online!")
         await self.change_presence(
             activity=discord.Game(f"Developed by {self.get_user(MY_USER_ID)}")
         )
-        self.tree.copy_global_to(guild=MY_GUILD)
-        await self.tree.sync(guild=MY_GUILD)
+        # on_ready fires again on every gateway reconnect, the commands are synced once in setup_hook.
+        if not self.startup.finished:
+            self.startup.finish()
 
     async def setup_hook(self):
-        await self.async_db_manager.connect()
-        self.logger.debug("Connected to the database")
-        await self.keyword_manager.initialize_cache()
-        self.logger.debug("Keyword cache initialized")
-        self.logger.debug("Initializing role request data cache")
-        await self.role_request_manager.init_cache()
-        self.logger.debug("Role request data cache initialized")
-        await self.ticket_manager.init_cache()
-        for cog in filter(
-            lambda file: file.endswith(".py"),
-            os.listdir("./cogs"),
-        ):
-            await self.load_extension(f"cogs.{cog[:-3]}")
+        async with self.startup.phase("connect"):
+            await self.async_db_manager.connect()
+        migration_runner = MigrationRunner(
+            database_manager=self.async_db_manager, logger=self.logger
+        )
+        async with self.startup.phase("migrate"):
+            await migration_runner.migrate()
+            await migration_runner.verify_indexes()
+        # Listen before warming the caches, the changes committed meanwhile are applied once they are loaded.
+        async with self.startup.phase("cache listener"):
+            await self.cache_listener.listen()
+        # The caches are independent of each other, warm them up concurrently.
+        await self.startup.run_concurrently(
+            "caches",
+            {
+                "keyword cache": self.keyword_manager.initialize_cache(),
+                "role request cache": self.role_request_manager.init_cache(),
+                "ticket cache": self.ticket_manager.init_cache(),
+                "ticket panel cache": self.ticket_panel_manager.init_cache(),
+                "feedback stats": self.feedback_manager.init_cache(),
+            },
+        )
+        await self.cache_listener.start()
+        self.feedback_manager.start_leaderboard_refresh(
+            interval=feedback_leaderboard_refresh_interval
+        )
+        # Each cog only depends on the managers, never on another cog.
+        await self.startup.run_concurrently(
+            "cogs",
+            {
+                f"cog {cog[:-3]}": self.load_extension(f"cogs.{cog[:-3]}")
+                for cog in sorted(os.listdir("./cogs"))
+                if cog.endswith(".py")
+            },
+        )
+        async with self.startup.phase("tree sync"):
+            await self.command_syncer.sync()
 
     async def close(self):
+        await self.cache_listener.close()
+        await self.feedback_manager.close()
+        await self.ticket_manager.close()
         await self.async_db_manager.close()
         await super().close()
 
@@ -0,0 +1,136 @@
+"""
+Tests of AsyncDatabaseManager against a real PostgreSQL server.
+
+Set DATABASE_TEST_URL to a test database to run them, they create and drop their own table.
+"""
+
+import os
+import uuid
+from decimal import Decimal
+import pytest
+import pytest_asyncio
+from db.database_manager import (
+    AsyncDatabaseManager,
+    DatabaseManager,
+    _decode_numeric,
+    _encode_numeric,
+)
+
+DATABASE_URL = os.getenv("DATABASE_TEST_URL")
+
+requires_database = pytest.mark.skipif(
+    not DATABASE_URL, reason="DATABASE_TEST_URL is not set"
+)
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        0,
+        1,
+        -1,
+        9999,
+        10000,
+        1234567890123456789,
+        -(10**29),
+        Decimal("0.0001"),
+        Decimal("-12.50"),
+        Decimal("1.5000000000000000"),
+    ],
+)
+def test_numeric_codec_round_trip(value):
+    decoded = _decode_numeric(_encode_numeric(value))
+    assert decoded == value
+    assert type(decoded) is type(value)
+    if isinstance(value, Decimal):
+        assert decoded.as_tuple() == value.as_tuple()
+
+
+async def _drop_table(db: AsyncDatabaseManager, table_name: str):
+    async with db.acquire() as connection:
+        await connection.execute(f"DROP TABLE {table_name}")
+
+
+@pytest_asyncio.fixture
+async def database():
+    assert DATABASE_URL
+    db = AsyncDatabaseManager(db_url=DATABASE_URL, min_size=1, max_size=2)
+    await db.connect()
+    table_name = f"test_insert_many_{uuid.uuid4().hex[:8]}"
+    async with db.acquire() as connection:
+        await connection.execute(
+            f"CREATE TABLE {table_name} (id serial PRIMARY KEY, guild_id numeric(30) UNIQUE, label text)"
+        )
+    try:
+        yield db, table_name
+    finally:
+        await _drop_table(db, table_name)
+        await db.close()
+
+
+@requires_database
+@pytest.mark.asyncio
+@pytest.mark.parametrize("on_conflict_do_nothing", [False, True])
+async def test_insert_many_copies_numeric_columns(database, on_conflict_do_nothing):
+    db, table_name = database
+    rows = [
+        {"guild_id": 1000000000000000000 + i, "label": f"row-{i}"} for i in range(50)
+    ]
+    await db.insert_many(table_name, rows[:10], use_copy=False)
+    # The first ten rows exist already, with on_conflict_do_nothing the staging table skips them.
+    new_rows = rows if on_conflict_do_nothing else rows[10:]
+    await db.insert_many(
+        table_name,
+        new_rows,
+        use_copy=True,
+        on_conflict_do_nothing=on_conflict_do_nothing,
+    )
+
+    async with db.acquire() as connection:
+        records = await connection.fetch(
+            f"SELECT guild_id, label FROM {table_name} ORDER BY guild_id"
+        )
+        max_id = await connection.fetchval(f"SELECT max(id) FROM {table_name}")
+    assert [dict(record) for record in records] == rows
+    assert all(type(record["guild_id"]) is int for record in records)
+    # Every copied row draws at most one id from the serial column.
+    assert max_id <= 10 + len(new_rows)
+
+
+@requires_database
+@pytest.mark.asyncio
+async def test_numeric_codec_matches_server(database):
+    db, _ = database
+    async with db.acquire() as connection:
+        for value in (1234567890123456789, Decimal("-0.00010"), Decimal("3.25")):
+            assert (
+                await connection.fetchval("SELECT ($1::numeric)::text", value)
+                == str(value)
+            )
+        assert await connection.fetchval(
+            "SELECT avg(x) FROM (VALUES (1), (2)) v(x)"
+        ) == Decimal("1.5")
+        assert await connection.fetchval("SELECT 42::numeric(30)") == 42
+
+
+@requires_database
+def test_sync_transaction_commits_and_rolls_back():
+    assert DATABASE_URL
+    table_name = f"test_sync_transaction_{uuid.uuid4().hex[:8]}"
+    with DatabaseManager(database_url=DATABASE_URL) as db:
+        db.create_table(table_name, [("id", "serial PRIMARY KEY"), ("label", "text")])
+        try:
+            with db.transaction() as tx:
+                tx.insert(table_name, {"label": "committed"})
+                assert len(tx.select(table_name)) == 1
+
+            with pytest.raises(ValueError):
+                with db.transaction() as tx:
+                    tx.insert(table_name, {"label": "rolled back"})
+                    raise ValueError()
+
+            assert [record["label"] for record in db.select(table_name)] == [
+                "committed"
+            ]
+        finally:
+            db._run(_drop_table(db._async_manager, table_name))
@@ -1,4 +1,6 @@
-from typing import Any, Optional
+import asyncio
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 import discord
 from discord import Guild, Member, Role, PartialMessage, Message, TextChannel
 from discord.abc import GuildChannel
@@ -98,3 +100,65 @@ async def try_get_message(
         get_method_name="get_partial_message",
         fetch_method_name="fetch_message",
     )
+
+
+async def try_get_members(guild: Guild, member_ids: Iterable[int]) -> Dict[int, Member]:
+    """
+    Resolves many members at once: from the member cache first, then the missing ones
+    with gateway member queries of up to 100 ids, instead of one fetch_member call each.
+    Members that left the guild (or could not be queried) are missing from the result.
+    """
+    members: Dict[int, Member] = dict()
+    missing: List[int] = []
+    for member_id in dict.fromkeys(member_ids):
+        if member := guild.get_member(member_id):
+            members[member_id] = member
+        else:
+            missing.append(member_id)
+    for start in range(0, len(missing), 100):
+        try:
+            queried = await guild.query_members(
+                user_ids=missing[start : start + 100], cache=True
+            )
+        except (asyncio.TimeoutError, discord.ClientException):
+            break
+        members.update((member.id, member) for member in queried)
+    return members
+
+
+class MemberNameCache:
+    """
+    Caches the display names of guild members for `ttl` seconds, so views rendered often
+    (e.g. leaderboards) don't resolve the same members over and over.
+    Names of members that could not be resolved are not cached.
+    """
+
+    def __init__(self, ttl: float = 600, max_size: int = 5000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._names: Dict[Tuple[int, int], Tuple[str, float]] = dict()
+        # key: (guild_id, member_id), value: (display name, expiry)
+
+    async def resolve(self, guild: Guild, member_ids: Iterable[int]) -> Dict[int, str]:
+        now = time.monotonic()
+        names: Dict[int, str] = dict()
+        stale: List[int] = []
+        for member_id in member_ids:
+            cached = self._names.get((guild.id, member_id))
+            if cached and cached[1] > now:
+                names[member_id] = cached[0]
+            else:
+                stale.append(member_id)
+        if not stale:
+            return names
+        members = await try_get_members(guild=guild, member_ids=stale)
+        if len(self._names) + len(members) > self.max_size:
+            self._names = {
+                key: value for key, value in self._names.items() if value[1] > now
+            }
+            if len(self._names) + len(members) > self.max_size:
+                self._names.clear()
+        for member_id, member in members.items():
+            names[member_id] = member.display_name
+            self._names[(guild.id, member_id)] = (member.display_name, now + self.ttl)
+        return names
@@ -0,0 +1,27 @@
+import importlib
+import importlib.util
+import sys
+from types import ModuleType
+
+
+def lazy_import(name: str) -> ModuleType:
+    """
+    Returns the module without executing it, the import runs on the first attribute access.
+    Use it at module level for heavy dependencies only needed by a few commands,
+    so they don't slow down the bot startup:
+
+        requests = lazy_import("requests")
+
+    A missing module still raises ImportError here, not on first use.
+    """
+    if module := sys.modules.get(name):
+        return module
+    spec = importlib.util.find_spec(name)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"No module named {name!r}", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
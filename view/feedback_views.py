@@ -1,4 +1,4 @@
-from typing import List, Union
+from typing import List, Optional, Union
 from discord import (
     Client,
     Embed,
@@ -91,14 +91,20 @@ def feedbackEmbed(
 
 
 class FeedBackSystem(View):
+    """
+    The rating buttons sent to a customer after their ticket is closed.
+    Pass timeout=None to make the view persistent, so it can be registered with bot.add_view.
+    """
+
     def __init__(
         self,
         user_id: int,
         ticket_id: int,
         guild_id: int,
         feedback_manager: FeedbackManager,
+        timeout: Optional[float] = 86400,
     ):
-        super().__init__(timeout=86400)
+        super().__init__(timeout=timeout)
         self.ticket_id = ticket_id
         self.guild_id = guild_id
         self.user_id = user_id
@@ -109,7 +115,7 @@ class FeedBackSystem(View):
             btn = Button(
                 label=star_emoji,
                 style=ButtonStyle.blurple,
-                custom_id=f"rating_{i}",
+                custom_id=f"feedback_rating:{ticket_id}:{i}",
             )
             btn.callback = self.btns_callback
             self.add_item(btn)
@@ -131,7 +137,7 @@ class FeedBackSystem(View):
         assert interaction.data
         star = interaction.data.get("custom_id")
         assert star
-        star = int(star.split("_")[1])
+        star = int(star.split(":")[-1])
         star_emoji = "⭐" * star
         embed = self.get_feedback_embed(
             client=interaction.client, rating=star, user=interaction.user
@@ -194,19 +200,29 @@ class FeedBackSystem(View):
 
 
 class WordSelection(View):
+    """
+    The review prompt sent to a customer after they rated the service.
+    Pass timeout=None to make the view persistent, so it can be registered with bot.add_view.
+    """
+
     def __init__(
         self,
         user_id: int,
         ticket_id: int,
         guild_id: int,
         feedback_manager: FeedbackManager,
+        timeout: Optional[float] = 86400,
     ):
         self.user_id = user_id
         self.ticket_id = ticket_id
         self.guild_id = guild_id
         self.message: Message | None = None
         self.feedback_manager = feedback_manager
-        super().__init__(timeout=86400)
+        super().__init__(timeout=timeout)
+        # The decorated items are created by super().__init__(), make their custom ids
+        # unique to the ticket so the view can be registered per message.
+        self.words_callback.custom_id = f"feedback_review:{ticket_id}"
+        self.btn_callback.custom_id = f"feedback_comment:{ticket_id}"
 
     @staticmethod
     def joined_review_words_and_embed(
@@ -253,7 +269,12 @@ class WordSelection(View):
             user_id=self.user_id, ticket_id=self.ticket_id, guild_id=self.guild_id
         )
 
-    @button(label="輸入評語", style=ButtonStyle.blurple, emoji="⌨")
+    @button(
+        label="輸入評語",
+        style=ButtonStyle.blurple,
+        emoji="⌨",
+        custom_id="feedback_comment",
+    )
     async def btn_callback(self, interaction: Interaction, button: Button):
         assert interaction.message
         await interaction.message.edit(view=None)
@@ -3,12 +3,15 @@ from typing import List, Dict
 from discord import Interaction, TextChannel
 from discord.ui import Modal, View, button, Button, TextInput
 import re
-import yaml
 from config.models import CloseMessageType, TicketStatus, TicketType
 from core.ticket_manager import TicketManager
 from config.constants import DS01, DISCORD_EMOJI
 from core.exceptions import ChannelCreationFail
 from utils.embed_utils import add_std_footer, create_themed_embed
+from utils.lazy_import import lazy_import
+
+# Only needed to save the business hours.
+yaml = lazy_import("yaml")
 
 
 class ParseError(Exception):
@@ -257,7 +260,11 @@ class TicketCloseToggleView(View):
         super().__init__(timeout=None)
         self.ticket_manager = ticket_manager
 
-    @button(label="關閉頻道", style=discord.ButtonStyle.blurple)
+    @button(
+        label="關閉頻道",
+        style=discord.ButtonStyle.blurple,
+        custom_id="ticket_close_toggle",
+    )
     async def close_callback(self, interaction: Interaction, button: Button):
         assert (
             interaction.message
@@ -289,7 +296,9 @@ class TicketCloseView(View):
         super().__init__(timeout=None)
         self.ticket_manager = ticket_manager
 
-    @button(label="關閉頻道", style=discord.ButtonStyle.red)
+    @button(
+        label="關閉頻道", style=discord.ButtonStyle.red, custom_id="ticket_close_confirm"
+    )
     async def close_callback(self, interaction: Interaction, button: Button):
         try:
             assert (
@@ -325,7 +334,7 @@ class TicketCloseView(View):
             except (discord.errors.NotFound, discord.errors.Forbidden):
                 pass
 
-    @button(label="取消", style=discord.ButtonStyle.gray)
+    @button(label="取消", style=discord.ButtonStyle.gray, custom_id="ticket_close_cancel")
     async def cancel_callback(self, interaction: Interaction, button: Button):
         assert (
             interaction.message
@@ -354,13 +363,15 @@ class TicketAfterClose(View):
         super().__init__(timeout=None)
         self.ticket_manager = ticket_manager
 
-    @button(label="刪除頻道", style=discord.ButtonStyle.red)
+    @button(label="刪除頻道", style=discord.ButtonStyle.red, custom_id="ticket_delete")
     async def del_callback(self, interaction: Interaction, button: Button):
         await interaction.response.defer(thinking=True)
         assert isinstance(interaction.channel, TextChannel)
         await self.ticket_manager.delete_ticket(channel=interaction.channel)
 
-    @button(label="重新開啟頻道", style=discord.ButtonStyle.green)
+    @button(
+        label="重新開啟頻道", style=discord.ButtonStyle.green, custom_id="ticket_reopen"
+    )
     async def reopen_callback(self, interaction: Interaction, button: Button):
         await interaction.response.defer(thinking=True)
         assert isinstance(interaction.channel, TextChannel)